@@ -0,0 +1,63 @@
+"""
+Benchmark of the vectorized metrics engine against ezgpx.
+
+Usage: python -m benchmarks.bench_metrics [NB_POINTS ...]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from benchmarks.generator import writeSyntheticGPX
+from src.app.metrics import computeMetrics, gpxArrays, gpxDataframe
+from ezgpx import GPX
+
+COLUMNS = dict(elevation=True,
+               time=True,
+               speed=True,
+               pace=True,
+               ascent_rate=True,
+               ascent_speed=True,
+               distance_from_start=True)
+
+
+def timeit(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f"{'points':>10} {'ezgpx (s)':>10} {'dataframe (s)':>14} {'metrics (s)':>12} {'speedup':>8}  match")
+    with tempfile.TemporaryDirectory() as directory:
+        for nb_points in sizes:
+            path = os.path.join(directory, f"track_{nb_points}.gpx")
+            writeSyntheticGPX(path, nb_points)
+
+            # ezgpx (point by point)
+            reference, reference_time = timeit(GPX(path).to_dataframe, **COLUMNS)
+
+            # Vectorized (includes extraction of the arrays from the GPX object)
+            dataframe, dataframe_time = timeit(gpxDataframe, GPX(path), **COLUMNS)
+
+            # Vectorized metrics only (arrays already available)
+            lat, lon, ele, t = gpxArrays(GPX(path))
+            _, metrics_time = timeit(computeMetrics, lat, lon, ele, t)
+
+            match = (list(reference.columns) == list(dataframe.columns)
+                     and (reference["time"].astype(str) == dataframe["time"]).all()
+                     and all(np.allclose(reference[column].astype(float), dataframe[column])
+                             for column in reference.columns if column != "time"))
+            print(f"{nb_points:>10} {reference_time:>10.4f} {dataframe_time:>14.4f} {metrics_time:>12.4f} "
+                  f"{reference_time / dataframe_time:>7.1f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark of the cold startup of the GUI (time between the start of the
+Python process and the first shown window). Exits with an error when the
+median time exceeds the target, so startup regressions are caught.
+
+Usage: python -m benchmarks.bench_startup [NB_RUNS] [--target SECONDS]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+# Maximum median time (seconds) to the first shown window
+STARTUP_TARGET = 1.0
+
+# Run in a child process: the window is shown when the event loop processes
+# its first event, then the process quits
+CHILD = """
+import os, sys, time
+start = time.perf_counter()
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+from src import Application
+imported = time.perf_counter()
+app = QApplication([])
+window = Application(os.path.join(sys.argv[1], "application.log"))
+def shown():
+    print(f"{imported - start} {time.perf_counter() - start}", flush=True)
+    app.quit()
+QTimer.singleShot(0, shown)
+app.exec_()
+"""
+
+
+def runOnce(home: str):
+    """
+    Start the application in a new process
+
+    Returns
+    -------
+    Tuple[float, float, float]
+        Import time, time to the first shown window measured in the process
+        and total time including the interpreter startup (seconds)
+    """
+    env = dict(os.environ, HOME=home, XDG_CACHE_HOME=os.path.join(home, ".cache"))
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", CHILD, home], cwd=root, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = process.stdout.readline()
+    total = time.perf_counter() - start
+    process.wait()
+    if not line:
+        raise RuntimeError("The application did not start")
+    imported, shown = (float(value) for value in line.split())
+    return imported, shown, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the time to the first shown window")
+    parser.add_argument("nb_runs", nargs="?", type=int, default=5, help="Number of runs (default 5)")
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET,
+                        help=f"Maximum median time in seconds (default {STARTUP_TARGET})")
+    args = parser.parse_args()
+
+    print(f"{'run':>4} {'imports (s)':>12} {'window (s)':>11} {'total (s)':>10}")
+    totals = []
+    with tempfile.TemporaryDirectory() as home:
+        # First run creates the cache directories and compiles the bytecode
+        runOnce(home)
+        for i in range(1, args.nb_runs + 1):
+            imported, shown, total = runOnce(home)
+            totals.append(total)
+            print(f"{i:>4} {imported:>12.3f} {shown:>11.3f} {total:>10.3f}")
+        median = statistics.median(totals)
+    print(f"median: {median:.3f} s (target {args.target:.3f} s)")
+    if median > args.target:
+        print("Startup is slower than the target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
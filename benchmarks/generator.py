@@ -0,0 +1,169 @@
+"""
+Deterministic synthetic GPX files for the benchmarks.
+
+The track is a random walk (about 3 m per second with a slowly turning
+heading) with a smooth elevation profile and a few GPS errors (isolated
+jumps of about 1 km), split in segments. The same parameters always
+produce the same file.
+
+Usage: python -m benchmarks.generator NB_POINTS PATH [--no-elevation] [--no-time]
+"""
+import os
+import argparse
+from typing import Iterator, Optional
+
+import numpy as np
+
+# Number of points formatted at once
+GENERATOR_CHUNK_SIZE = 100_000
+
+# One GPS error every GPS_ERROR_INTERVAL points
+GPS_ERROR_INTERVAL = 5_000
+
+# Start time of the tracks (one point per second)
+START_TIME = np.datetime64("2023-05-01T08:00:00", "s")
+
+
+def syntheticPoints(nb_points: int, seed: int = 0):
+    """
+    Generate the coordinates of a synthetic track
+
+    Parameters
+    ----------
+    nb_points : int
+        Number of points
+    seed : int, optional
+        Seed of the random generator, by default 0
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Latitude, longitude and elevation of the points
+    """
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0, 0.05, nb_points))
+    step = 3.0 + rng.normal(0, 0.3, nb_points)
+    lat = 45.0 + np.cumsum(step * np.cos(heading)) / 111_320
+    lon = 5.0 + np.cumsum(step * np.sin(heading)) / (111_320 * np.cos(np.radians(45.0)))
+    ele = 500 + 300 * np.sin(np.arange(nb_points) / 3_000) + np.cumsum(rng.normal(0, 0.05, nb_points))
+    errors = np.arange(GPS_ERROR_INTERVAL // 2, nb_points, GPS_ERROR_INTERVAL)
+    lat[errors] += 0.01
+    return lat, lon, ele
+
+
+def _pointLines(lat: np.ndarray,
+                lon: np.ndarray,
+                ele: Optional[np.ndarray],
+                times: Optional[np.ndarray]) -> str:
+    """
+    Format track points
+    """
+    if ele is not None and times is not None:
+        return "".join([f"<trkpt lat=\"{a:.7f}\" lon=\"{b:.7f}\"><ele>{c:.1f}</ele><time>{d}Z</time></trkpt>\n"
+                        for a, b, c, d in zip(lat.tolist(), lon.tolist(), ele.tolist(), times.tolist())])
+    if ele is not None:
+        return "".join([f"<trkpt lat=\"{a:.7f}\" lon=\"{b:.7f}\"><ele>{c:.1f}</ele></trkpt>\n"
+                        for a, b, c in zip(lat.tolist(), lon.tolist(), ele.tolist())])
+    if times is not None:
+        return "".join([f"<trkpt lat=\"{a:.7f}\" lon=\"{b:.7f}\"><time>{d}Z</time></trkpt>\n"
+                        for a, b, d in zip(lat.tolist(), lon.tolist(), times.tolist())])
+    return "".join([f"<trkpt lat=\"{a:.7f}\" lon=\"{b:.7f}\"></trkpt>\n" for a, b in zip(lat.tolist(), lon.tolist())])
+
+
+def syntheticGPX(nb_points: int,
+                 elevation: bool = True,
+                 time: bool = True,
+                 nb_segments: int = 1,
+                 seed: int = 0) -> Iterator[str]:
+    """
+    Generate the content of a synthetic GPX file chunk by chunk
+
+    Parameters
+    ----------
+    nb_points : int
+        Number of track points
+    elevation : bool, optional
+        Whether the points have an elevation, by default True
+    time : bool, optional
+        Whether the points have a time, by default True
+    nb_segments : int, optional
+        Number of track segments (of about the same size), by default 1
+    seed : int, optional
+        Seed of the random generator, by default 0
+
+    Returns
+    -------
+    Iterator[str]
+        Chunks of the file
+    """
+    lat, lon, ele = syntheticPoints(nb_points, seed)
+    yield ("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+           "<gpx version=\"1.1\" creator=\"GPX Tool benchmarks\" xmlns=\"http://www.topografix.com/GPX/1/1\" "
+           "xmlns:xsi=\"http://www.w3.org/2001/XMLSchema-instance\" "
+           "xsi:schemaLocation=\"http://www.topografix.com/GPX/1/1 http://www.topografix.com/GPX/1/1/gpx.xsd\">\n"
+           "<metadata><name>Synthetic track</name><desc>Benchmark</desc></metadata>\n"
+           "<wpt lat=\"45.0000000\" lon=\"5.0000000\"><name>Start</name></wpt>\n"
+           f"<trk><name>Synthetic {nb_points} points</name>\n")
+    bounds = np.linspace(0, nb_points, max(1, nb_segments) + 1).astype(np.int64)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        yield "<trkseg>\n"
+        for chunk in range(start, stop, GENERATOR_CHUNK_SIZE):
+            end = min(chunk + GENERATOR_CHUNK_SIZE, stop)
+            times = None
+            if time:
+                times = np.datetime_as_string(START_TIME + np.arange(chunk, end).astype("timedelta64[s]"))
+            yield _pointLines(lat[chunk:end], lon[chunk:end], ele[chunk:end] if elevation else None, times)
+        yield "</trkseg>\n"
+    yield "</trk>\n</gpx>\n"
+
+
+def writeSyntheticGPX(path: str, nb_points: int, **kwargs) -> str:
+    """
+    Write a synthetic GPX file (see syntheticGPX for the parameters)
+
+    Returns
+    -------
+    str
+        Path to the file
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        for chunk in syntheticGPX(nb_points, **kwargs):
+            file.write(chunk)
+    os.replace(temp_path, path)
+    return path
+
+
+def syntheticFile(directory: str,
+                  nb_points: int,
+                  elevation: bool = True,
+                  time: bool = True,
+                  nb_segments: int = 1,
+                  seed: int = 0) -> str:
+    """
+    Return the path to a synthetic GPX file, generated only if it does not
+    exist yet in the directory (large files take a while to generate)
+    """
+    name = f"synthetic_{nb_points}_{'e' if elevation else ''}{'t' if time else ''}_{nb_segments}_{seed}.gpx"
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        writeSyntheticGPX(path, nb_points, elevation=elevation, time=time, nb_segments=nb_segments, seed=seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic GPX file")
+    parser.add_argument("nb_points", type=int, help="Number of track points")
+    parser.add_argument("path", help="Output file")
+    parser.add_argument("--no-elevation", action="store_true", help="Points without elevation")
+    parser.add_argument("--no-time", action="store_true", help="Points without time")
+    parser.add_argument("--segments", type=int, default=1, help="Number of track segments (default 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator (default 0)")
+    args = parser.parse_args()
+    writeSyntheticGPX(args.path, args.nb_points, elevation=not args.no_elevation, time=not args.no_time,
+                      nb_segments=args.segments, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
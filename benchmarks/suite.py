@@ -0,0 +1,400 @@
+"""
+Benchmark suite of the main operations of the application on synthetic
+GPX files (see benchmarks/generator.py): parsing (workerLoadGPX), each
+pre-processing step on a GPX object tree (baseline, see preProcessGPXTree),
+the pre-processing pipeline, dataframes, map rendering
+(createMap under the offscreen Qt platform) and the three exporters.
+
+Results are stored as JSON; the compare mode flags the operations slower
+than the baseline beyond a threshold (and exits with an error).
+
+Usage:
+    python -m benchmarks.suite run [--sizes 1000 ... 10000000] [--variants et e t -] [--output results.json]
+    python -m benchmarks.suite compare BASELINE.json RESULTS.json [--threshold 0.2]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+# The application reads its cache and library locations at import time
+_HOME = tempfile.mkdtemp(prefix="gpx_tool_bench_")
+os.environ["HOME"] = _HOME
+os.environ["XDG_CACHE_HOME"] = os.path.join(_HOME, ".cache")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from benchmarks.generator import syntheticFile
+
+if TYPE_CHECKING:
+    from ezgpx import GPX
+
+# Sizes of the synthetic tracks (number of points)
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+# Sizes run by default (10M points take several minutes)
+DEFAULT_SIZES = SIZES[:4]
+
+# Variants of the synthetic tracks: "e" with elevation, "t" with time, "-" neither
+VARIANTS = ["et", "e", "t", "-"]
+
+# Largest track processed with ezgpx object trees (pre-processing, GPX
+# export): about 0.35 ms per point, against microseconds for the arrays
+EZGPX_MAX_POINTS = 100_000
+
+# Operations slower than the baseline by more than this fraction are regressions
+DEFAULT_THRESHOLD = 0.2
+
+# Format of the result files
+RESULTS_VERSION = 1
+
+# Cases in running order (each case uses the state left by the previous ones)
+CASES = ["parse",
+         "parse_disk_cache",
+         "gpx_tree",
+         "preprocess.remove_gps_errors",
+         "preprocess.remove_metadata",
+         "preprocess.remove_time",
+         "preprocess.remove_elevation",
+         "preprocess.simplify",
+         "pipeline",
+         "pipeline_cached",
+         "to_dataframe",
+         "track_dataframe",
+         "prepare_render",
+         "create_map",
+         "export_gpx",
+         "export_kml",
+         "export_csv"]
+
+# Cases building ezgpx object trees
+EZGPX_CASES = {"gpx_tree", "to_dataframe", "export_gpx"} | {case for case in CASES if case.startswith("preprocess.")}
+
+
+def measure(fn: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """
+    Run a function several times
+
+    Parameters
+    ----------
+    fn : Callable[[], None]
+        Measured function
+    repeat : int
+        Number of runs
+    setup : Optional[Callable[[], None]], optional
+        Function called before each run (not measured), by default None
+
+    Returns
+    -------
+    List[float]
+        Duration of each run (seconds)
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def preProcessGPXTree(gpx: "GPX",
+                      remove_gps_errors: bool = False,
+                      remove_metadata: bool = False,
+                      remove_time: bool = False,
+                      remove_elevation: bool = False,
+                      compress_data: bool = False):
+    """
+    Pre-process a GPX object tree in place, step by step (reference for the
+    pre-processing cases: the application computes the kept points on the
+    track and only applies them while writing, see PreProcessingPipeline
+    and writePreProcessedGPX)
+    """
+    from src.app.processing import PreProcessingPipeline, selectedGPXPoints
+    from src.app.track import Track
+
+    if remove_gps_errors or compress_data:
+        indices = PreProcessingPipeline(Track.fromGPX(gpx)).indices(remove_gps_errors, compress_data)
+        segments = [segment for track in gpx.gpx.tracks for segment in track.trkseg]
+        for segment, points in zip(segments, selectedGPXPoints(gpx, indices)):
+            segment.trkpt = points
+    if remove_metadata:
+        gpx.remove_metadata()
+    if remove_time:
+        gpx.remove_time()
+    if remove_elevation:
+        gpx.remove_elevation()
+
+
+class Suite():
+    """
+    Run the benchmark cases with an offscreen application window.
+    """
+
+    def __init__(self, data_directory: str, repeat: int = 3, cases: Optional[List[str]] = None):
+        from PyQt5.QtWidgets import QApplication
+        from src.app import Application
+        from src.app.processing import PreProcessedExport, PreProcessingPipeline
+        import ezgpx, pandas # Imported on first use by the application, not measured
+
+        self.qt_application = QApplication.instance() or QApplication([])
+        self.output_directory: str = tempfile.mkdtemp(prefix="gpx_tool_bench_output_")
+        # The log file is kept out of the source tree
+        self.log_directory: str = tempfile.mkdtemp(prefix="gpx_tool_bench_log_")
+        self.application = Application(os.path.join(self.log_directory, "application.log"))
+        self.PreProcessingPipeline = PreProcessingPipeline
+        self.PreProcessedExport = PreProcessedExport
+        self.data_directory: str = data_directory
+        self.repeat: int = repeat
+        self.cases: List[str] = cases or CASES
+
+    def wait(self):
+        """
+        Let the application process its pending events (background tasks
+        started by the measured operations)
+        """
+        self.application.scheduler.threadpool.waitForDone()
+        self.qt_application.processEvents()
+
+    def runFile(self, nb_points: int, variant: str) -> Dict[str, Dict]:
+        """
+        Run the cases on one synthetic file
+
+        Parameters
+        ----------
+        nb_points : int
+            Number of track points
+        variant : str
+            Variant of the track (see VARIANTS)
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Result of each case
+        """
+        app = self.application
+        source = syntheticFile(self.data_directory, nb_points, elevation="e" in variant, time="t" in variant)
+        path = shutil.copy(source, os.path.join(self.output_directory, os.path.basename(source)))
+        repeat = self.repeat if nb_points <= 100_000 else 1
+        results = {}
+
+        def run(case: str, fn: Callable[[], None], setup: Optional[Callable[[], None]] = None, runs: int = repeat):
+            if case not in self.cases:
+                return
+            if case in EZGPX_CASES and nb_points > EZGPX_MAX_POINTS:
+                results[case] = {"skipped": f"more than {EZGPX_MAX_POINTS} points"}
+                return
+            try:
+                durations = measure(fn, runs, setup)
+            except Exception as error: # ezgpx does not handle every variant
+                results[case] = {"error": f"{type(error).__name__}: {error}"}
+                print(f"{nb_points:>10} {variant:>3} {case:<30} {'failed':>10}   {results[case]['error']}", flush=True)
+                return
+            results[case] = {"seconds": statistics.median(durations), "runs": durations}
+            print(f"{nb_points:>10} {variant:>3} {case:<30} {results[case]['seconds']:>10.4f} s", flush=True)
+
+        def clearCaches():
+            app.track_cache.clear()
+            app.disk_cache.clear()
+
+        # Parsing (memory and disk caches cleared) and loading from the disk cache
+        run("parse", lambda: app.workerLoadGPX(path), clearCaches)
+        track = app.workerLoadGPX(path)
+        app.disk_cache.put(path, track)
+        run("parse_disk_cache", lambda: app.workerLoadGPX(path), app.track_cache.clear)
+        app.track_cache.clear()
+        track = app.workerLoadGPX(path)
+
+        # Pre-processing steps applied in place to the same object tree (baseline of the pipeline)
+        gpx = [None]
+
+        def buildTree():
+            gpx[0] = track.gpx()
+        run("gpx_tree", buildTree, runs=1)
+        for step in ["remove_gps_errors", "remove_metadata", "remove_time", "remove_elevation", "simplify"]:
+            flag = "compress_data" if step == "simplify" else step
+            run(f"preprocess.{step}", lambda: preProcessGPXTree(gpx[0], **{flag: True}), runs=1)
+
+        # Pre-processing pipeline of the track (every option), then again with its cached stages
+        settings = dict(remove_gps_errors=True, remove_time=True, remove_elevation=True, compress_data=True)
+        pipeline = [None]
+
+        def newPipeline():
+            pipeline[0] = self.PreProcessingPipeline(track)
+        run("pipeline", lambda: pipeline[0].process(**settings), newPipeline)
+        newPipeline()
+        pipeline[0].process(**settings)
+        run("pipeline_cached", lambda: pipeline[0].process(**settings))
+
+        # Dataframes (ezgpx and vectorized)
+        columns = dict(elevation=True, speed=True, pace=True, ascent_rate=True, ascent_speed=True,
+                       distance_from_start=True)
+        run("to_dataframe", lambda: track.gpx().to_dataframe(time=True, **columns), runs=1)
+        run("track_dataframe", lambda: track.dataframe(time=True, **columns),
+            lambda: setattr(track, "point_metrics", None))
+
+        # Map rendering (plot preparation in the worker, then drawing on the GUI thread)
+        render_data = [None]
+
+        def prepareRender():
+            render_data[0] = app.workerPrepareRender(track)
+        def clearDataframes():
+            app.track_cache.clear()
+            track.point_metrics = None
+        run("prepare_render", prepareRender, clearDataframes)
+        if render_data[0] is None:
+            prepareRender()
+
+        def createMap():
+            app.selected_path = track.path
+            app.createMap(render_data[0])
+            app.map.draw()
+        run("create_map", createMap, app.resetMap)
+
+        # Exports (next to the file)
+        def exportGPX():
+            export = self.PreProcessedExport(track)
+            export.gpx = track.gpx()
+            app.workerExportGPX(export)
+        run("export_gpx", exportGPX, runs=1)
+        run("export_kml", lambda: app.workerExportKML(self.PreProcessedExport(track)))
+        run("export_csv", lambda: app.workerExportCSV(self.PreProcessedExport(track)))
+
+        app.resetMap()
+        clearCaches()
+        self.wait()
+        for name in os.listdir(self.output_directory):
+            os.remove(os.path.join(self.output_directory, name))
+        return results
+
+    def run(self, sizes: List[int], variants: List[str]) -> Dict:
+        """
+        Run the cases on every file
+
+        Returns
+        -------
+        Dict
+            Results (see RESULTS_VERSION)
+        """
+        results = {}
+        for variant in variants:
+            for nb_points in sizes:
+                for case, result in self.runFile(nb_points, variant).items():
+                    results[f"{case}/{nb_points}/{variant}"] = result
+        return {"version": RESULTS_VERSION,
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "machine": {"platform": platform.platform(),
+                            "python": platform.python_version(),
+                            "numpy": np.__version__,
+                            "cpus": os.cpu_count()},
+                "results": results}
+
+    def close(self):
+        self.application.close()
+        self.wait()
+        shutil.rmtree(self.output_directory, ignore_errors=True)
+        shutil.rmtree(self.log_directory, ignore_errors=True)
+
+
+def compare(baseline: Dict, results: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare results with a baseline
+
+    Parameters
+    ----------
+    baseline : Dict
+        Reference results
+    results : Dict
+        New results
+    threshold : float, optional
+        Relative slowdown considered as a regression, by default DEFAULT_THRESHOLD
+
+    Returns
+    -------
+    List[str]
+        Keys of the regressions
+    """
+    regressions = []
+    print(f"{'operation':<50} {'baseline (s)':>12} {'new (s)':>10} {'ratio':>7}")
+    for key, result in results["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None or "seconds" not in reference or "seconds" not in result:
+            continue
+        ratio = result["seconds"] / max(reference["seconds"], 1e-9)
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            flag = "faster"
+        print(f"{key:<50} {reference['seconds']:>12.4f} {result['seconds']:>10.4f} {ratio:>6.2f}x {flag}")
+    missing = sorted(set(baseline["results"]) - set(results["results"]))
+    if missing:
+        print(f"{len(missing)} operations of the baseline were not run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of GPX Tool")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                            help=f"Number of points of the tracks (default {DEFAULT_SIZES}, up to {SIZES[-1]})")
+    run_parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=["et"],
+                            help="Tracks with elevation and time (et), elevation (e), time (t) or neither (-)")
+    run_parser.add_argument("--cases", nargs="+", choices=CASES, default=None, help="Cases to run (default all)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Runs per case for tracks up to 100k points")
+    run_parser.add_argument("--data", default=os.path.join(tempfile.gettempdir(), "gpx_tool_bench_data"),
+                            help="Directory of the generated files (kept between runs)")
+    run_parser.add_argument("--output", default=None, help="JSON result file")
+    run_parser.add_argument("--baseline", default=None, help="Compare with this JSON result file")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help=f"Relative slowdown flagged as a regression (default {DEFAULT_THRESHOLD})")
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline", help="Reference JSON result file")
+    compare_parser.add_argument("results", help="New JSON result file")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help=f"Relative slowdown flagged as a regression (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "run":
+            logging.disable(logging.CRITICAL)
+            suite = Suite(args.data, args.repeat, args.cases)
+            try:
+                results = suite.run(args.sizes, args.variants)
+            finally:
+                suite.close()
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as file:
+                    json.dump(results, file, indent=2)
+            if args.baseline is None:
+                return
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        else:
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+            with open(args.results, encoding="utf-8") as file:
+                results = json.load(file)
+    finally:
+        shutil.rmtree(_HOME, ignore_errors=True)
+
+    regressions = compare(baseline, results, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
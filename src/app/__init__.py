@@ -1,4 +1,25 @@
+from .algorithms import *
 from .application import *
-from .figures import *
+from .cache import *
+from .exporters import *
+from .library import *
 from .logger import *
-from .workers import *
\ No newline at end of file
+from .metrics import *
+from .models import *
+from .processes import *
+from .processing import *
+from .profiling import *
+from .reader import *
+from .renderers import *
+from .tiles import *
+from .track import *
+from .widgets import *
+from .workers import *
+
+
+def __getattr__(name: str):
+    # The matplotlib canvas is imported on first use (slow import, only needed once a track is plotted)
+    if name in ("MatplotlibFigure", "ZOOM_FACTOR"):
+        from . import figures
+        return getattr(figures, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
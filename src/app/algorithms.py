@@ -0,0 +1,323 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .metrics import EARTH_RADIUS, NAT, haversineDistances
+
+
+def pointSegmentDistance(px: np.ndarray, py: np.ndarray,
+                         ax: np.ndarray, ay: np.ndarray,
+                         bx: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """
+    Distance between points and segments (vectorized)
+
+    Parameters
+    ----------
+    px, py : np.ndarray
+        Coordinates of the points
+    ax, ay : np.ndarray
+        Coordinates of the first end of the segments
+    bx, by : np.ndarray
+        Coordinates of the second end of the segments
+
+    Returns
+    -------
+    np.ndarray
+        Distance between each point and the corresponding segment
+    """
+    dx = bx - ax
+    dy = by - ay
+    length_2 = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((px - ax) * dx + (py - ay) * dy) / length_2
+    t = np.clip(np.nan_to_num(t, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def douglasPeuckerImportance(x: np.ndarray,
+                             y: np.ndarray,
+                             checkpoint: Optional[Callable[[], None]] = None,
+                             segment_offsets: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute the Ramer-Douglas-Peucker importance of each point of a polyline,
+    ie: the largest tolerance for which the point is kept by the algorithm.
+    Simplifying the polyline with a tolerance epsilon is equivalent to keeping
+    the points whose importance is greater than epsilon.
+
+    All the ranges of a given recursion depth are processed at once, so the
+    number of Python iterations is the depth of the recursion, not the number
+    of points.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Abscissa of the points
+    y : np.ndarray
+        Ordinate of the points
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called at each recursion depth (raises to abort), by default None
+    segment_offsets : Optional[np.ndarray], optional
+        Index of the first point of each polyline followed by the number of
+        points (polylines simplified independently), by default None (single polyline)
+
+    Returns
+    -------
+    np.ndarray
+        Importance of each point (infinite for the end points)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    importance = np.zeros(n)
+    if n == 0:
+        return importance
+    if segment_offsets is None:
+        segment_offsets = [0, n]
+    segment_offsets = np.asarray(segment_offsets, dtype=np.int64)
+    starts = segment_offsets[:-1][segment_offsets[1:] > segment_offsets[:-1]]
+    ends = segment_offsets[1:][segment_offsets[1:] > segment_offsets[:-1]] - 1
+    importance[starts] = importance[ends] = np.inf
+    parents = np.full(len(starts), np.inf)
+    while starts.size:
+        if checkpoint is not None:
+            checkpoint()
+
+        # Only ranges containing interior points need to be split
+        mask = ends - starts > 1
+        starts, ends, parents = starts[mask], ends[mask], parents[mask]
+        if not starts.size:
+            break
+
+        # Flat indices of the interior points of every range
+        lengths = ends - starts - 1
+        offsets = np.cumsum(lengths) - lengths
+        range_ids = np.repeat(np.arange(len(starts)), lengths)
+        indices = np.arange(lengths.sum()) - offsets[range_ids] + starts[range_ids] + 1
+
+        # Distance to the chord of their range
+        a = starts[range_ids]
+        b = ends[range_ids]
+        distances = pointSegmentDistance(x[indices], y[indices], x[a], y[a], x[b], y[b])
+
+        # Farthest point of each range (first one in case of equality)
+        d_max = np.maximum.reduceat(distances, offsets)
+        candidates = np.flatnonzero(distances == d_max[range_ids])
+        _, first = np.unique(range_ids[candidates], return_index=True)
+        splits = indices[candidates[first]]
+
+        # A point cannot be more important than the point that created its range
+        split_importance = np.minimum(d_max, parents)
+        importance[splits] = split_importance
+
+        starts = np.concatenate((starts, splits))
+        ends = np.concatenate((splits, ends))
+        parents = np.concatenate((split_importance, split_importance))
+    return importance
+
+
+def localProjection(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Project coordinates to meters around the center of the points
+    (equirectangular projection, accurate for the extent of a track)
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Abscissa and ordinate of the points (meters)
+    """
+    if len(lat) == 0:
+        return np.zeros(0), np.zeros(0)
+    lat_0 = np.radians((np.min(lat) + np.max(lat)) / 2)
+    x = np.radians(lon) * (EARTH_RADIUS * np.cos(lat_0))
+    y = np.radians(lat) * EARTH_RADIUS
+    return x, y
+
+
+def outlierMask(lat: np.ndarray,
+                lon: np.ndarray,
+                time: Optional[np.ndarray],
+                segment_offsets: np.ndarray,
+                max_speed: float,
+                max_acceleration: float,
+                max_jump: float,
+                max_run: int = 10,
+                max_passes: int = 8,
+                checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """
+    Detect GPS errors: runs of at most max_run points entered and left by an
+    implausible move, when going directly from the point before the run to
+    the point after it is plausible.
+
+    A move between consecutive points is implausible when its speed exceeds
+    max_speed, when its speed is more than max_acceleration above the speed
+    of the previous or next move (sudden peak), or (without time) when its
+    length exceeds max_jump. The first and last points of the segments are
+    always kept. Each pass is vectorized; passes are repeated on the kept
+    points until no error is found.
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+    time : Optional[np.ndarray]
+        Time of the points (UTC epoch nanoseconds, NAT if missing)
+    segment_offsets : np.ndarray
+        Index of the first point of each segment followed by the number of points
+    max_speed : float
+        Maximum speed (meters per second)
+    max_acceleration : float
+        Maximum acceleration (meters per second squared)
+    max_jump : float
+        Maximum distance (meters) between consecutive points without time
+    max_run : int, optional
+        Maximum number of consecutive erroneous points, by default 10
+    max_passes : int, optional
+        Maximum number of passes, by default 8
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called at each pass (raises to abort), by default None
+
+    Returns
+    -------
+    np.ndarray
+        True for the points to keep
+    """
+    n = len(lat)
+    keep = np.ones(n, dtype=bool)
+    segment_offsets = np.asarray(segment_offsets, dtype=np.int64)
+    segment_ids = np.repeat(np.arange(len(segment_offsets) - 1), np.diff(segment_offsets))
+    for _ in range(max_passes):
+        if checkpoint is not None:
+            checkpoint()
+        indices = np.flatnonzero(keep)
+        if len(indices) < 3:
+            break
+
+        # Moves between consecutive kept points of the same segment
+        distances = haversineDistances(lat[indices], lon[indices])[1:]
+        inside = segment_ids[indices[1:]] == segment_ids[indices[:-1]]
+        if time is not None:
+            times = time[indices]
+            timed = (times[1:] != NAT) & (times[:-1] != NAT)
+            durations = np.zeros(len(distances))
+            np.subtract(times[1:], times[:-1], out=durations, where=timed, casting="unsafe")
+            durations /= 1e9
+            timed &= durations > 0
+            speeds = np.zeros(len(distances))
+            np.divide(distances, durations, out=speeds, where=timed)
+            implausible = np.where(timed, speeds > max_speed, distances > max_jump)
+
+            # Sudden speed peaks (compared with the previous and next moves)
+            peak_before = np.zeros(len(speeds), dtype=bool)
+            peak_after = np.zeros(len(speeds), dtype=bool)
+            both_timed = timed[1:] & timed[:-1] & inside[1:] & inside[:-1]
+            peak_before[1:] = both_timed & (speeds[1:] - speeds[:-1] > max_acceleration * durations[1:])
+            peak_after[:-1] = both_timed & (speeds[:-1] - speeds[1:] > max_acceleration * durations[:-1])
+            implausible |= peak_before | peak_after
+        else:
+            implausible = distances > max_jump
+        implausible &= inside
+
+        # Runs between two implausible moves (move k goes from kept point k to k + 1)
+        moves = np.flatnonzero(implausible)
+        if len(moves) < 2:
+            break
+        first, last = moves[:-1], moves[1:]
+        candidates = (last - first <= max_run) & inside[first] & (segment_ids[indices[first]] == segment_ids[indices[last + 1]])
+        first, last = first[candidates], last[candidates]
+
+        # Skipping the run must be plausible
+        before, after = indices[first], indices[last + 1]
+        skip_lat = np.stack((lat[before], lat[after]), axis=1).ravel()
+        skip_lon = np.stack((lon[before], lon[after]), axis=1).ravel()
+        skip_distances = haversineDistances(skip_lat, skip_lon)[1::2]
+        plausible = skip_distances <= max_jump
+        if time is not None:
+            skip_timed = (time[before] != NAT) & (time[after] != NAT) & (time[after] > time[before])
+            skip_durations = np.where(skip_timed, time[after] - time[before], 1) / 1e9
+            plausible = np.where(skip_timed, skip_distances <= max_speed * skip_durations, plausible)
+        first, last = first[plausible], last[plausible]
+        if not len(first):
+            break
+
+        # Remove the points of the runs
+        lengths = last - first
+        run_ids = np.repeat(np.arange(len(first)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + first[run_ids] + 1
+        keep[indices[positions]] = False
+    return keep
+
+
+def visvalingamMask(x: np.ndarray,
+                    y: np.ndarray,
+                    area: float,
+                    segment_offsets: Optional[np.ndarray] = None,
+                    checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """
+    Simplify polylines with the Visvalingam-Whyatt algorithm: points forming
+    a triangle smaller than the area with their neighbours are removed and
+    the triangles of their neighbours are updated.
+
+    Instead of removing the smallest triangle first, the points whose
+    triangle is a local minimum (not adjacent) and the collinear points are
+    removed at once at each iteration, so the number of Python iterations
+    stays small. The kept points differ slightly from the sequential
+    algorithm (about 2% of the kept points on noisy tracks).
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Abscissa of the points
+    y : np.ndarray
+        Ordinate of the points
+    area : float
+        Minimum area of the triangle of the kept points
+    segment_offsets : Optional[np.ndarray], optional
+        Index of the first point of each polyline followed by the number of
+        points (polylines simplified independently), by default None (single polyline)
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called at each iteration (raises to abort), by default None
+
+    Returns
+    -------
+    np.ndarray
+        True for the points to keep
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    keep = np.ones(n, dtype=bool)
+    if segment_offsets is None:
+        segment_offsets = [0, n]
+    segment_offsets = np.asarray(segment_offsets, dtype=np.int64)
+    segment_ids = np.repeat(np.arange(len(segment_offsets) - 1), np.diff(segment_offsets))
+    while True:
+        if checkpoint is not None:
+            checkpoint()
+        indices = np.flatnonzero(keep)
+        if len(indices) < 3:
+            break
+
+        # Triangle of each kept point with its kept neighbours (end points are kept)
+        px, py = x[indices], y[indices]
+        areas = np.full(len(indices), np.inf)
+        areas[1:-1] = np.abs((px[:-2] - px[2:]) * (py[1:-1] - py[:-2]) - (px[:-2] - px[1:-1]) * (py[2:] - py[:-2])) / 2
+        ids = segment_ids[indices]
+        areas[1:-1][(ids[:-2] != ids[1:-1]) | (ids[2:] != ids[1:-1])] = np.inf
+
+        # Remove the local minima smaller than the area (ties: the last one)
+        removed = areas < area
+        removed[1:] &= (areas[1:] <= areas[:-1]) | (areas[1:] == 0)
+        removed[:-1] &= (areas[:-1] < areas[1:]) | (areas[:-1] == 0)
+        if not removed.any():
+            break
+        keep[indices[removed]] = False
+    return keep
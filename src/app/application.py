@@ -1,50 +1,126 @@
 # System
 import os
 import logging
+import time
 from pathlib import Path
-from queue import Queue
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
 
 # GUI
-from PyQt5 import uic
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 # from PyQt5.QtCore import QThreadPool, QDir, QSortFilterProxyModel
 # from PyQt5.QtWidgets import QMainWindow, QFileSystemModel
 
-# Images
+# Images (matplotlib is imported when the first track is plotted)
 import numpy as np
-from PIL import Image
-import matplotlib
-from mpl_toolkits.basemap import Basemap
-from .figures import MatplotlibFigure
+from .models import FilesProxyModel, LibraryModel, SpansModel
+from .profiling import PROFILER_REFRESH_INTERVAL, profiler, profileSpan
+from .renderers import LODTrackRenderer, OverlayRenderer, RenderData, mergeBounds, overlayColors, prepareRender
+from .tiles import (DEFAULT_BASEMAPS_DIR, DEFAULT_TILE_CACHE_SIZE, MAX_PARENT_LEVELS, TILES_DELAY, TILES_PER_WORKER,
+                    MBTilesReader, TileCache, TileRenderer, findBasemaps, loadTiles, visibleTiles)
+from .widgets import LogoWidget, logoPixmap
 
-# GPX
-from ezgpx import GPX
+# GPX (ezgpx is imported when a file is exported)
+if TYPE_CHECKING:
+    from ezgpx import GPX
 
 # Log and Thread
 from .logger import *
 from .workers import *
 
-
-class Application(QMainWindow):
+# Processing
+from .processing import *
+from .processes import *
+from .reader import *
+from .cache import *
+from .exporters import *
+from .library import *
+from .metrics import *
+from .track import *
+
+# Layout of the window (precompiled, regenerate it after editing the ui file with
+# python -m PyQt5.uic.pyuic src/app/application.ui -o src/app/ui_application.py)
+UI_PATH = "src/app/application.ui"
+try:
+    from .ui_application import Ui_MainWindow
+except ImportError:
+    class Ui_MainWindow():
+        def setupUi(self, window):
+            from PyQt5 import uic
+            uic.loadUi(UI_PATH, window)
+
+# Log file of the application (replaced at each start)
+LOG_PATH = "application.log"
+
+
+class Application(QMainWindow, Ui_MainWindow):
     
-    def __init__(self):
+    def __init__(self, log_path: str = LOG_PATH):
         """
         Initialise the application
+
+        Args:
+            log_path (str, optional): Path to the log file. Defaults to LOG_PATH.
         """
         super(Application, self).__init__()
         # self.setWindowTitle("GPX Tool")
+        self.log_file: str = log_path
 
         # Multithreading attributes
         self.threadpool = QThreadPool.globalInstance()
-        self.worker_queue = Queue()
-        self.max_nb_threads: int = self.threadpool.maxThreadCount()
-        self.nb_running_threads: int = 0
+        self.scheduler = WorkerScheduler(self.threadpool)
+        self.process_pool = ProcessPool() # Started when the first large file is loaded
+        QApplication.instance().aboutToQuit.connect(self.process_pool.shutdown)
 
         # GPX Variables
         self.selected_path: str = ""
-        self.gpx: GPX = None
+        self.selected_paths: List[str] = [] # Files of the overlay map (multi-selection)
+        self.selection_id: int = 0 # Incremented for each selection (results of previous ones are ignored)
+        self.overlay_tracks: Dict[str, Track] = {}
+        self.overlay_render_data: Dict[str, RenderData] = {}
+        self.overlay_remaining: Set[str] = set() # Files whose current step (load or plot preparation) is not done
+        self.overlay_start: float = 0.0
+        self.track: Track = None # Compact track used for plots
+        self.pipeline: PreProcessingPipeline = None # Pre-processing of the track (stage results cached per settings)
+        self.track_cache = TrackCache(DEFAULT_CACHE_SIZE)
+        self.disk_cache = DiskTrackCache(DEFAULT_DISK_CACHE_DIR, DEFAULT_DISK_CACHE_SIZE) # Parsed tracks of previous sessions
+        self.track_renderer: LODTrackRenderer = None
+        self.render_data: RenderData = None # Ready to plot data of the selected track
+        self.preview_indices: np.ndarray = None # Points kept by the pre-processing (None: all the points)
+
+        # Basemap (offline MBTiles file), decoded tiles and tiles waiting to be loaded
+        self.basemap: MBTilesReader = None
+        self.tile_cache = TileCache(DEFAULT_TILE_CACHE_SIZE)
+        self.tile_renderer: TileRenderer = None
+        self.missing_tiles: List[Tuple[str, int, int, int]] = []
+        self.tile_timer = QTimer(self)
+        self.tile_timer.setSingleShot(True)
+        self.tile_timer.setInterval(TILES_DELAY)
+        self.tile_timer.timeout.connect(self.loadMissingTiles)
+
+        # Library (files tree root), its index (track summaries and spatial index) and watcher
+        self.library_root: str = os.path.realpath(str(Path.home()))
+        self.library_index = LibraryIndex(DEFAULT_INDEX_PATH)
+        self.index_queue: List[str] = [] # Files waiting to be indexed
+        self.index_running: bool = False
+        self.index_start: float = 0.0
+        self.index_scan_time: float = 0.0 # Start of the last scan (new directories are more recent)
+        self.library_watcher = QFileSystemWatcher(self)
+        self.library_watcher.directoryChanged.connect(self.onLibraryChanged)
+        self.library_watcher.fileChanged.connect(self.onLibraryChanged)
+        self.watched_directories: Set[str] = set()
+        self.watched_files: Set[str] = set()
+        self.changed_directories: Set[str] = set() # Directories to scan once the changes are over
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(WATCH_DELAY)
+        self.watch_timer.timeout.connect(self.scanChangedDirectories)
+
+        # Map Settings
+        self.track_color = "#FFA800"
+        self.track_size = 10
+        self.track_cmap = None # Created with the map canvas
 
         # Export Pre-processing Settings
         self.remove_gps_errors = False
@@ -52,6 +128,15 @@ class Application(QMainWindow):
         self.remove_time = False
         self.remove_elevation = False
         self.compress_data = False
+        self.simplification_tolerance = DEFAULT_TOLERANCE
+        self.simplification_method = DOUGLAS_PEUCKER
+
+        # Preview of the pre-processing (debounced, quick changes are merged into one update)
+        self.preview_start: float = 0.0 # Last settings change
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.startPreview)
 
         # Create GUI
         self.createGUI()
@@ -59,7 +144,10 @@ class Application(QMainWindow):
         # Show the app
         self.show()
 
-        emitLog(Log.DEBUG, f"Multithreading with maximum {self.threadpool.maxThreadCount()} threads")
+        # Synchronise the library index with the library in background
+        self.updateLibraryIndex()
+
+        emitLog(Log.DEBUG, f"Multithreading with maximum {self.scheduler.max_nb_threads} threads")
 
     ###########################################################################
     #### Signals ##############################################################
@@ -75,25 +163,40 @@ class Application(QMainWindow):
     #### Worker Management ####################################################
     ###########################################################################
 
-    def processWorkerQueue(self):
-        """
-        Handle worker queue, ie: attribute a worker to a thread when possible
-        """
-        while not self.worker_queue.empty() and self.nb_running_threads < self.max_nb_threads - 1:
-            worker = self.worker_queue.get()
-            self.threadpool.start(worker)
-            self.nb_running_threads += 1
-
     def addWorker(self, worker):
         """
-        Add worker to the worker queue
+        Submit worker to the scheduler
 
         Args:
             worker (Worker): Worker object used to download and parse files
-                             when attributed to a thread
+                             when attributed to a thread (once its
+                             dependencies are complete and its resources free)
+        """
+        return self.scheduler.submit(worker)
+
+    def createLoadWorker(self, path: str, priority: Priority = Priority.HIGH) -> Worker:
         """
-        self.worker_queue.put(worker)
-        self.processWorkerQueue()
+        Create the worker loading a GPX file (large files that are not cached
+        are parsed in a worker process)
+
+        Args:
+            path (str): Path to the GPX file
+            priority (Priority, optional): Worker priority. Defaults to Priority.HIGH.
+
+        Returns:
+            Worker: Worker returning the loaded track
+        """
+        if (os.path.getsize(path) >= PROCESS_MIN_FILE_SIZE
+                and self.track_cache.get(path) is None
+                and not self.disk_cache.contains(path)):
+            # Parse large files outside of the GIL of the GUI process
+            emitLog(Log.INFO, f"Loading GPX file in a worker process: {path}")
+            worker = Worker(loadTrack, arg=path, priority=priority, group="selection",
+                            pool=self.process_pool, stage="Parsing")
+        else:
+            worker = Worker(self.workerLoadGPX, arg=path, priority=priority, group="selection")
+        worker.signals.log.connect(emitLog)
+        return worker
 
     def workerLoadGPX(self, arg, worker=None):
         """
@@ -108,26 +211,470 @@ class Application(QMainWindow):
         """
         emitLog(Log.INFO, f"Loading GPX file: {arg}", worker)
         
-        # Load GPX file
+        # Load GPX file (from cache if the file has not been modified)
         selected_path = arg
-        self.gpx = GPX(selected_path)
+        entry = self.track_cache.get(selected_path)
+        if entry is not None:
+            emitLog(Log.DEBUG, f"Loaded GPX file from cache: {selected_path}", worker)
+            return entry.track
+        with profileSpan("Disk cache read", "cache", selected_path) as span:
+            track = self.disk_cache.get(selected_path)
+            span.points = len(track) if track is not None else None
+        if track is not None:
+            emitLog(Log.DEBUG, f"Loaded GPX file from disk cache: {selected_path}", worker)
+            self.track_cache.put(selected_path, track)
+            return track
+
+        # Parsing stops at the next block if a newer selection cancelled the worker
+        with profileSpan("Parsing", "stage", selected_path) as span:
+            track = readTrack(selected_path,
+                              progress=worker.progressCallback("Parsing") if worker is not None else None,
+                              checkpoint=worker.token.check if worker is not None else None)
+            span.points = len(track)
+        self.track_cache.put(selected_path, track)
+        return track
+
+    def cacheTrack(self, track: Track):
+        """
+        Add a loaded track to the memory cache (tracks loaded in a worker
+        process are not cached yet) and store it in the disk cache in background
+
+        Parameters
+        ----------
+        track : Track
+            Loaded track
+        """
+        if self.track_cache.get(track.path) is None:
+            self.track_cache.put(track.path, track)
+        if not self.disk_cache.contains(track.path):
+            worker = Worker(self.workerStoreTrack, arg=track, priority=Priority.LOW, resources=["disk_cache"])
+            worker.signals.log.connect(emitLog)
+            self.addWorker(worker)
 
-    def workerLoadGPXComplete(self):
+    def workerStoreTrack(self, arg, worker=None):
         """
-        Load GPX file with worker (complete)
+        Store a parsed track in the disk cache with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+        """
+        track = arg
+        if not self.disk_cache.contains(track.path):
+            with profileSpan("Disk cache write", "cache", track.path, len(track)):
+                self.disk_cache.put(track.path, track)
+            emitLog(Log.DEBUG, f"Stored track in disk cache: {track.path}", worker)
+
+    def workerClearCache(self, arg, worker=None):
+        """
+        Clear the disk cache with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+        """
+        size = self.disk_cache.clear()
+        emitLog(Log.INFO, f"Cleared disk cache ({size / 1024 / 1024:.1f} MB freed)", worker)
+
+    def updateLibraryIndex(self):
         """
+        Show the track summaries of the library index and synchronise the index
+        with the files of the library (files are indexed by small low priority
+        workers, so file loads can run in between)
+        """
+        worker = Worker(self.workerLoadSummaries, arg=None, priority=Priority.LOW, resources=["library_index"])
+        worker.signals.result.connect(self.model.setSummaries)
+        self.addWorker(worker)
+        self.scanLibrary([self.library_root], None)
+
+    def workerLoadSummaries(self, arg, worker=None) -> Dict[str, Dict]:
+        """
+        Read the track summaries of the library index with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Summary of each indexed file
+        """
+        return self.library_index.summaries()
+
+    def scanLibrary(self, directories: List[str], since: float = None):
+        """
+        Find the files of the library to index with worker
+
+        Args:
+            directories (List[str]): Directories to scan
+            since (float, optional): Time of the previous scan of the directories
+                (only their files and their newer sub-directories are scanned),
+                None to scan the whole directory trees. Defaults to None.
+        """
+        self.index_start = self.index_start if self.index_running else time.perf_counter()
+        self.index_scan_time = time.time()
+        worker = Worker(self.workerScanIndex, arg=(directories, since), priority=Priority.LOW, resources=["library_index"])
+        worker.signals.result.connect(self.workerScanIndexResult)
+        worker.signals.log.connect(emitLog)
+        self.addWorker(worker)
+
+    def workerScanIndex(self, arg, worker=None) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Find the new, modified and deleted files of the library with worker
+        (deleted files are removed from the library index)
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        Tuple[List[str], List[str], List[str]]
+            Files to index, removed files and GPX files found
+        """
+        directories, since = arg
+        outdated, removed, files = [], [], []
+        scans = [(directory, since is None) for directory in directories]
+        if since is not None:
+            # Directories created (or moved) since the previous scan are not watched yet
+            for directory in directories:
+                try:
+                    with os.scandir(directory) as entries:
+                        scans.extend((entry.path, True) for entry in entries
+                                     if entry.is_dir() and not entry.name.startswith(".")
+                                     and entry.stat().st_ctime >= since - WATCH_DELAY / 1000)
+                except OSError:
+                    continue
+        for directory, recursive in scans:
+            scan = self.library_index.scan(directory, recursive)
+            for result, paths in zip((outdated, removed, files), scan):
+                result.extend(paths)
+        for path in removed:
+            self.library_index.removeFile(path)
+        emitLog(Log.DEBUG, f"Library index: {len(outdated)} files to index, {len(removed)} removed", worker)
+        return outdated, removed, files
+
+    def workerScanIndexResult(self, result: Tuple[List[str], List[str], List[str]]):
+        """
+        Find the new, modified and deleted files of the library with worker (result)
+
+        Parameters
+        ----------
+        result : Tuple[List[str], List[str], List[str]]
+            Files to index, removed files and GPX files found
+        """
+        outdated, removed, files = result
+        self.model.setSummaries({path: None for path in removed})
+        self.watchLibrary(files)
+        queued = set(self.index_queue)
+        self.index_queue.extend(path for path in outdated if path not in queued)
+        if not self.index_running:
+            self.indexNextFiles()
+
+    def indexNextFiles(self):
+        """
+        Index the next batch of files waiting to be indexed
+        """
+        if not self.index_queue:
+            if self.index_running:
+                emitLog(Log.DEBUG, f"Library index up to date ({len(self.library_index)} files, "
+                                   f"{time.perf_counter() - self.index_start:.2f} s)")
+            self.index_running = False
+            return
+        self.index_running = True
+        batch, self.index_queue = self.index_queue[:INDEX_BATCH_SIZE], self.index_queue[INDEX_BATCH_SIZE:]
+        worker = Worker(self.workerIndexFiles, arg=batch, priority=Priority.LOW, resources=["library_index"])
+        worker.signals.result.connect(self.model.setSummaries)
+        worker.signals.finished.connect(self.indexNextFiles)
+        worker.signals.log.connect(emitLog)
+        self.addWorker(worker)
+
+    def workerIndexFiles(self, arg, worker=None) -> Dict[str, Dict]:
+        """
+        Add files to the library index with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Summary of each file (None for the files that could not be read)
+        """
+        checkpoint = worker.token.check if worker is not None else None
+        return {path: self.library_index.indexFile(path, checkpoint) for path in arg}
+
+    def watchLibrary(self, files: List[str]):
+        """
+        Watch the GPX files of the library and the directories containing
+        them (up to the library root) for changes
+
+        Args:
+            files (List[str]): GPX files
+        """
+        directories = set()
+        for path in files:
+            directory = os.path.dirname(path)
+            while directory not in directories and directory.startswith(os.path.join(self.library_root, "")):
+                directories.add(directory)
+                directory = os.path.dirname(directory)
+        directories.add(self.library_root)
+        new_directories = [directory for directory in directories - self.watched_directories if os.path.isdir(directory)]
+        if new_directories:
+            self.library_watcher.addPaths(new_directories)
+            self.watched_directories.update(new_directories)
+        new_files = [path for path in files if path not in self.watched_files]
+        new_files = new_files[:max(0, WATCH_MAX_FILES - len(self.watched_files))]
+        if new_files:
+            self.library_watcher.addPaths(new_files)
+            self.watched_files.update(new_files)
+
+    def onLibraryChanged(self, path: str):
+        """
+        Function executed when a watched directory or file changes (the
+        directory is scanned once there has been no change for WATCH_DELAY)
+        """
+        if path in self.watched_files:
+            # Replaced files are no longer watched (watched again by the next scan)
+            directory = os.path.dirname(path)
+            self.watched_files.discard(path)
+            self.library_watcher.removePath(path)
+        else:
+            directory = path
+            if not os.path.isdir(path):
+                self.watched_directories.discard(path)
+                self.library_watcher.removePath(path)
+        self.changed_directories.add(directory)
+        self.watch_timer.start()
+
+    def scanChangedDirectories(self):
+        """
+        Re-index the files of the directories changed since the previous scan
+        """
+        directories, self.changed_directories = sorted(self.changed_directories), set()
+        emitLog(Log.DEBUG, f"Library changed: {', '.join(directories)}")
+        self.scanLibrary(directories, self.index_scan_time)
+
+    def workerLoadGPXResult(self, track: Track):
+        """
+        Load GPX file with worker (result)
+
+        Parameters
+        ----------
+        track : Track
+            Loaded track
+        """
+        self.cacheTrack(track)
+
+        # Ignore tracks loaded for a previously selected file
+        if track.path != self.selected_path:
+            return
         emitLog(Log.DEBUG, "Successfully loaded GPX file")
-        
-        # Process worker queue
-        self.processWorkerQueue()
+        self.track = track
+        self.preview_indices = None
+        self.pipeline = PreProcessingPipeline(track)
+        self.updatePreview()
+
+        # Run the slow pre-processing stages ahead of time (instant preview)
+        worker = Worker(self.workerPrecomputePreProcessing, arg=self.pipeline, priority=Priority.LOW,
+                        resources=["preprocessing"], group="selection")
+        worker.signals.log.connect(emitLog)
+        self.addWorker(worker)
 
         # Update buttons state
         self.button_export_gpx.setEnabled(True)
         self.button_export_kml.setEnabled(True)
         self.button_export_csv.setEnabled(True)
 
+        # Prepare map plot
+        worker = Worker(self.workerPrepareRender, arg=self.track, priority=Priority.HIGH, group="selection")
+        worker.signals.result.connect(self.workerPrepareRenderResult)
+        worker.signals.finished.connect(self.workerPrepareRenderComplete)
+        worker.signals.log.connect(emitLog)
+        self.addWorker(worker)
+
+    def workerPrepareRender(self, arg, worker=None) -> RenderData:
+        """
+        Prepare map plot with worker (dataframe, projection and level of detail)
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        RenderData
+            Ready to plot track data
+        """
+        # Create dataframe containing data from the track
+        track = arg
+        emitLog(Log.DEBUG, f"Preparing map plot: {track.path}", worker)
+        dataframe = self.track_cache.getDataframe(track.path, "map")
+        if dataframe is None:
+            with profileSpan("Dataframe", "stage", track.path, len(track)):
+                dataframe = track.dataframe(elevation=True,
+                                            time=True,
+                                            speed=True,
+                                            pace=True,
+                                            ascent_rate=True,
+                                            ascent_speed=True,
+                                            distance_from_start=True)
+            self.track_cache.putDataframe(track.path, "map", dataframe)
+
+        checkpoint = worker.token.check if worker is not None else None
+        return prepareRender(track.path, dataframe, track.bounds(), self.track_color, checkpoint)
+
+    def workerPrepareRenderResult(self, render_data: RenderData):
+        """
+        Prepare map plot with worker (result)
+
+        Parameters
+        ----------
+        render_data : RenderData
+            Ready to plot track data
+        """
+        # Ignore plots prepared for a previously selected file
+        if render_data.path != self.selected_path:
+            return
+
         # Update map plot
-        self.createMap()
+        self.render_data = render_data
+        with profileSpan("Map update", "render", render_data.path, len(render_data.x)):
+            self.createMap(render_data)
+
+    def workerPrepareRenderComplete(self):
+        """
+        Prepare map plot with worker (complete)
+        """
+        emitLog(Log.DEBUG, "Successfully prepared map plot")
+
+    def workerLoadOverlayResult(self, selection_id: int, track: Track):
+        """
+        Load a GPX file of the overlay map with worker (result)
+
+        Parameters
+        ----------
+        selection_id : int
+            Selection the file belongs to
+        track : Track
+            Loaded track
+        """
+        self.cacheTrack(track)
+        if selection_id == self.selection_id:
+            self.overlay_tracks[track.path] = track
+
+    def workerLoadOverlayComplete(self, selection_id: int, path: str):
+        """
+        Load a GPX file of the overlay map with worker (complete)
+
+        Parameters
+        ----------
+        selection_id : int
+            Selection the file belongs to
+        path : str
+            Path to the GPX file
+        """
+        if selection_id != self.selection_id or path not in self.overlay_remaining:
+            return
+        self.overlay_remaining.discard(path)
+        self.onWorkerProgress(Progress("Loading overlay",
+                                       len(self.selected_paths) - len(self.overlay_remaining),
+                                       len(self.selected_paths),
+                                       sum(len(track) for track in self.overlay_tracks.values()),
+                                       time.perf_counter() - self.overlay_start))
+        if self.overlay_remaining:
+            return
+
+        # Prepare the plot of each track once all of them are loaded (shared bounding box)
+        tracks = [self.overlay_tracks[path] for path in self.selected_paths if path in self.overlay_tracks]
+        if not tracks:
+            emitLog(Log.WARNING, "No track could be loaded for the overlay map")
+            return
+        bounds = mergeBounds(track.bounds() for track in tracks)
+        self.overlay_remaining = {track.path for track in tracks}
+        for track in tracks:
+            worker = Worker(self.workerPrepareOverlayRender, arg=(track, bounds), priority=Priority.HIGH, group="selection")
+            worker.signals.result.connect(lambda render_data, selection_id=selection_id:
+                                          self.workerPrepareOverlayRenderResult(selection_id, render_data))
+            worker.signals.finished.connect(lambda selection_id=selection_id, path=track.path:
+                                            self.workerPrepareOverlayRenderComplete(selection_id, path))
+            worker.signals.log.connect(emitLog)
+            self.addWorker(worker)
+
+    def workerPrepareOverlayRender(self, arg, worker=None) -> RenderData:
+        """
+        Prepare the plot of a track of the overlay map with worker (projection
+        with the bounding box of all the tracks and level of detail)
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        RenderData
+            Ready to plot track data
+        """
+        import pandas as pd
+        track, bounds = arg
+        dataframe = pd.DataFrame({"lat": track.lat, "lon": track.lon})
+        checkpoint = worker.token.check if worker is not None else None
+        return prepareRender(track.path, dataframe, bounds, self.track_color, checkpoint)
+
+    def workerPrepareOverlayRenderResult(self, selection_id: int, render_data: RenderData):
+        """
+        Prepare the plot of a track of the overlay map with worker (result)
+
+        Parameters
+        ----------
+        selection_id : int
+            Selection the track belongs to
+        render_data : RenderData
+            Ready to plot track data
+        """
+        if selection_id == self.selection_id:
+            self.overlay_render_data[render_data.path] = render_data
+
+    def workerPrepareOverlayRenderComplete(self, selection_id: int, path: str):
+        """
+        Prepare the plot of a track of the overlay map with worker (complete)
+
+        Parameters
+        ----------
+        selection_id : int
+            Selection the track belongs to
+        path : str
+            Path to the GPX file
+        """
+        if selection_id != self.selection_id or path not in self.overlay_remaining:
+            return
+        self.overlay_remaining.discard(path)
+        if not self.overlay_remaining and self.overlay_render_data:
+            self.createOverlayMap([self.overlay_render_data[path] for path in self.selected_paths
+                                   if path in self.overlay_render_data])
 
     def workerPreProcessGPX(self, arg, worker=None):
         """
@@ -140,29 +687,109 @@ class Application(QMainWindow):
         worker : Worker, optional
             Wroker to execute work, by default None
         """
-        emitLog(Log.DEBUG, f"Pre-processing GPX file: {self.selected_path}", worker)
+        export = arg
+        track, pipeline, settings = export.track, export.pipeline, export.settings
+        emitLog(Log.DEBUG, f"Pre-processing GPX file: {track.path}", worker)
         
-        # Pre-process GPX file
-        # gpx, remove_gps_errors, remove_metadata, remove_time, remove_elevation, compress_data = arg
-        if self.remove_gps_errors:
-            self.gpx.remove_gps_errors()
-        if self.remove_metadata:
-            self.gpx.remove_metadata()
-        if self.remove_time:
-            self.gpx.remove_time()
-        if self.remove_elevation:
-            self.gpx.remove_elevation()
-        if self.compress_data:
-            self.gpx.simplify()
+        # The track is never modified: stages already run with these settings
+        # (ie: previous exports, preview) are read from the cache of the pipeline
+        # The results are only passed to the export worker (through export)
+        checkpoint = worker.token.check if worker is not None else None
+        nb_computed, nb_reused = pipeline.nb_computed, pipeline.nb_reused
+        with profileSpan("Pre-processing", "stage", track.path, len(track)) as span:
+            export.indices = pipeline.indices(settings["remove_gps_errors"],
+                                              settings["compress_data"],
+                                              settings["tolerance"],
+                                              settings["method"],
+                                              checkpoint)
+            export.processed_track = pipeline.process(settings["remove_gps_errors"],
+                                                      settings["remove_time"],
+                                                      settings["remove_elevation"],
+                                                      settings["compress_data"],
+                                                      settings["tolerance"],
+                                                      settings["method"],
+                                                      checkpoint)
+            span.points = len(export.processed_track)
+        emitLog(Log.DEBUG, f"Pre-processing: {pipeline.nb_computed - nb_computed} stages run, "
+                           f"{pipeline.nb_reused - nb_reused} stages reused", worker)
+
+        # Full GPX object tree of the source file (GPX export only, parsed once per track)
+        export.gpx = pipeline.gpx() if export.build_tree else None
+
+    def workerPrecomputePreProcessing(self, arg, worker=None):
+        """
+        Run the slow pre-processing stages ahead of time with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+        """
+        pipeline = arg
+        with profileSpan("Pre-processing precomputation", "stage", pipeline.track.path, len(pipeline.track)):
+            pipeline.precompute(worker.token.check if worker is not None else None)
+
+    def workerPreviewPreProcessing(self, arg, worker=None) -> Tuple[PreProcessingPipeline, np.ndarray, int]:
+        """
+        Compute the points kept by the pre-processing and the size of the pre-processed track with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        Tuple[PreProcessingPipeline, np.ndarray, int]
+            Pipeline, indices of the kept points and estimated size (bytes) of the GPX export
+        """
+        pipeline, settings = arg
+        checkpoint = worker.token.check if worker is not None else None
+        with profileSpan("Pre-processing preview", "stage", pipeline.track.path, len(pipeline.track)):
+            indices = pipeline.indices(settings["remove_gps_errors"],
+                                       settings["compress_data"],
+                                       settings["tolerance"],
+                                       settings["method"],
+                                       checkpoint)
+        size = pipeline.estimateSize(len(indices), settings["remove_time"], settings["remove_elevation"])
+        return pipeline, indices, size
+
+    def workerPreviewPreProcessingResult(self, result: Tuple[PreProcessingPipeline, np.ndarray, int]):
+        """
+        Compute the points kept by the pre-processing and the size of the pre-processed track with worker (result)
+
+        Parameters
+        ----------
+        result : Tuple[PreProcessingPipeline, np.ndarray, int]
+            Pipeline, indices of the kept points and estimated size (bytes) of the GPX export
+        """
+        pipeline, indices, size = result
+        if pipeline is not self.pipeline:
+            return
+        nb_points = len(indices)
+        total = len(pipeline.track)
+        ratio = f" ({nb_points / total:.1%})" if total else ""
+        self.label_preview.setText(f"{nb_points:,} / {total:,} points{ratio}\n"
+                                   f"GPX export: ~{size / 1024 / 1024:.2f} MB")
+
+        # Draw the kept points on the map (only if they changed)
+        if nb_points == total:
+            indices = None
+        if indices is self.preview_indices:
+            return
+        self.preview_indices = indices
+        self.updateMapPreview()
+        emitLog(Log.DEBUG, f"Map preview: {nb_points:,} points in {(time.perf_counter() - self.preview_start) * 1000:.0f} ms")
 
     def workerPreProcessGPXComplete(self):
         """
         Pre-process GPX file with worker (complete)
         """
         emitLog(Log.DEBUG, "Successfully pre-processed GPX file")
-        
-        # Process worker queue
-        self.processWorkerQueue()
 
     def workerExportGPX(self, arg, worker=None):
         """
@@ -175,20 +802,25 @@ class Application(QMainWindow):
         worker : Worker, optional
             Wroker to execute work, by default None
         """
-        emitLog(Log.DEBUG, f"Export GPX file to GPX: {self.selected_path}", worker)
+        export = arg
+        track = export.track
+        emitLog(Log.DEBUG, f"Export GPX file to GPX: {track.path}", worker)
         
-        # Export to GPX
-        new_path = self.selected_path[:-4] + "_modified.gpx" # Multiple points in path? Use remove suffix instead...
-        self.gpx.to_gpx(new_path)
+        # Export to GPX (the kept points and options are only applied while writing)
+        new_path = exportPath(track.path, ".gpx", "_modified")
+        with profileSpan("GPX export", "export", track.path, len(track)):
+            writePreProcessedGPX(export.gpx,
+                                 new_path,
+                                 export.indices,
+                                 export.settings.get("remove_metadata", False),
+                                 export.settings.get("remove_time", False),
+                                 export.settings.get("remove_elevation", False))
 
     def workerExportGPXComplete(self):
         """
         Export GPX file to GPX with worker (complete)
         """
         emitLog(Log.DEBUG, "Successfully exported GPX file to GPX")
-        
-        # Process worker queue
-        self.processWorkerQueue()
 
     def workerExportKML(self, arg, worker=None):
         """
@@ -201,20 +833,21 @@ class Application(QMainWindow):
         worker : Worker, optional
             Wroker to execute work, by default None
         """
-        emitLog(Log.DEBUG, f"Export GPX file to KML: {self.selected_path}", worker)
+        export = arg
+        track = export.track
+        emitLog(Log.DEBUG, f"Export GPX file to KML: {track.path}", worker)
         
-        # Export to GPX
-        new_path = self.selected_path[:-4] + ".kml" # Multiple points in path? Use remove suffix instead...
-        self.gpx.to_kml(new_path)
+        # Export to KML (streamed from the track unless it has been pre-processed)
+        new_path = exportPath(track.path, ".kml")
+        with profileSpan("KML export", "export", track.path, len(track)):
+            exportKML(export.exportTrack(), new_path,
+                      progress=worker.progressCallback("KML export") if worker is not None else None)
 
     def workerExportKMLComplete(self):
         """
         Export GPX file to KML with worker (complete)
         """
         emitLog(Log.DEBUG, "Successfully exported GPX file to KML")
-        
-        # Process worker queue
-        self.processWorkerQueue()
 
     def workerExportCSV(self, arg, worker=None):
         """
@@ -227,20 +860,21 @@ class Application(QMainWindow):
         worker : Worker, optional
             Wroker to execute work, by default None
         """
-        emitLog(Log.DEBUG, f"Export GPX file to CSV: {self.selected_path}", worker)
+        export = arg
+        track = export.track
+        emitLog(Log.DEBUG, f"Export GPX file to CSV: {track.path}", worker)
         
-        # Export to GPX
-        new_path = self.selected_path[:-4] + ".csv" # Multiple points in path? Use remove suffix instead...
-        self.gpx.to_csv(new_path)
+        # Export to CSV (streamed from the track unless it has been pre-processed)
+        new_path = exportPath(track.path, ".csv")
+        with profileSpan("CSV export", "export", track.path, len(track)):
+            exportCSV(export.exportTrack(), new_path,
+                      progress=worker.progressCallback("CSV export") if worker is not None else None)
 
     def workerExportCSVComplete(self):
         """
         Export GPX file to CSV with worker (complete)
         """
         emitLog(Log.DEBUG, "Successfully exported GPX file to CSV")
-        
-        # Process worker queue
-        self.processWorkerQueue()  
 
     ###########################################################################
     #### GUI ##################################################################
@@ -259,26 +893,104 @@ class Application(QMainWindow):
         else:
             self.sort_proxy_model.setFilterRegularExpression(r'.*$')
 
-    def onFilesTreeClicked(self, index):
+    def onSearchAreaClicked(self):
+        """
+        Function executed when the "Search area" button is clicked (only the
+        tracks passing through the area are shown in the files tree)
         """
-        Function to execute when the tree view is clicked
+        try:
+            kind, area = parseArea(self.line_edit_area.text())
+        except ValueError as e:
+            emitLog(Log.WARNING, str(e))
+            return
+        start = time.perf_counter()
+        if kind == "box":
+            paths = self.library_index.queryBox(*area)
+        else:
+            paths = self.library_index.queryRadius(*area)
+        self.sort_proxy_model.setAllowedFiles(paths, self.library_root)
+        self.filesTree.setRootIndex(self.sort_proxy_model.mapFromSource(self.model.index(self.library_root)))
+        pending = f" (indexing in progress, {len(self.index_queue)} files remaining)" if self.index_queue else ""
+        emitLog(Log.INFO, f"Area search: {len(paths)} tracks found in {(time.perf_counter() - start) * 1000:.1f} ms{pending}")
+
+    def onClearAreaClicked(self):
+        """
+        Function executed when the "Show all" button is clicked
+        """
+        self.sort_proxy_model.setAllowedFiles(None)
+        self.filesTree.setRootIndex(self.sort_proxy_model.mapFromSource(self.model.index(self.library_root)))
+
+    def onFilesTreeSelectionChanged(self):
+        """
+        Function executed when the selection of the files tree changes
+        (one file is plotted alone, several files are overlaid)
+        """
+        paths = sorted({self.model.filePath(self.sort_proxy_model.mapToSource(index))
+                        for index in self.filesTree.selectionModel().selectedRows(0)})
+        paths = [path for path in paths if os.path.isfile(path)]
+        if len(paths) == 1:
+            self.selectFile(paths[0])
+        elif len(paths) > 1:
+            self.selectFiles(paths)
+
+    def selectFile(self, path: str):
+        """
+        Load and plot a GPX file
 
         Args:
-            index (...): ???
+            path (str): Path to the GPX file
         """
-        # Select file
-        mapped_index = self.sort_proxy_model.mapToSource(index)
-        self.selected_path = self.model.filePath(mapped_index)
-        if os.path.isfile(self.selected_path):
-            emitLog(Log.INFO, f"Selected file: {self.selected_path}")
+        self.selection_id += 1
+        self.selected_path = path
+        self.selected_paths = []
+        emitLog(Log.INFO, f"Selected file: {self.selected_path}")
 
-            # Reset map plot
-            self.resetMap()
+        # Reset map plot
+        self.resetMap()
 
-            # Load and plot GPX
-            worker = Worker(self.workerLoadGPX, arg=self.selected_path)
-            worker.signals.finished.connect(self.workerLoadGPXComplete)
-            worker.signals.log.connect(emitLog)
+        # Load and plot GPX (superseding the loads and plots of previous selections)
+        self.scheduler.cancelGroup("selection")
+        worker = self.createLoadWorker(self.selected_path)
+        worker.signals.result.connect(self.workerLoadGPXResult)
+        worker.signals.progress.connect(self.onWorkerProgress)
+        self.addWorker(worker)
+
+    def selectFiles(self, paths: List[str]):
+        """
+        Load GPX files concurrently and plot them on the same map
+
+        Args:
+            paths (List[str]): Paths to the GPX files
+        """
+        self.selection_id += 1
+        self.selected_path = ""
+        self.selected_paths = list(paths)
+        self.track = None
+        self.pipeline = None
+        self.preview_indices = None
+        self.label_preview.setText("")
+        self.overlay_tracks = {}
+        self.overlay_render_data = {}
+        self.overlay_remaining = set(paths)
+        self.overlay_start = time.perf_counter()
+        emitLog(Log.INFO, f"Selected {len(paths)} files")
+
+        # Exports apply to a single track
+        self.button_export_gpx.setEnabled(False)
+        self.button_export_kml.setEnabled(False)
+        self.button_export_csv.setEnabled(False)
+
+        # Reset map plot
+        self.resetMap()
+
+        # Load GPX files (superseding the loads and plots of previous selections)
+        self.scheduler.cancelGroup("selection")
+        for path in paths:
+            worker = self.createLoadWorker(path, Priority.NORMAL)
+            worker.signals.result.connect(lambda track, selection_id=self.selection_id:
+                                          self.workerLoadOverlayResult(selection_id, track))
+            worker.signals.finished.connect(lambda selection_id=self.selection_id, path=path:
+                                            self.workerLoadOverlayComplete(selection_id, path))
             self.addWorker(worker)
 
     def createFilesTree(self):
@@ -286,12 +998,12 @@ class Application(QMainWindow):
         Create the GUI files tree
         """
         # Model
-        self.model = QFileSystemModel()
+        self.model = LibraryModel()
         self.model.setRootPath(QDir.currentPath())
         self.model.setFilter(QDir.AllDirs | QDir.AllEntries | QDir.NoDotAndDotDot)
 
         # Proxy model to sort
-        self.sort_proxy_model = QSortFilterProxyModel()
+        self.sort_proxy_model = FilesProxyModel()
         self.sort_proxy_model.setSourceModel(self.model)
         self.sort_proxy_model.setDynamicSortFilter(True)
         self.sort_proxy_model.sort(0, Qt.AscendingOrder)
@@ -299,10 +1011,13 @@ class Application(QMainWindow):
 
         # Tree view
         self.filesTree.setModel(self.sort_proxy_model)
-        self.filesTree.setRootIndex(self.sort_proxy_model.mapFromSource(self.model.index(str(Path.home()))))
-        for column in range(1, self.model.columnCount()):
+        self.filesTree.setRootIndex(self.sort_proxy_model.mapFromSource(self.model.index(self.library_root)))
+        for column in range(1, self.model.first_summary_column):
             self.filesTree.hideColumn(column)
-        self.filesTree.clicked.connect(self.onFilesTreeClicked)
+        self.filesTree.setSortingEnabled(True)
+        self.filesTree.sortByColumn(0, Qt.AscendingOrder)
+        self.filesTree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.filesTree.selectionModel().selectionChanged.connect(self.onFilesTreeSelectionChanged)
 
     def createLeftGUI(self):
         """
@@ -315,75 +1030,105 @@ class Application(QMainWindow):
         self.checkbox_show_gpx.toggled.connect(self.onFilesTreeCheckboxClicked)
         self.checkbox_show_gpx.setChecked(True)
 
+        # Area search
+        self.line_edit_area.returnPressed.connect(self.onSearchAreaClicked)
+        self.button_search_area.clicked.connect(self.onSearchAreaClicked)
+        self.button_clear_area.clicked.connect(self.onClearAreaClicked)
+
     #==== Center Part: Map
 
     def createDefaultMap(self):
         """
-        Create default map (plot logo)
+        Show the logo until a track is plotted (the map canvas is created on first use)
         """
+        self.map = None
+        self.logo_widget = LogoWidget(self)
+        self.horizontalLayout_2.addWidget(self.logo_widget)
+
+    def createMapCanvas(self):
+        """
+        Create the map canvas (created once and reused for every track)
+        """
+        if self.map is not None:
+            return
+        from matplotlib import colormaps
+        from .figures import MatplotlibFigure
         self.map = MatplotlibFigure(self, width=5, height=4, dpi=100)
+        self.map.setVisible(False)
         self.horizontalLayout_2.addWidget(self.map)
-        logo = np.asarray(Image.open("img/logo.png"))
-        self.map.axes.imshow(logo)
         self.map.axes.get_xaxis().set_visible(False)
         self.map.axes.get_yaxis().set_visible(False)
+        self.track_cmap = colormaps["viridis"].resampled(12)
 
-    def resetMap(self):
+        # Track points (updated in place by the level of detail renderer)
+        self.track_scatter = self.map.axes.scatter([], [], s=10, color="#FFA800")
+        self.track_scatter.set_visible(False)
+        self.map.addAnimatedArtist(self.track_scatter)
+        self.track_renderer = LODTrackRenderer(self.map.axes, self.track_scatter)
+
+        # Overlaid tracks (multi-selection)
+        self.overlay_renderer = OverlayRenderer(self.map)
+
+        # Basemap tiles (static artists, updated when the view changes)
+        self.tile_renderer = TileRenderer(self.map.axes)
+        self.map.axes.callbacks.connect("xlim_changed", self.onMapViewChanged)
+        self.map.axes.callbacks.connect("ylim_changed", self.onMapViewChanged)
+        self.map.mpl_connect("resize_event", self.onMapViewChanged)
+
+    def showMapCanvas(self, visible: bool):
         """
-        Remove the previous map and create a new default map
+        Show the map canvas instead of the logo (or the logo instead of the map)
+
+        Args:
+            visible (bool): Whether the map canvas is shown
         """
-        self.horizontalLayout_2.removeWidget(self.map)
-        self.createDefaultMap()
+        self.logo_widget.setVisible(not visible)
+        self.map.setVisible(visible)
 
-    def createMap(self):
+    def resetMap(self):
         """
-        Remove the previous map and create a new map
+        Hide the previous track and show the default map (logo)
         """
-        # Remove the previous figure and create a new one
-        self.horizontalLayout_2.removeWidget(self.map)
-        self.map = MatplotlibFigure(self)
-        self.horizontalLayout_2.addWidget(self.map)
+        if self.map is None:
+            return
+        self.render_data = None
+        self.map.navigation = False
+        self.track_scatter.set_visible(False)
+        self.track_renderer.setData(np.zeros(0), np.zeros(0))
+        self.overlay_renderer.clear()
+        self.updateBasemap()
+        self.showMapCanvas(False)
 
-        # Create dataframe containing data from the GPX file
-        dataframe = self.gpx.to_dataframe(elevation=True,
-                                          time=True,
-                                          speed=True,
-                                          pace=True,
-                                          ascent_rate=True,
-                                          ascent_speed=True,
-                                          distance_from_start=True)
-        
-        # Compute track boundaries and default offset
-        min_lat, min_lon, max_lat, max_lon = self.gpx.bounds()
-        delta_max = max(max_lat - min_lat, max_lon - min_lon)
-        offset = delta_max * 0.04
-        min_lat, min_lon = max(0, min_lat - offset), max(0, min_lon - offset)
-        max_lat, max_lon = min(max_lat + offset, 90),  min(max_lon + offset, 180)
-
-        # Create map
-        map = Basemap(projection="cyl",
-                      llcrnrlon=min_lon,
-                      llcrnrlat=min_lat,
-                      urcrnrlon=max_lon,
-                      urcrnrlat=max_lat,
-                      ax=self.map.axes)
-        # map.arcgisimage("World_Imagery")
-
-        # Scatter track points
-        color = "#FFA800"
-        size = 10
-        cmap = matplotlib.cm.get_cmap("viridis", 12)
-        if color in ["ele", "speed", "pace", "vertical_drop", "ascent_rate", "ascent_speed"]:
-            im = map.scatter(dataframe["lon"],
-                             dataframe["lat"],
-                             s=size,
-                             c=dataframe[color],
-                             cmap=cmap)
+    def createMap(self, render_data: RenderData):
+        """
+        Plot the track on the map (artists are updated in place)
+
+        Parameters
+        ----------
+        render_data : RenderData
+            Ready to plot track data computed by workerPrepareRender
+        """
+        # Scatter track points (the level of detail renderer only keeps the points matching the view)
+        with profileSpan("Map canvas", "render"):
+            self.createMapCanvas()
+        if render_data.values is not None:
+            self.track_scatter.set_cmap(self.track_cmap)
         else:
-            im = map.scatter(dataframe["lon"],
-                             dataframe["lat"],
-                             s=size,
-                             color=color)
+            self.track_scatter.set_array(None)
+            self.track_scatter.set_color(self.track_color)
+        self.track_scatter.set_sizes([self.track_size])
+
+        # Show track instead of logo
+        x_min, x_max, y_min, y_max = render_data.limits
+        self.showMapCanvas(True)
+        self.track_scatter.set_visible(True)
+        self.map.axes.set_xlim(x_min, x_max)
+        self.map.axes.set_ylim(y_min, y_max)
+        self.map.axes.set_aspect("equal", anchor=render_data.anchor)
+        self.setTrackData(render_data)
+        self.map.navigation = True
+        self.updateBasemap()
+        self.map.draw_idle()
             
         # Scatter start point with different color
         # if self.start_point_color:
@@ -402,6 +1147,161 @@ class Application(QMainWindow):
         #         map.scatter(x, y, marker="D",
         #                     color=self.way_points_color)      # Scatter way point
 
+    def setTrackData(self, render_data: RenderData):
+        """
+        Replace the points drawn by the track renderer (only the points kept
+        by the pre-processing if its preview is computed)
+
+        Parameters
+        ----------
+        render_data : RenderData
+            Ready to plot track data computed by workerPrepareRender
+        """
+        indices = self.preview_indices
+        if indices is None or (len(indices) and indices[-1] >= len(render_data.x)):
+            self.track_renderer.setData(render_data.x, render_data.y, render_data.values, render_data.importance)
+            return
+
+        # The level of detail importance of the full track is kept (an approximation is enough to pick the levels)
+        self.track_renderer.setData(render_data.x[indices],
+                                    render_data.y[indices],
+                                    None if render_data.values is None else render_data.values[indices],
+                                    render_data.importance[indices])
+
+    def updateMapPreview(self):
+        """
+        Draw the points kept by the pre-processing on the map (only the track
+        points are redrawn, over the cached background)
+        """
+        render_data = self.render_data
+        if self.map is None or render_data is None or render_data.path != self.selected_path:
+            return
+        with profileSpan("Map preview", "render", render_data.path, len(render_data.x)):
+            self.setTrackData(render_data)
+            self.map.refresh()
+
+    def createOverlayMap(self, render_data: List[RenderData]):
+        """
+        Plot several tracks on the map (one color per track, each track is
+        decimated by its own level of detail renderer)
+
+        Parameters
+        ----------
+        render_data : List[RenderData]
+            Ready to plot data of each track (computed with the same bounding box)
+        """
+        self.createMapCanvas()
+        x_min, x_max, y_min, y_max = render_data[0].limits
+        self.showMapCanvas(True)
+        self.track_scatter.set_visible(False)
+        self.map.axes.set_xlim(x_min, x_max)
+        self.map.axes.set_ylim(y_min, y_max)
+        self.map.axes.set_aspect("equal", anchor=render_data[0].anchor)
+        self.overlay_renderer.setTracks(render_data, overlayColors(len(render_data)), self.track_size)
+        self.map.navigation = True
+        self.updateBasemap()
+        self.map.draw_idle()
+        emitLog(Log.DEBUG, f"Overlay map: {len(render_data)} tracks, "
+                           f"{self.overlay_renderer.nb_drawn_points:,} points drawn")
+
+    def updateBasemap(self) -> bool:
+        """
+        Draw the cached tiles of the basemap visible in the current view (a
+        cached coarser tile is drawn until a missing tile is loaded) and load
+        the missing tiles in background once the view stops changing
+
+        Returns
+        -------
+        bool
+            Whether the drawn tiles changed
+        """
+        if self.map is None:
+            return False
+        if self.basemap is None or not self.map.navigation:
+            self.missing_tiles = []
+            return self.tile_renderer.clear()
+
+        path = self.basemap.path
+        bbox = self.map.axes.get_window_extent()
+        zoom, tiles = visibleTiles(self.map.axes.get_xlim() + self.map.axes.get_ylim(), bbox.width,
+                                   self.basemap.min_zoom, self.basemap.max_zoom)
+        drawn = {}
+        missing = []
+        for x, y in tiles:
+            key = (path, zoom, x, y)
+            tile = self.tile_cache.get(key)
+            if tile is not None:
+                drawn[key] = tile
+                continue
+            missing.append(key)
+            for level in range(1, min(MAX_PARENT_LEVELS, zoom - self.basemap.min_zoom) + 1):
+                parent = (path, zoom - level, x >> level, y >> level)
+                tile = self.tile_cache.get(parent)
+                if tile is not None:
+                    drawn[parent] = tile
+                    break
+        self.missing_tiles = missing
+        if missing:
+            self.tile_timer.start()
+        return self.tile_renderer.setTiles(drawn)
+
+    def onMapViewChanged(self, *args):
+        """
+        Function executed when the view limits or the canvas size change
+        (tiles move with the view: the next refresh is a full redraw)
+        """
+        if self.updateBasemap() or len(self.tile_renderer):
+            self.map.invalidateBackground()
+
+    def loadMissingTiles(self):
+        """
+        Read and decode the missing tiles of the current view in background
+        (superseding the loads of previous views)
+        """
+        self.scheduler.cancelGroup("tiles")
+        if self.basemap is None or not self.missing_tiles:
+            return
+        keys, self.missing_tiles = self.missing_tiles, []
+        for i in range(0, len(keys), TILES_PER_WORKER):
+            worker = Worker(self.workerLoadTiles, arg=(self.basemap, keys[i:i + TILES_PER_WORKER]), group="tiles")
+            worker.signals.result.connect(self.workerLoadTilesResult)
+            worker.signals.log.connect(emitLog)
+            self.addWorker(worker)
+
+    def workerLoadTiles(self, arg, worker=None) -> List[Tuple[str, int, int, int]]:
+        """
+        Read and decode basemap tiles with worker
+
+        Parameters
+        ----------
+        arg : tuple
+            Arguments to pass to the worker
+        worker : Worker, optional
+            Wroker to execute work, by default None
+
+        Returns
+        -------
+        List[Tuple[str, int, int, int]]
+            Loaded tiles (added to the tile cache)
+        """
+        basemap, keys = arg
+        with profileSpan("Basemap tiles", "render", basemap.path) as span:
+            loaded = loadTiles(basemap, keys, self.tile_cache, worker.token.check if worker is not None else None)
+            span.points = len(loaded)
+        return loaded
+
+    def workerLoadTilesResult(self, loaded: List[Tuple[str, int, int, int]]):
+        """
+        Read and decode basemap tiles with worker (result)
+
+        Parameters
+        ----------
+        loaded : List[Tuple[str, int, int, int]]
+            Loaded tiles
+        """
+        if loaded and self.updateBasemap():
+            self.map.draw_idle()
+
     def createCenterGUI(self):
         """
         Create the center part of the GUI (map plot)
@@ -420,6 +1320,7 @@ class Application(QMainWindow):
         else:
             self.remove_gps_errors = False
             emitLog(Log.INFO, "Remove GPS errors: OFF")
+        self.updatePreview()
 
     def onRemoveMetadataClicked(self):
         """
@@ -442,6 +1343,7 @@ class Application(QMainWindow):
         else:
             self.remove_time = False
             emitLog(Log.INFO, "Remove time: OFF")
+        self.updatePreview()
 
     def onRemoveElevationClicked(self):
         """
@@ -453,6 +1355,7 @@ class Application(QMainWindow):
         else:
             self.remove_elevation = False
             emitLog(Log.INFO, "Remove elevation: OFF")
+        self.updatePreview()
 
     def onCompressDataClicked(self):
         """
@@ -464,6 +1367,122 @@ class Application(QMainWindow):
         else:
             self.compress_data = False
             emitLog(Log.INFO, "Compress data: OFF")
+        self.updatePreview()
+
+    def onToleranceChanged(self, tolerance: float):
+        """
+        Function executed when the simplification tolerance changes
+
+        Args:
+            tolerance (float): Tolerance (meters)
+        """
+        self.simplification_tolerance = tolerance
+        self.updatePreview()
+
+    def onSimplificationMethodChanged(self):
+        """
+        Function executed when the simplification algorithm changes
+        """
+        self.simplification_method = self.combo_simplification.currentData()
+        emitLog(Log.INFO, f"Simplification: {SIMPLIFICATION_METHODS[self.simplification_method]}")
+        self.updatePreview()
+
+    def preProcessingSettings(self) -> Dict:
+        """
+        Return the current pre-processing settings (options of PreProcessingPipeline and remove_metadata)
+        """
+        return {"remove_gps_errors": self.remove_gps_errors,
+                "remove_metadata": self.remove_metadata,
+                "remove_time": self.remove_time,
+                "remove_elevation": self.remove_elevation,
+                "compress_data": self.compress_data,
+                "tolerance": self.simplification_tolerance,
+                "method": self.simplification_method}
+
+    def updatePreview(self):
+        """
+        Update the preview of the pre-processing once the settings stop
+        changing for PREVIEW_DELAY milliseconds
+        """
+        self.spinbox_tolerance.setEnabled(self.compress_data)
+        self.combo_simplification.setEnabled(self.compress_data)
+        if self.pipeline is None:
+            self.preview_timer.stop()
+            return
+        self.preview_start = time.perf_counter()
+        self.preview_timer.start()
+
+    def startPreview(self):
+        """
+        Compute the points kept by the pre-processing and the size of the
+        pre-processed track in background, then draw them on the map (stage
+        results are cached for each combination of settings)
+        """
+        if self.pipeline is None:
+            return
+        self.scheduler.cancelGroup("preview")
+        worker = Worker(self.workerPreviewPreProcessing, arg=(self.pipeline, self.preProcessingSettings()),
+                        priority=Priority.HIGH, resources=["preprocessing"], group="preview")
+        worker.signals.result.connect(self.workerPreviewPreProcessingResult)
+        worker.signals.log.connect(emitLog)
+        self.addWorker(worker)
+
+    def onClearCacheClicked(self):
+        """
+        Function executed when the "Clear cache" button is clicked
+        """
+        worker = Worker(self.workerClearCache, arg=None, resources=["disk_cache"])
+        worker.signals.log.connect(emitLog)
+        self.addWorker(worker)
+
+    def onBasemapChanged(self):
+        """
+        Function executed when another basemap is selected
+        """
+        path = self.combo_basemap.currentData()
+        self.basemap = None
+        if path:
+            try:
+                self.basemap = MBTilesReader(path)
+            except ValueError as e:
+                emitLog(Log.ERROR, str(e))
+                self.combo_basemap.setCurrentIndex(0)
+                return
+            emitLog(Log.INFO, f"Basemap: {self.basemap.name} (zoom {self.basemap.min_zoom}-{self.basemap.max_zoom})")
+        if self.updateBasemap():
+            self.map.draw_idle()
+
+    def onOpenBasemapClicked(self):
+        """
+        Function executed when the "Open..." basemap button is clicked
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Open basemap", DEFAULT_BASEMAPS_DIR, "MBTiles (*.mbtiles)")
+        if not path:
+            return
+        index = self.combo_basemap.findData(path)
+        if index < 0:
+            self.combo_basemap.addItem(os.path.basename(path), path)
+            index = self.combo_basemap.count() - 1
+        self.combo_basemap.setCurrentIndex(index)
+
+    def onWorkerProgress(self, progress: Progress):
+        """
+        Function executed when a worker reports its progress (update the
+        progress bar, the throughput and the estimated remaining time)
+
+        Args:
+            progress (Progress): Progress of the current stage of the worker
+        """
+        self.progress_bar.setValue(round(progress.fraction * self.progress_bar.maximum()))
+        if progress.isComplete():
+            self.label_progress.setText(f"{progress.stage}: {progress.points:,} points in {progress.elapsed:.2f} s "
+                                        f"({progress.rate:,.0f} points/s)")
+            emitLog(Log.DEBUG, f"{progress.stage} completed: {progress.points:,} points in {progress.elapsed:.2f} s "
+                               f"({progress.rate:,.0f} points/s)")
+        else:
+            eta = f"{progress.eta:.1f} s" if progress.eta is not None else "-"
+            self.label_progress.setText(f"{progress.stage}: {progress.points:,} points "
+                                        f"({progress.rate:,.0f} points/s), ETA {eta}")
 
     def onExportGPXClicked(self):
         """
@@ -473,15 +1492,19 @@ class Application(QMainWindow):
         self.button_export_kml.setEnabled(False)
         self.button_export_csv.setEnabled(False)
 
-        # Pre-process GPX
-        worker = Worker(self.workerPreProcessGPX, arg=None)
-        worker.signals.finished.connect(self.workerPreProcessGPXComplete)
-        worker.signals.log.connect(emitLog)
-        self.addWorker(worker)
-
-        # Export to GPX
-        worker = Worker(self.workerExportGPX, arg=None)
+        # Pre-process GPX (with the settings at the time of the click)
+        export = PreProcessedExport(self.track, self.pipeline, self.preProcessingSettings(), True)
+        pre_process_worker = Worker(self.workerPreProcessGPX, arg=export,
+                                    resources=["gpx", "preprocessing"])
+        pre_process_worker.signals.finished.connect(self.workerPreProcessGPXComplete)
+        pre_process_worker.signals.log.connect(emitLog)
+        pre_process_worker.signals.progress.connect(self.onWorkerProgress)
+        self.addWorker(pre_process_worker)
+
+        # Export to GPX (once pre-processing is complete)
+        worker = Worker(self.workerExportGPX, arg=export, dependencies=[pre_process_worker], resources=["gpx"])
         worker.signals.finished.connect(self.workerExportGPXComplete)
+        worker.signals.progress.connect(self.onWorkerProgress)
         worker.signals.log.connect(emitLog)
         self.addWorker(worker)
 
@@ -497,15 +1520,19 @@ class Application(QMainWindow):
         self.button_export_kml.setEnabled(False)
         self.button_export_csv.setEnabled(False)
 
-        # Pre-process GPX
-        worker = Worker(self.workerPreProcessGPX, arg=None)
-        worker.signals.finished.connect(self.workerPreProcessGPXComplete)
-        worker.signals.log.connect(emitLog)
-        self.addWorker(worker)
-
-        # Export to KML
-        worker = Worker(self.workerExportKML, arg=None)
+        # Pre-process GPX (with the settings at the time of the click)
+        export = PreProcessedExport(self.track, self.pipeline, self.preProcessingSettings(), False)
+        pre_process_worker = Worker(self.workerPreProcessGPX, arg=export,
+                                    resources=["gpx", "preprocessing"])
+        pre_process_worker.signals.finished.connect(self.workerPreProcessGPXComplete)
+        pre_process_worker.signals.log.connect(emitLog)
+        pre_process_worker.signals.progress.connect(self.onWorkerProgress)
+        self.addWorker(pre_process_worker)
+
+        # Export to KML (once pre-processing is complete)
+        worker = Worker(self.workerExportKML, arg=export, dependencies=[pre_process_worker], resources=["gpx"])
         worker.signals.finished.connect(self.workerExportKMLComplete)
+        worker.signals.progress.connect(self.onWorkerProgress)
         worker.signals.log.connect(emitLog)
         self.addWorker(worker)
 
@@ -521,15 +1548,19 @@ class Application(QMainWindow):
         self.button_export_kml.setEnabled(False)
         self.button_export_csv.setEnabled(False)
 
-        # Pre-process GPX
-        worker = Worker(self.workerPreProcessGPX, arg=None)
-        worker.signals.finished.connect(self.workerPreProcessGPXComplete)
-        worker.signals.log.connect(emitLog)
-        self.addWorker(worker)
-
-        # Export to CSV
-        worker = Worker(self.workerExportCSV, arg=None)
+        # Pre-process GPX (with the settings at the time of the click)
+        export = PreProcessedExport(self.track, self.pipeline, self.preProcessingSettings(), False)
+        pre_process_worker = Worker(self.workerPreProcessGPX, arg=export,
+                                    resources=["gpx", "preprocessing"])
+        pre_process_worker.signals.finished.connect(self.workerPreProcessGPXComplete)
+        pre_process_worker.signals.log.connect(emitLog)
+        pre_process_worker.signals.progress.connect(self.onWorkerProgress)
+        self.addWorker(pre_process_worker)
+
+        # Export to CSV (once pre-processing is complete)
+        worker = Worker(self.workerExportCSV, arg=export, dependencies=[pre_process_worker], resources=["gpx"])
         worker.signals.finished.connect(self.workerExportCSVComplete)
+        worker.signals.progress.connect(self.onWorkerProgress)
         worker.signals.log.connect(emitLog)
         self.addWorker(worker)
 
@@ -547,11 +1578,27 @@ class Application(QMainWindow):
         self.checkbox_remove_time.toggled.connect(self.onRemoveTimeClicked)
         self.checkbox_remove_elevation.toggled.connect(self.onRemoveElevationClicked)
         self.checkbox_compress_data.toggled.connect(self.onCompressDataClicked)
+        for method, name in SIMPLIFICATION_METHODS.items():
+            self.combo_simplification.addItem(name, method)
+        self.spinbox_tolerance.setValue(self.simplification_tolerance)
+        self.spinbox_tolerance.valueChanged.connect(self.onToleranceChanged)
+        self.combo_simplification.currentIndexChanged.connect(self.onSimplificationMethodChanged)
+        self.updatePreview()
 
         # Export buttons
         self.button_export_gpx.clicked.connect(self.onExportGPXClicked)
         self.button_export_kml.clicked.connect(self.onExportKMLClicked)
         self.button_export_csv.clicked.connect(self.onExportCSVClicked)
+        self.button_clear_cache.clicked.connect(self.onClearCacheClicked)
+
+        # Basemaps (MBTiles files of the basemaps directory, others can be opened)
+        self.combo_basemap.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.combo_basemap.setMinimumContentsLength(12)
+        self.combo_basemap.addItem("No basemap", "")
+        for path in findBasemaps():
+            self.combo_basemap.addItem(os.path.basename(path), path)
+        self.combo_basemap.currentIndexChanged.connect(self.onBasemapChanged)
+        self.button_open_basemap.clicked.connect(self.onOpenBasemapClicked)
         self.button_export_gpx.setEnabled(False)
         self.button_export_kml.setEnabled(False)
         self.button_export_csv.setEnabled(False)
@@ -571,14 +1618,12 @@ class Application(QMainWindow):
         Create application logger
         """
         # Log file
-        self.log_file = "application.log"
         if os.path.exists(self.log_file):
             os.remove(self.log_file)
-        logging.basicConfig(filename=self.log_file,
-                            encoding="utf-8",
-                            level=logging.DEBUG)
+        self.log_listener = startFileLogging(self.log_file)
+        QApplication.instance().aboutToQuit.connect(self.log_listener.stop)
 
-        # Log widget
+        # Log widget (updated in batches)
         logTextBox = QPlainTextEditLogger()
         self.log.addWidget(logTextBox.widget)
         logging.getLogger().addHandler(logTextBox)
@@ -592,6 +1637,79 @@ class Application(QMainWindow):
         # Log
         self.createLogger()
 
+    #==== Performance Tab ================================================#
+
+    def onProfilingClicked(self):
+        """
+        Function executed when the "Record timings" checkbox is clicked
+        """
+        profiler.setEnabled(self.checkbox_profiling.isChecked())
+        if profiler.enabled:
+            self.spans_timer.start()
+            emitLog(Log.INFO, "Record timings: ON")
+        else:
+            self.spans_timer.stop()
+            self.updateSpans()
+            emitLog(Log.INFO, "Record timings: OFF")
+
+    def onClearSpansClicked(self):
+        """
+        Function executed when the "Clear" button of the Performance tab is clicked
+        """
+        profiler.clear()
+        self.updateSpans()
+
+    def onExportTraceClicked(self):
+        """
+        Function executed when the "Export trace" button is clicked
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "Export trace", "trace.json", "Chrome trace (*.json)")
+        if not path:
+            return
+        try:
+            nb_spans = profiler.exportChromeTrace(path)
+        except OSError as e:
+            emitLog(Log.ERROR, f"Failed to export trace: {e}")
+            return
+        emitLog(Log.INFO, f"Exported {nb_spans} timings to {path}")
+
+    def updateSpans(self):
+        """
+        Show the recorded spans in the Performance tab (only if it is visible
+        and new spans have been recorded)
+        """
+        if self.tabs.currentWidget() is not self.performance_tab or profiler.nb_recorded == self.spans_shown:
+            return
+        self.spans_shown = profiler.nb_recorded
+        spans = profiler.snapshot()
+        self.spans_model.setSpans(spans, profiler.origin)
+        self.label_spans.setText(f"{len(spans):,} / {profiler.capacity:,} spans")
+
+    def createPerformanceTab(self):
+        """
+        Create performance tab (timing of the stages, recorded when enabled)
+        """
+        self.spans_shown = -1 # Number of recorded spans shown in the table
+        self.spans_model = SpansModel(self)
+        self.spans_proxy_model = QSortFilterProxyModel(self)
+        self.spans_proxy_model.setSourceModel(self.spans_model)
+        self.spans_proxy_model.setSortRole(Qt.UserRole)
+        self.table_spans.setModel(self.spans_proxy_model)
+        self.table_spans.setSortingEnabled(True)
+        self.table_spans.sortByColumn(3, Qt.DescendingOrder) # Most recent first
+        self.table_spans.horizontalHeader().setStretchLastSection(True)
+        self.table_spans.verticalHeader().setVisible(False)
+
+        # The table is refreshed while timings are recorded
+        self.spans_timer = QTimer(self)
+        self.spans_timer.setInterval(PROFILER_REFRESH_INTERVAL)
+        self.spans_timer.timeout.connect(self.updateSpans)
+        self.tabs.currentChanged.connect(self.updateSpans)
+        self.checkbox_profiling.toggled.connect(self.onProfilingClicked)
+        self.button_clear_spans.clicked.connect(self.onClearSpansClicked)
+        self.button_export_trace.clicked.connect(self.onExportTraceClicked)
+        self.checkbox_profiling.setChecked(profiler.enabled)
+
     #==== Read Me Tab ====================================================#
 
     def createReadmeTab(self):
@@ -610,10 +1728,12 @@ class Application(QMainWindow):
         """
         Create application Graphic User Interface (GUI)
         """
-        # Load the ui file
-        uic.loadUi("src/app/application.ui", self)
+        # Create the widgets of the ui file
+        self.setupUi(self)
+        self.setWindowIcon(QIcon(logoPixmap()))
 
         # Create tabs
         self.createMainTab()
         self.createLogTab()
+        self.createPerformanceTab()
         self.createReadmeTab()
\ No newline at end of file
@@ -0,0 +1,202 @@
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List
+
+from .cache import DEFAULT_DISK_CACHE_DIR, DiskTrackCache
+from .exporters import exportCSV, exportKML
+from .processing import (DEFAULT_TOLERANCE, DOUGLAS_PEUCKER, SIMPLIFICATION_METHODS, PreProcessingPipeline, exportPath,
+                         writePreProcessedGPX)
+from .reader import readTrack
+
+EXPORT_FORMATS = ["gpx", "kml", "csv"]
+
+
+def collectFiles(patterns: Iterable[str]) -> List[str]:
+    """
+    Collect the GPX files matching the given directories or glob patterns
+
+    Parameters
+    ----------
+    patterns : Iterable[str]
+        Directories (searched recursively) or glob patterns
+
+    Returns
+    -------
+    List[str]
+        Sorted list of unique file paths
+    """
+    files = set()
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        if os.path.isdir(pattern):
+            # Skip files exported by a previous run
+            matches = [match for match in glob.glob(os.path.join(pattern, "**", "*.gpx"), recursive=True)
+                       if not match.endswith("_modified.gpx")]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        files.update(os.path.abspath(match) for match in matches if os.path.isfile(match))
+    return sorted(files)
+
+
+def initWorkerProcess():
+    """
+    Initialise a worker process (ezgpx logs every removed point and written file).
+    """
+    logging.getLogger().setLevel(logging.ERROR)
+
+
+def processFile(path: str, settings: Dict, formats: List[str]) -> Dict:
+    """
+    Load, pre-process and export a single GPX file (executed in a worker process)
+
+    Parameters
+    ----------
+    path : str
+        Path to the GPX file
+    settings : Dict
+        Pre-processing settings (options of PreProcessingPipeline and remove_metadata)
+    formats : List[str]
+        Export formats (subset of EXPORT_FORMATS)
+
+    Returns
+    -------
+    Dict
+        Processing report (path, status, number of points, duration, error)
+    """
+    start = time.perf_counter()
+    report = {"path": path, "status": "ok", "nb_points": 0, "duration": 0.0, "error": None}
+    try:
+        # Kept points are computed on a compact track, the full GPX object tree
+        # is only built for GPX exports, other exports are streamed from the track
+        track = readTrack(path)
+        report["nb_points"] = len(track)
+        pipeline = PreProcessingPipeline(track)
+        remove_gps_errors = settings.get("remove_gps_errors", False)
+        remove_time = settings.get("remove_time", False)
+        remove_elevation = settings.get("remove_elevation", False)
+        compress_data = settings.get("compress_data", False)
+        tolerance = settings.get("tolerance", DEFAULT_TOLERANCE)
+        method = settings.get("method", DOUGLAS_PEUCKER)
+        if "gpx" in formats:
+            writePreProcessedGPX(track.gpx(),
+                                 exportPath(path, ".gpx", "_modified"),
+                                 pipeline.indices(remove_gps_errors, compress_data, tolerance, method),
+                                 settings.get("remove_metadata", False),
+                                 remove_time,
+                                 remove_elevation)
+
+        # Export
+        track = pipeline.process(remove_gps_errors, remove_time, remove_elevation, compress_data, tolerance, method)
+        if "kml" in formats:
+            exportKML(track, exportPath(path, ".kml"))
+        if "csv" in formats:
+            exportCSV(track, exportPath(path, ".csv"))
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["duration"] = time.perf_counter() - start
+    return report
+
+
+def runBatch(files: List[str], settings: Dict, formats: List[str], nb_processes: int = None) -> List[Dict]:
+    """
+    Process GPX files in parallel using a process pool
+
+    Parameters
+    ----------
+    files : List[str]
+        Paths to the GPX files
+    settings : Dict
+        Pre-processing settings (options of PreProcessingPipeline and remove_metadata)
+    formats : List[str]
+        Export formats (subset of EXPORT_FORMATS)
+    nb_processes : int, optional
+        Number of worker processes, by default None (number of CPUs)
+
+    Returns
+    -------
+    List[Dict]
+        Processing reports (in completion order)
+    """
+    reports = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=nb_processes, initializer=initWorkerProcess) as executor:
+        futures = [executor.submit(processFile, path, settings, formats) for path in files]
+        for i, future in enumerate(as_completed(futures), start=1):
+            report = future.result()
+            reports.append(report)
+            if report["status"] == "ok":
+                logging.info(f"[{i}/{len(files)}] OK    {report['path']} "
+                             f"({report['nb_points']} points, {report['duration']:.2f} s)")
+            else:
+                logging.error(f"[{i}/{len(files)}] ERROR {report['path']}: {report['error']}")
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    # Throughput
+    nb_ok = sum(report["status"] == "ok" for report in reports)
+    nb_points = sum(report["nb_points"] for report in reports)
+    logging.info(f"Processed {len(reports)} files ({nb_ok} succeeded, {len(reports) - nb_ok} failed) "
+                 f"in {elapsed:.2f} s: {len(reports) / elapsed:.2f} files/s, {nb_points / elapsed:.0f} points/s")
+    return reports
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Headless batch processing entry point.
+    """
+    parser = argparse.ArgumentParser(description="Pre-process and export GPX files without GUI.")
+    parser.add_argument("paths", nargs="*",
+                        help="directories (searched recursively) or glob patterns")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-f", "--formats", nargs="+", choices=EXPORT_FORMATS, default=EXPORT_FORMATS,
+                        help="export formats (default: all)")
+    parser.add_argument("--remove-gps-errors", action="store_true", help="remove GPS errors")
+    parser.add_argument("--remove-metadata", action="store_true", help="remove metadata")
+    parser.add_argument("--remove-time", action="store_true", help="remove time data")
+    parser.add_argument("--remove-elevation", action="store_true", help="remove elevation data")
+    parser.add_argument("--compress-data", action="store_true", help="simplify tracks")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"simplification tolerance in meters (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--simplification", choices=list(SIMPLIFICATION_METHODS), default=DOUGLAS_PEUCKER,
+                        help=f"simplification algorithm (default: {DOUGLAS_PEUCKER})")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help=f"clear the cache of parsed tracks ({DEFAULT_DISK_CACHE_DIR})")
+    args = parser.parse_args(argv)
+    if not args.paths and not args.clear_cache:
+        parser.error("the following arguments are required: paths")
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s][%(levelname)s] %(message)s")
+
+    if args.clear_cache:
+        size = DiskTrackCache(DEFAULT_DISK_CACHE_DIR).clear()
+        logging.info(f"Cleared cache of parsed tracks ({size / 1024 / 1024:.1f} MB freed)")
+        if not args.paths:
+            return 0
+
+    files = collectFiles(args.paths)
+    if not files:
+        logging.error("No GPX file found")
+        return 1
+    logging.info(f"Processing {len(files)} files with {args.processes or os.cpu_count()} processes")
+
+    settings = {
+        "remove_gps_errors": args.remove_gps_errors,
+        "remove_metadata": args.remove_metadata,
+        "remove_time": args.remove_time,
+        "remove_elevation": args.remove_elevation,
+        "compress_data": args.compress_data,
+        "tolerance": args.tolerance,
+        "method": args.simplification
+    }
+    reports = runBatch(files, settings, args.formats, args.processes)
+    return 0 if all(report["status"] == "ok" for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .track import Track, WayPoints
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Memory budget of the cache (bytes)
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+
+# Directory and disk budget (bytes) of the persistent cache
+DEFAULT_DISK_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                                      "gpx_tool", "tracks")
+DEFAULT_DISK_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+# Format of the persistent cache entries (entries with another version are ignored)
+DISK_CACHE_VERSION = 1
+
+
+def fileSignature(path: str) -> Tuple[int, int]:
+    """
+    Return the signature of a file used to detect modifications
+
+    Parameters
+    ----------
+    path : str
+        Path to the file
+
+    Returns
+    -------
+    Tuple[int, int]
+        Modification time (ns) and size (bytes) of the file
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CacheEntry():
+    """
+    Parsed track and derived data.
+    """
+    __slots__ = ("path", "signature", "track", "dataframes", "nbytes")
+
+    def __init__(self, path: str, signature: Tuple[int, int], track: Track):
+        self.path: str = path
+        self.signature: Tuple[int, int] = signature
+        self.track: Track = track
+        self.dataframes: Dict[str, "pd.DataFrame"] = {}
+        self.nbytes: int = track.nbytes
+
+
+class TrackCache():
+    """
+    Bounded LRU cache of parsed tracks keyed by path, modification time and size.
+    Thread safe (entries are added from worker threads).
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Initialise the cache
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Memory budget (bytes), by default DEFAULT_CACHE_SIZE
+        """
+        self.max_size: int = max_size
+        self.size: int = 0
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _remove(self, path: str):
+        """
+        Remove an entry (lock must be held)
+        """
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.size -= entry.nbytes
+
+    def _evict(self):
+        """
+        Evict least recently used entries until the cache fits the memory budget (lock must be held)
+        The most recent entry is always kept, even if it exceeds the budget on its own.
+        """
+        while self.size > self.max_size and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.size -= entry.nbytes
+
+    def get(self, path: str) -> Optional[CacheEntry]:
+        """
+        Retrieve the entry associated to a file
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+
+        Returns
+        -------
+        Optional[CacheEntry]
+            Cache entry, None if the file is not cached or has been modified
+        """
+        path = os.path.realpath(path)
+        try:
+            signature = fileSignature(path)
+        except OSError:
+            signature = None
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                return None
+            if entry.signature != signature:
+                self._remove(path)
+                return None
+            self.entries.move_to_end(path)
+            return entry
+
+    def put(self, path: str, track: Track, signature: Optional[Tuple[int, int]] = None) -> Optional[CacheEntry]:
+        """
+        Add a parsed track to the cache
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+        track : Track
+            Parsed track
+        signature : Optional[Tuple[int, int]], optional
+            Signature of the file taken before reading it, by default the
+            signature of the track (a file modified while it was read is
+            never served from the cache)
+
+        Returns
+        -------
+        Optional[CacheEntry]
+            New cache entry, None if the signature is unknown
+        """
+        signature = signature if signature is not None else track.signature
+        if signature is None:
+            return None
+        path = os.path.realpath(path)
+        entry = CacheEntry(path, tuple(signature), track)
+        with self.lock:
+            self._remove(path)
+            self.entries[path] = entry
+            self.size += entry.nbytes
+            self._evict()
+        return entry
+
+    def getDataframe(self, path: str, key: str) -> Optional["pd.DataFrame"]:
+        """
+        Retrieve a dataframe derived from a cached track
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+        key : str
+            Dataframe identifier
+
+        Returns
+        -------
+        Optional[pd.DataFrame]
+            Dataframe, None if not cached
+        """
+        entry = self.get(path)
+        if entry is None:
+            return None
+        return entry.dataframes.get(key)
+
+    def putDataframe(self, path: str, key: str, dataframe: "pd.DataFrame"):
+        """
+        Attach a dataframe derived from a cached track
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+        key : str
+            Dataframe identifier
+        dataframe : pd.DataFrame
+            Dataframe
+        """
+        entry = self.get(path)
+        if entry is None:
+            return
+        nbytes = int(dataframe.memory_usage(deep=True).sum())
+        with self.lock:
+            previous = entry.dataframes.get(key)
+            if previous is not None:
+                nbytes -= int(previous.memory_usage(deep=True).sum())
+            entry.dataframes[key] = dataframe
+            entry.nbytes += nbytes
+            if entry.path in self.entries:
+                self.size += nbytes
+                self._evict()
+
+    def invalidate(self, path: str):
+        """
+        Remove the entry associated to a file
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+        """
+        with self.lock:
+            self._remove(os.path.realpath(path))
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class DiskTrackCache():
+    """
+    Persistent cache of parsed tracks shared between sessions.
+
+    Each entry is a directory (named after the hash of the path of the file)
+    containing one .npy file per array (coordinates, elevation, time,
+    segments, way points and the metrics of the dataframe) and a JSON file
+    with the signature of the source file and the other track data. Cached
+    arrays are memory-mapped, so reading an entry does not depend on the
+    size of the track. Least recently used entries are evicted when the
+    cache exceeds its disk budget. Entries are written to a temporary
+    directory first, so readers never see incomplete entries.
+    """
+    META_FILE = "meta.json"
+
+    def __init__(self, directory: str = DEFAULT_DISK_CACHE_DIR, max_size: int = DEFAULT_DISK_CACHE_SIZE):
+        """
+        Initialise the cache
+
+        Parameters
+        ----------
+        directory : str, optional
+            Cache directory (created if needed), by default DEFAULT_DISK_CACHE_DIR
+        max_size : int, optional
+            Disk budget (bytes), by default DEFAULT_DISK_CACHE_SIZE
+        """
+        self.directory: str = directory
+        self.max_size: int = max_size
+        self.lock = threading.Lock()
+
+    def entryDirectory(self, path: str) -> str:
+        """
+        Return the directory of the entry associated to a file
+        """
+        key = hashlib.sha1(os.path.realpath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def readMeta(self, path: str) -> Optional[Dict]:
+        """
+        Read the description of the valid entry associated to a file
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+
+        Returns
+        -------
+        Optional[Dict]
+            Description of the entry, None if the file is not cached, has
+            been modified or the entry is unreadable
+        """
+        try:
+            with open(os.path.join(self.entryDirectory(path), self.META_FILE), encoding="utf-8") as file:
+                meta = json.load(file)
+            signature = fileSignature(path)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != DISK_CACHE_VERSION or tuple(meta.get("signature", ())) != signature:
+            return None
+        return meta
+
+    def contains(self, path: str) -> bool:
+        """
+        Return True if a valid entry is associated to a file
+        """
+        return self.readMeta(path) is not None
+
+    def get(self, path: str) -> Optional[Track]:
+        """
+        Load the track associated to a file (arrays are memory-mapped)
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+
+        Returns
+        -------
+        Optional[Track]
+            Cached track, None if the file is not cached or has been modified
+        """
+        meta = self.readMeta(path)
+        if meta is None:
+            return None
+        directory = self.entryDirectory(path)
+        try:
+            arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+                      for name in meta["arrays"]}
+            # Mark the entry as recently used
+            os.utime(directory)
+        except (OSError, ValueError):
+            return None
+        waypoints = WayPoints(arrays["wpt_lat"], arrays["wpt_lon"], arrays.get("wpt_ele"), meta["waypoint_names"])
+        point_metrics = {name[len("metrics_"):]: array for name, array in arrays.items() if name.startswith("metrics_")}
+        return Track(arrays["lat"], arrays["lon"], arrays.get("ele"), arrays.get("time"),
+                     arrays["segment_offsets"], waypoints, meta["name"], path, point_metrics,
+                     tuple(meta["signature"]))
+
+    def put(self, path: str, track: Track, signature: Optional[Tuple[int, int]] = None):
+        """
+        Store a parsed track (and the metrics of its dataframe)
+
+        Parameters
+        ----------
+        path : str
+            Path to the file
+        track : Track
+            Parsed track
+        signature : Optional[Tuple[int, int]], optional
+            Signature of the file taken before reading it, by default the
+            signature of the track (nothing is stored if it is unknown, so a
+            file modified while it was read is never cached as the new version)
+        """
+        signature = signature if signature is not None else track.signature
+        if signature is None:
+            return
+        arrays = {"lat": track.lat,
+                  "lon": track.lon,
+                  "ele": track.ele,
+                  "time": track.time,
+                  "segment_offsets": track.segment_offsets,
+                  "wpt_lat": track.waypoints.lat,
+                  "wpt_lon": track.waypoints.lon,
+                  "wpt_ele": track.waypoints.ele}
+        for name, array in track.pointMetrics().items():
+            arrays["metrics_" + name] = array
+        arrays = {name: array for name, array in arrays.items() if array is not None}
+        meta = {"version": DISK_CACHE_VERSION,
+                "path": os.path.realpath(path),
+                "signature": list(signature),
+                "name": track.name,
+                "waypoint_names": track.waypoints.names,
+                "arrays": list(arrays)}
+
+        os.makedirs(self.directory, exist_ok=True)
+        temp_directory = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(temp_directory, name + ".npy"), np.ascontiguousarray(array))
+            with open(os.path.join(temp_directory, self.META_FILE), "w", encoding="utf-8") as file:
+                json.dump(meta, file)
+            directory = self.entryDirectory(path)
+            with self.lock:
+                shutil.rmtree(directory, ignore_errors=True)
+                os.replace(temp_directory, directory)
+        except BaseException:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """
+        List the entries of the cache
+
+        Returns
+        -------
+        List[Tuple[float, int, str]]
+            Last use time, size (bytes) and directory of each entry
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if not entry.is_dir() or entry.name.startswith("."):
+                        continue
+                    try:
+                        size = sum(file.stat().st_size for file in os.scandir(entry.path))
+                        entries.append((entry.stat().st_mtime, size, entry.path))
+                    except OSError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @property
+    def size(self) -> int:
+        """
+        Disk usage (bytes) of the cache
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits its disk budget
+        (the most recent entry is always kept)
+        """
+        with self.lock:
+            entries = sorted(self.entries())
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, directory in entries[:-1]:
+                if size <= self.max_size:
+                    break
+                shutil.rmtree(directory, ignore_errors=True)
+                size -= entry_size
+
+    def invalidate(self, path: str):
+        """
+        Remove the entry associated to a file
+        """
+        with self.lock:
+            shutil.rmtree(self.entryDirectory(path), ignore_errors=True)
+
+    def clear(self) -> int:
+        """
+        Remove all entries (and leftovers of interrupted writes)
+
+        Returns
+        -------
+        int
+            Freed disk space (bytes)
+        """
+        with self.lock:
+            size = sum(entry_size for _, entry_size, _ in self.entries())
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return size
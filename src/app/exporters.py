@@ -0,0 +1,260 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from .metrics import timeStrings
+from .track import Track
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Number of track points formatted at once
+EXPORT_CHUNK_SIZE = 65536
+
+# Size (bytes) of the output buffer
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Columns that can be exported without the full GPX object tree
+CSV_COLUMNS = ["lat", "lon", "ele", "time"]
+
+# Same styles as ezgpx KML files
+KML_STYLES = [
+    ("normal", {"color": "ff0000ff", "width": 2, "fill": 0}),
+    ("highlight", {"color": "ff0000ff", "width": 2, "fill": 0})
+]
+
+
+def _fileMode(path: str, probe_path: str) -> int:
+    """
+    Return the permissions of an exported file: those of the file it
+    replaces, else those of a file created by open() (read from an empty
+    probe file, so the umask of the process is never changed)
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        pass
+    fd = os.open(probe_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        return stat.S_IMODE(os.fstat(fd).st_mode)
+    finally:
+        os.close(fd)
+        os.remove(probe_path)
+
+
+@contextmanager
+def atomicWriter(path: str) -> Iterator[IO[str]]:
+    """
+    Open a buffered temporary file next to the destination file and
+    atomically rename it to the destination once writing succeeded (the
+    temporary file is removed if an error occurs), so the destination file
+    is either the previous one or the complete new one. The temporary file
+    is only readable by its owner until it gets the permissions of the
+    destination file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the destination file
+
+    Returns
+    -------
+    Iterator[IO[str]]
+        Temporary file opened in text mode
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER_SIZE) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, _fileMode(path, temp_path + ".mode"))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _elevationColumn(chunk: Track, elevation: bool) -> np.ndarray:
+    """
+    Elevation column with the same values as ezgpx exports (0 if missing,
+    written as an integer when the file does not contain elevation at all)
+    """
+    if not elevation or chunk.ele is None:
+        return np.zeros(len(chunk), dtype=np.int64)
+    return np.nan_to_num(chunk.ele, nan=0.0)
+
+
+class _ProgressWriter():
+    """
+    Write text to a file and report the number of bytes written (the total
+    is estimated from the average size of the points written so far)
+    """
+    def __init__(self,
+                 file: IO[str],
+                 nb_points: Optional[int] = None,
+                 progress: Optional[Callable[[int, int, int], None]] = None):
+        self.file: IO[str] = file
+        self.nb_points: Optional[int] = nb_points
+        self.progress: Optional[Callable[[int, int, int], None]] = progress
+        self.nbytes: int = 0
+        self.points: int = 0
+
+    def write(self, text: str, points: int = 0):
+        self.file.write(text)
+        self.nbytes += len(text.encode("utf-8")) if not text.isascii() else len(text)
+        self.points += points
+        if self.progress is not None and points:
+            # Only complete once the file is closed
+            total = self.nbytes + 1
+            if self.nb_points:
+                total = max(total, int(self.nbytes / self.points * self.nb_points))
+            self.progress(self.nbytes, total, self.points)
+
+    def close(self):
+        if self.progress is not None:
+            self.progress(self.nbytes, self.nbytes, self.points)
+
+
+def _chunkDataframe(chunk: Track, columns: List[str], elevation: bool) -> "pd.DataFrame":
+    """
+    Build the dataframe of the exported columns of a chunk
+    """
+    import pandas as pd
+    data = {}
+    for column in columns:
+        if column == "lat":
+            data[column] = chunk.lat
+        elif column == "lon":
+            data[column] = chunk.lon
+        elif column == "ele":
+            data[column] = _elevationColumn(chunk, elevation)
+        elif column == "time":
+            data[column] = timeStrings(chunk.time) if chunk.time is not None else np.full(len(chunk), "", dtype=object)
+    return pd.DataFrame(data, columns=columns)
+
+
+def writeCSV(chunks: Iterable[Track],
+             path: str,
+             sep: str = ",",
+             columns: Optional[List[str]] = None,
+             header: bool = True,
+             elevation: bool = True,
+             nb_points: Optional[int] = None,
+             progress: Optional[Callable[[int, int, int], None]] = None):
+    """
+    Write track points to a CSV file chunk by chunk (same output as GPX.to_csv)
+
+    Parameters
+    ----------
+    chunks : Iterable[Track]
+        Chunks of track points
+    path : str
+        Path to the CSV file
+    sep : str, optional
+        Separator, by default ","
+    columns : Optional[List[str]], optional
+        Columns to write (subset of CSV_COLUMNS), by default ["lat", "lon"]
+    header : bool, optional
+        Toggle header, by default True
+    elevation : bool, optional
+        Whether the file contains elevation data, by default True
+    nb_points : Optional[int], optional
+        Total number of points (used to estimate the size of the file), by default None
+    progress : Optional[Callable[[int, int, int], None]], optional
+        Function called after each chunk with the number of bytes written,
+        the estimated size of the file and the number of points written, by default None
+    """
+    columns = ["lat", "lon"] if columns is None else list(columns)
+    unsupported = [column for column in columns if column not in CSV_COLUMNS]
+    if unsupported:
+        raise ValueError(f"Unsupported CSV columns: {', '.join(unsupported)}")
+
+    with atomicWriter(path) as file:
+        writer = _ProgressWriter(file, nb_points, progress)
+        if header:
+            writer.write(sep.join(columns) + os.linesep)
+        for chunk in chunks:
+            if len(chunk):
+                writer.write(_chunkDataframe(chunk, columns, elevation).to_csv(None, sep=sep, header=False, index=False),
+                             len(chunk))
+        writer.close()
+
+
+def writeKML(chunks: Iterable[Track],
+             path: str,
+             name: Optional[str] = None,
+             styles: List[Tuple[str, Dict]] = KML_STYLES,
+             elevation: bool = True,
+             nb_points: Optional[int] = None,
+             progress: Optional[Callable[[int, int, int], None]] = None):
+    """
+    Write track points to a KML file chunk by chunk (same output as GPX.to_kml)
+
+    Parameters
+    ----------
+    chunks : Iterable[Track]
+        Chunks of track points
+    path : str
+        Path to the KML file
+    name : Optional[str], optional
+        Track name, by default None
+    styles : List[Tuple[str, Dict]], optional
+        Line styles, by default KML_STYLES
+    elevation : bool, optional
+        Whether the file contains elevation data, by default True
+    nb_points : Optional[int], optional
+        Total number of points (used to estimate the size of the file), by default None
+    progress : Optional[Callable[[int, int, int], None]], optional
+        Function called after each chunk with the number of bytes written,
+        the estimated size of the file and the number of points written, by default None
+    """
+    import pandas as pd
+    with atomicWriter(path) as file:
+        writer = _ProgressWriter(file, nb_points, progress)
+        writer.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+                     "<kml xmlns=\"http://www.opengis.net/kml/2.2\" xmlns:gx=\"http://www.google.com/kml/ext/2.2\" "
+                     "xmlns:kml=\"http://www.opengis.net/kml/2.2\" xmlns:atom=\"http://www.w3.org/2005/Atom\">")
+        writer.write(f"<Document><name>{escape(os.path.basename(path))}</name>")
+        for i, (_, style) in enumerate(styles, start=1):
+            writer.write(f"<Style id=\"style{i}\"><LineStyle><color>{escape(str(style['color']))}</color>"
+                         f"<width>{style['width']}</width></LineStyle>"
+                         f"<PolyStyle><fill>{style['fill']}</fill></PolyStyle></Style>")
+        writer.write("<StyleMap id=\"stylemap\">")
+        for i, (key, _) in enumerate(styles, start=1):
+            writer.write(f"<Pair><key>{escape(key)}</key><styleUrl>#style{i}</styleUrl></Pair>")
+        writer.write("</StyleMap><Placemark>")
+        if name is not None:
+            writer.write(f"<name>{escape(name)}</name>")
+        writer.write("<styleUrl>#stylemap</styleUrl><LineString><tessellate>1</tessellate><coordinates>")
+        for chunk in chunks:
+            if len(chunk):
+                coordinates = pd.DataFrame({"lon": chunk.lon,
+                                            "lat": chunk.lat,
+                                            "ele": _elevationColumn(chunk, elevation)})
+                writer.write(coordinates.to_csv(None, header=False, index=False).replace("\n", " "), len(chunk))
+        writer.write("</coordinates></LineString></Placemark></Document></kml>")
+        writer.close()
+
+
+def exportCSV(track: Track, path: str, chunk_size: int = EXPORT_CHUNK_SIZE, **kwargs):
+    """
+    Export a track to a CSV file (see writeCSV)
+    """
+    writeCSV(track.chunks(chunk_size), path, elevation=track.ele is not None, nb_points=len(track), **kwargs)
+
+
+def exportKML(track: Track, path: str, chunk_size: int = EXPORT_CHUNK_SIZE, **kwargs):
+    """
+    Export a track to a KML file (see writeKML)
+    """
+    writeKML(track.chunks(chunk_size), path, track.name, elevation=track.ele is not None, nb_points=len(track), **kwargs)
@@ -4,9 +4,124 @@ matplotlib.use('Qt5Agg')
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
 
+from .profiling import profileSpan
+
+# Zoom factor applied for each mouse wheel step
+ZOOM_FACTOR = 1.25
+
 class MatplotlibFigure(FigureCanvasQTAgg):
 
     def __init__(self, parent=None, width=16, height=9, dpi=100) -> None:
         fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = fig.add_subplot(111)
-        super(MatplotlibFigure, self).__init__(fig)
\ No newline at end of file
+        super(MatplotlibFigure, self).__init__(fig)
+
+        # Blitting (animated artists are drawn over a cached background)
+        self.animated_artists = []
+        self.background = None
+        self.mpl_connect("draw_event", self.onDraw)
+
+        # Navigation (zoom with mouse wheel and pan with left button)
+        self.navigation = False
+        self.pan_start = None
+        self.mpl_connect("scroll_event", self.onScroll)
+        self.mpl_connect("button_press_event", self.onButtonPress)
+        self.mpl_connect("motion_notify_event", self.onMotion)
+        self.mpl_connect("button_release_event", self.onButtonRelease)
+
+    def draw(self):
+        """
+        Full redraw of the figure (measured by the profiler)
+        """
+        with profileSpan("Draw", "render"):
+            super(MatplotlibFigure, self).draw()
+
+    def addAnimatedArtist(self, artist):
+        """
+        Register an artist updated with blitting (it is excluded from full redraws
+        and drawn over the cached background instead)
+        """
+        artist.set_animated(True)
+        self.animated_artists.append(artist)
+
+    def removeAnimatedArtist(self, artist):
+        """
+        Unregister an animated artist
+        """
+        if artist in self.animated_artists:
+            self.animated_artists.remove(artist)
+
+    def drawAnimatedArtists(self):
+        """
+        Draw the animated artists on the canvas
+        """
+        for artist in self.animated_artists:
+            if artist.get_visible():
+                self.figure.draw_artist(artist)
+
+    def onDraw(self, event):
+        """
+        Cache the background after each full redraw and draw the animated artists over it
+        """
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        self.drawAnimatedArtists()
+
+    def invalidateBackground(self):
+        """
+        Force a full redraw at the next refresh (the static artists changed,
+        ie: basemap tiles moving with the view)
+        """
+        self.background = None
+
+    def refresh(self):
+        """
+        Redraw the animated artists only (full redraw if no background is cached yet)
+        """
+        if self.background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self.background)
+        self.drawAnimatedArtists()
+        self.blit(self.figure.bbox)
+
+    def onScroll(self, event):
+        """
+        Zoom around the cursor when the mouse wheel is used
+        """
+        if not self.navigation or event.inaxes is not self.axes:
+            return
+        scale = 1 / ZOOM_FACTOR if event.button == "up" else ZOOM_FACTOR
+        x_min, x_max = self.axes.get_xlim()
+        y_min, y_max = self.axes.get_ylim()
+        self.axes.set_xlim(event.xdata - (event.xdata - x_min) * scale,
+                           event.xdata + (x_max - event.xdata) * scale)
+        self.axes.set_ylim(event.ydata - (event.ydata - y_min) * scale,
+                           event.ydata + (y_max - event.ydata) * scale)
+        self.refresh()
+
+    def onButtonPress(self, event):
+        """
+        Start panning when the left button is pressed
+        """
+        if self.navigation and event.button == 1 and event.inaxes is self.axes:
+            self.pan_start = (event.x, event.y, self.axes.get_xlim(), self.axes.get_ylim())
+
+    def onMotion(self, event):
+        """
+        Pan the view while the left button is pressed
+        """
+        if self.pan_start is None:
+            return
+        x, y, (x_min, x_max), (y_min, y_max) = self.pan_start
+        bbox = self.axes.get_window_extent()
+        dx = (event.x - x) * (x_max - x_min) / bbox.width
+        dy = (event.y - y) * (y_max - y_min) / bbox.height
+        self.axes.set_xlim(x_min - dx, x_max - dx)
+        self.axes.set_ylim(y_min - dy, y_max - dy)
+        self.refresh()
+
+    def onButtonRelease(self, event):
+        """
+        Stop panning when the left button is released
+        """
+        self.pan_start = None
@@ -0,0 +1,533 @@
+import os
+import math
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.parsers import expat
+
+import numpy as np
+
+from .cache import DEFAULT_DISK_CACHE_DIR, fileSignature
+from .metrics import EARTH_RADIUS
+from .reader import GPXReader, TrackSummary
+
+# Location of the library index database
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(DEFAULT_DISK_CACHE_DIR), "library.sqlite")
+
+# Version of the database schema (the index is rebuilt when it changes)
+LIBRARY_INDEX_VERSION = 2
+
+# Summary of the tracks stored in the index (see TrackSummary)
+SUMMARY_COLUMNS = ["nb_points", "nb_segments", "distance", "ascent", "descent", "start_time", "duration",
+                   "min_lat", "min_lon", "max_lat", "max_lon"]
+
+# Maximum number of consecutive track points covered by a bounding box
+BOX_POINTS = 128
+
+# Box identifiers are (file identifier << BOX_ID_BITS) + box number in the file
+BOX_ID_BITS = 24
+
+# Number of files indexed by a background task (short tasks let file loads run in between)
+INDEX_BATCH_SIZE = 16
+
+# Delay (milliseconds) between a change in the library and its re-indexing
+# (changes are grouped, ie: while files are copied)
+WATCH_DELAY = 1000
+
+# Maximum number of files watched for modifications (directories are always
+# watched for new and deleted files, other modifications are found at startup)
+WATCH_MAX_FILES = 8192
+
+# Length (meters) of one degree of latitude
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def pointBoxes(lat: np.ndarray,
+               lon: np.ndarray,
+               starts: Iterable[int],
+               box_points: int = BOX_POINTS) -> np.ndarray:
+    """
+    Compute the bounding boxes of runs of consecutive track points (a box
+    never covers points of two segments)
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+    starts : Iterable[int]
+        Index of the first point of the segments
+    box_points : int, optional
+        Maximum number of points per box, by default BOX_POINTS
+
+    Returns
+    -------
+    np.ndarray
+        Min latitude, max latitude, min longitude, max longitude of each box
+        (shape (n, 4), points without coordinates are ignored)
+    """
+    if len(lat) == 0:
+        return np.zeros((0, 4))
+    cuts = np.unique(np.concatenate((np.arange(0, len(lat), max(1, box_points)),
+                                     np.asarray(list(starts), dtype=np.int64))))
+    cuts = cuts[(cuts >= 0) & (cuts < len(lat))]
+    boxes = np.column_stack((np.fmin.reduceat(lat, cuts),
+                             np.fmax.reduceat(lat, cuts),
+                             np.fmin.reduceat(lon, cuts),
+                             np.fmax.reduceat(lon, cuts)))
+    return boxes[~np.isnan(boxes).any(axis=1)]
+
+
+def fileBoxes(path: str,
+              box_points: int = BOX_POINTS,
+              checkpoint: Optional[Callable[[], None]] = None) -> Tuple[np.ndarray, Dict[str, Optional[float]]]:
+    """
+    Compute the bounding boxes and the summary of the track points of a GPX
+    file in a single pass (streamed, only one chunk of points is in memory at a time)
+
+    Parameters
+    ----------
+    path : str
+        Path to the GPX file
+    box_points : int, optional
+        Maximum number of points per box, by default BOX_POINTS
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called before each block is parsed (raises to abort), by default None
+
+    Returns
+    -------
+    Tuple[np.ndarray, Dict[str, Optional[float]]]
+        Bounding boxes (see pointBoxes) and summary (see summarizeGPX)
+    """
+    boxes = [np.zeros((0, 4))]
+    summary = TrackSummary()
+    for chunk in GPXReader(path).chunks(checkpoint=checkpoint):
+        boxes.append(pointBoxes(chunk.lat, chunk.lon, chunk.segment_starts - chunk.offset, box_points))
+        summary.update(chunk)
+    return np.concatenate(boxes), summary.asDict()
+
+
+def boxDistance(lat: float, lon: float, boxes: np.ndarray) -> np.ndarray:
+    """
+    Compute the distance (meters) between a point and the nearest point of bounding boxes
+
+    Parameters
+    ----------
+    lat : float
+        Latitude of the point
+    lon : float
+        Longitude of the point
+    boxes : np.ndarray
+        Min latitude, max latitude, min longitude, max longitude of each box
+
+    Returns
+    -------
+    np.ndarray
+        Distance to each box (0 if the point is inside)
+    """
+    nearest_lat = np.clip(lat, boxes[:, 0], boxes[:, 1])
+    nearest_lon = np.clip(lon, boxes[:, 2], boxes[:, 3])
+    lat_rad, nearest_lat_rad = math.radians(lat), np.radians(nearest_lat)
+    sin_lat = np.sin((nearest_lat_rad - lat_rad) / 2)
+    sin_lon = np.sin(np.radians(nearest_lon - lon) / 2)
+    a = np.sqrt(sin_lat * sin_lat + math.cos(lat_rad) * np.cos(nearest_lat_rad) * sin_lon * sin_lon)
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(a, 1.0))
+
+
+def parseArea(text: str) -> Tuple[str, Tuple[float, ...]]:
+    """
+    Parse an area typed by the user: "min_lat, min_lon, max_lat, max_lon"
+    (bounding box) or "lat, lon, radius" (radius in kilometers)
+
+    Parameters
+    ----------
+    text : str
+        Comma or space separated numbers
+
+    Returns
+    -------
+    Tuple[str, Tuple[float, ...]]
+        "box" and the bounds or "radius" and the point and the radius (meters)
+    """
+    values = [float(value) for value in text.replace(",", " ").split()]
+    if len(values) == 4:
+        min_lat, min_lon, max_lat, max_lon = values
+        return "box", (min(min_lat, max_lat), min(min_lon, max_lon), max(min_lat, max_lat), max(min_lon, max_lon))
+    if len(values) == 3 and values[2] >= 0:
+        return "radius", (values[0], values[1], values[2] * 1000)
+    raise ValueError(f"Invalid area: {text!r}")
+
+
+def findGPXFiles(root: str, recursive: bool = True) -> Iterator[str]:
+    """
+    Find the GPX files of a directory tree (hidden directories are skipped)
+
+    Parameters
+    ----------
+    root : str
+        Root directory
+    recursive : bool, optional
+        Whether the sub-directories are searched, by default True
+
+    Returns
+    -------
+    Iterator[str]
+        Real path of each GPX file
+    """
+    for directory, directories, files in os.walk(root):
+        directories[:] = [name for name in directories if recursive and not name.startswith(".")]
+        for name in files:
+            if name.lower().endswith(".gpx"):
+                yield os.path.realpath(os.path.join(directory, name))
+
+
+class LibraryIndex():
+    """
+    Persistent index of a library of GPX files: summary of each track
+    (distance, duration, number of points, bounds, start time...) and
+    spatial index of the track points.
+
+    Track points are grouped in bounding boxes of at most BOX_POINTS
+    consecutive points of a segment, stored in an SQLite R*Tree; the
+    summary and the signature of each file are stored in the files table.
+    Files are re-indexed only when their modification time or size changed,
+    so updating the index of a library costs one stat per unchanged file
+    (unreadable files are kept as failed, without boxes nor summary, so they
+    are not read again until they change).
+    Spatial queries return the files having at least one box intersecting
+    the area (precision of a box, ie: a few hundred meters for a walk).
+    Thread safe (one connection per thread, writes are serialized).
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, box_points: int = BOX_POINTS):
+        """
+        Initialise the index (the database is created if needed)
+
+        Parameters
+        ----------
+        path : str, optional
+            Path to the database, by default DEFAULT_INDEX_PATH
+        box_points : int, optional
+            Maximum number of points per box, by default BOX_POINTS
+        """
+        self.path: str = path
+        self.box_points: int = box_points
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.connection() as connection:
+            if connection.execute("PRAGMA user_version").fetchone()[0] != LIBRARY_INDEX_VERSION:
+                connection.execute("DROP TABLE IF EXISTS files")
+                connection.execute("DROP TABLE IF EXISTS boxes")
+                connection.execute(f"PRAGMA user_version = {LIBRARY_INDEX_VERSION}")
+            connection.execute("CREATE TABLE IF NOT EXISTS files ("
+                               "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, "
+                               "mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, nb_boxes INTEGER NOT NULL, "
+                               "failed INTEGER NOT NULL DEFAULT 0, "
+                               "nb_points INTEGER, nb_segments INTEGER, distance REAL, ascent REAL, descent REAL, "
+                               "start_time INTEGER, duration REAL, "
+                               "min_lat REAL, min_lon REAL, max_lat REAL, max_lon REAL)")
+            connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS boxes "
+                               "USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Return the connection of the current thread
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def __len__(self) -> int:
+        return self.connection().execute("SELECT COUNT(*) FROM files WHERE failed = 0").fetchone()[0]
+
+    def signatures(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the signature (modification time and size) of the indexed files
+        (including the failed ones)
+        """
+        rows = self.connection().execute("SELECT path, mtime_ns, size FROM files")
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def summaries(self, paths: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Return the summary of indexed files (failed files are left out)
+
+        Parameters
+        ----------
+        paths : Optional[Iterable[str]], optional
+            Paths of the files, by default every indexed file
+
+        Returns
+        -------
+        Dict[str, Dict[str, Optional[float]]]
+            Summary of each file (keys of SUMMARY_COLUMNS)
+        """
+        connection = self.connection()
+        query = f"SELECT path, {', '.join(SUMMARY_COLUMNS)} FROM files WHERE failed = 0"
+        if paths is None:
+            rows = connection.execute(query).fetchall()
+        else:
+            paths = [os.path.realpath(path) for path in paths]
+            rows = []
+            for start in range(0, len(paths), 500):
+                batch = paths[start:start + 500]
+                rows.extend(connection.execute(f"{query} AND path IN ({','.join('?' * len(batch))})", batch))
+        return {row[0]: dict(zip(SUMMARY_COLUMNS, row[1:])) for row in rows}
+
+    def _delete(self, connection: sqlite3.Connection, path: str):
+        """
+        Remove a file and its boxes (write lock must be held)
+        """
+        row = connection.execute("SELECT id, nb_boxes FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        file_id, nb_boxes = row
+        connection.executemany("DELETE FROM boxes WHERE id = ?",
+                               (((file_id << BOX_ID_BITS) + i,) for i in range(nb_boxes)))
+        connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def addFile(self, path: str, checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Optional[float]]:
+        """
+        Index (or re-index) a GPX file
+
+        Parameters
+        ----------
+        path : str
+            Path to the GPX file
+        checkpoint : Optional[Callable[[], None]], optional
+            Function called while parsing (raises to abort), by default None
+
+        Returns
+        -------
+        Dict[str, Optional[float]]
+            Summary of the file (keys of SUMMARY_COLUMNS)
+        """
+        path = os.path.realpath(path)
+        signature = fileSignature(path)
+        boxes, summary = fileBoxes(path, self.box_points, checkpoint)
+        if len(boxes) >= 1 << BOX_ID_BITS:
+            raise ValueError(f"Too many points to index: {path}")
+        summary = {column: summary[column] for column in SUMMARY_COLUMNS}
+        connection = self.connection()
+        with self.write_lock, connection:
+            self._delete(connection, path)
+            cursor = connection.execute(f"INSERT INTO files (path, mtime_ns, size, nb_boxes, {', '.join(SUMMARY_COLUMNS)}) "
+                                        f"VALUES ({', '.join('?' * (4 + len(SUMMARY_COLUMNS)))})",
+                                        (path, signature[0], signature[1], len(boxes), *summary.values()))
+            first_id = cursor.lastrowid << BOX_ID_BITS
+            connection.executemany("INSERT INTO boxes VALUES (?, ?, ?, ?, ?)",
+                                   ((first_id + i, *box) for i, box in enumerate(boxes.tolist())))
+        return summary
+
+    def addFailedFile(self, path: str, signature: Tuple[int, int]):
+        """
+        Record a file that could not be indexed (scan skips it until its
+        signature changes)
+
+        Parameters
+        ----------
+        path : str
+            Path to the GPX file
+        signature : Tuple[int, int]
+            Signature of the file taken before reading it
+        """
+        path = os.path.realpath(path)
+        connection = self.connection()
+        with self.write_lock, connection:
+            self._delete(connection, path)
+            connection.execute("INSERT INTO files (path, mtime_ns, size, nb_boxes, failed) VALUES (?, ?, ?, 0, 1)",
+                               (path, signature[0], signature[1]))
+
+    def removeFile(self, path: str):
+        """
+        Remove a file from the index
+
+        Parameters
+        ----------
+        path : str
+            Path to the GPX file
+        """
+        connection = self.connection()
+        with self.write_lock, connection:
+            self._delete(connection, os.path.realpath(path))
+
+    def update(self,
+               root: str,
+               progress: Optional[Callable[[int, int, int], None]] = None,
+               checkpoint: Optional[Callable[[], None]] = None) -> Tuple[int, int]:
+        """
+        Synchronise the index with the GPX files of a directory tree (new
+        and modified files are indexed, deleted files are removed)
+
+        Parameters
+        ----------
+        root : str
+            Root directory of the library
+        progress : Optional[Callable[[int, int, int], None]], optional
+            Function called after each indexed file with the number of files
+            indexed, the number of files to index and the number of points, by default None
+        checkpoint : Optional[Callable[[], None]], optional
+            Function called between the files (raises to abort), by default None
+
+        Returns
+        -------
+        Tuple[int, int]
+            Number of indexed and removed files
+        """
+        outdated, removed, _ = self.scan(root)
+        for path in removed:
+            self.removeFile(path)
+        nb_points = 0
+        for i, path in enumerate(outdated, start=1):
+            if checkpoint is not None:
+                checkpoint()
+            summary = self.indexFile(path, checkpoint)
+            nb_points += summary["nb_points"] if summary is not None else 0
+            if progress is not None:
+                progress(i, len(outdated), nb_points)
+        return len(outdated), len(removed)
+
+    def scan(self, root: str, recursive: bool = True) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Compare the GPX files of a directory (tree) with the index
+
+        Parameters
+        ----------
+        root : str
+            Root directory of the library (or directory whose content changed)
+        recursive : bool, optional
+            Whether the sub-directories are scanned, by default True
+
+        Returns
+        -------
+        Tuple[List[str], List[str], List[str]]
+            New or modified files (to index), deleted files (to remove) and
+            every GPX file found
+        """
+        root = os.path.realpath(root)
+        indexed = self.signatures()
+        files = set()
+        outdated = []
+        for path in findGPXFiles(root, recursive):
+            files.add(path)
+            try:
+                if indexed.get(path) != fileSignature(path):
+                    outdated.append(path)
+            except OSError:
+                continue
+        if recursive:
+            removed = [path for path in indexed
+                       if path not in files and (path.startswith(root + os.sep) or not os.path.exists(path))]
+        else:
+            removed = [path for path in indexed if path not in files and os.path.dirname(path) == root]
+        return outdated, removed, sorted(files)
+
+    def indexFile(self, path: str, checkpoint: Optional[Callable[[], None]] = None) -> Optional[Dict[str, Optional[float]]]:
+        """
+        Index a file found by scan (unreadable files are recorded as failed
+        until they change again, deleted files are removed)
+
+        Parameters
+        ----------
+        path : str
+            Path to the GPX file
+        checkpoint : Optional[Callable[[], None]], optional
+            Function called while parsing (raises to abort), by default None
+
+        Returns
+        -------
+        Optional[Dict[str, Optional[float]]]
+            Summary of the file (None if the file could not be read)
+        """
+        try:
+            signature = fileSignature(os.path.realpath(path))
+        except OSError:
+            self.removeFile(path)
+            return None
+        try:
+            return self.addFile(path, checkpoint)
+        except (OSError, ValueError, expat.ExpatError):
+            self.addFailedFile(path, signature)
+            return None
+
+    def _files(self, box_ids: Iterable[int]) -> List[str]:
+        """
+        Return the paths of the files containing boxes
+        """
+        file_ids = sorted({box_id >> BOX_ID_BITS for box_id in box_ids})
+        connection = self.connection()
+        paths = []
+        for start in range(0, len(file_ids), 500):
+            batch = file_ids[start:start + 500]
+            rows = connection.execute(f"SELECT path FROM files WHERE id IN ({','.join('?' * len(batch))})", batch)
+            paths.extend(path for path, in rows)
+        return sorted(paths)
+
+    def queryBox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[str]:
+        """
+        Find the files passing through a bounding box
+
+        Parameters
+        ----------
+        min_lat : float
+            Minimum latitude
+        min_lon : float
+            Minimum longitude
+        max_lat : float
+            Maximum latitude
+        max_lon : float
+            Maximum longitude
+
+        Returns
+        -------
+        List[str]
+            Sorted paths of the matching files
+        """
+        rows = self.connection().execute("SELECT id FROM boxes WHERE max_lat >= ? AND min_lat <= ? "
+                                         "AND max_lon >= ? AND min_lon <= ?",
+                                         (min_lat, max_lat, min_lon, max_lon))
+        return self._files(box_id for box_id, in rows)
+
+    def queryRadius(self, lat: float, lon: float, radius: float) -> List[str]:
+        """
+        Find the files passing within a distance of a point
+
+        Parameters
+        ----------
+        lat : float
+            Latitude of the point
+        lon : float
+            Longitude of the point
+        radius : float
+            Distance (meters)
+
+        Returns
+        -------
+        List[str]
+            Sorted paths of the matching files
+        """
+        delta_lat = radius / METERS_PER_DEGREE
+        delta_lon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        rows = self.connection().execute("SELECT id, min_lat, max_lat, min_lon, max_lon FROM boxes "
+                                         "WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?",
+                                         (lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon)).fetchall()
+        if not rows:
+            return []
+        rows = np.array(rows, dtype=np.float64)
+        close = boxDistance(lat, lon, rows[:, 1:]) <= radius
+        return self._files(int(box_id) for box_id in rows[close, 0])
+
+    def close(self):
+        """
+        Close the connection of the current thread
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
@@ -1,9 +1,21 @@
-import sys, logging
+import sys, queue, logging, logging.handlers
+from collections import deque
 from enum import Enum
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
+# Delay (milliseconds) between two updates of the log widget
+LOG_FLUSH_INTERVAL = 100
+
+# Maximum number of lines kept by the log widget
+LOG_MAX_LINES = 5000
+
+# Maximum number of records appended to the log widget at once (the others
+# wait for the next update, so the application thread is never blocked long)
+LOG_MAX_RECORDS_PER_FLUSH = 500
+
+
 class Log(Enum):
     """
     Logging level.
@@ -17,28 +29,49 @@ class Log(Enum):
 def emitLog(level, message, worker=None):
     """
     Multi porpose logging function.
-    If called from current thread: Use logging to write message in log.
-    If called from worker thread: Emit signal to send log message to application thread.
+    Can be called from any thread: the log handlers of the application queue
+    the records (see QPlainTextEditLogger and startFileLogging), so messages
+    of worker threads no longer go through signals of the application thread.
 
     Args:
         level (Log): Logging level.
         message (str): Logging message.
-        worker (worker, optional): Worker thread. Defaults to None.
+        worker (worker, optional): Worker thread (kept for compatibility). Defaults to None.
     """
     if "pytest" not in sys.modules:
-        if(QThread.currentThread() == QApplication.instance().thread()):
-            if level.value == Log.ERROR.value:
-                logging.error(message)
-            elif level.value == Log.WARNING.value:
-                logging.warning(message)
-            elif level.value == Log.INFO.value:
-                logging.info(message)
-            elif level.value == Log.DEBUG.value:
-                logging.debug(message)
-            else:
-                logging.error("Invalid log level for message: " + message)
+        if level.value == Log.ERROR.value:
+            logging.error(message)
+        elif level.value == Log.WARNING.value:
+            logging.warning(message)
+        elif level.value == Log.INFO.value:
+            logging.info(message)
+        elif level.value == Log.DEBUG.value:
+            logging.debug(message)
         else:
-            worker.signals.log.emit(level, message)
+            logging.error("Invalid log level for message: " + message)
+
+
+def startFileLogging(path: str, level: int = logging.DEBUG) -> logging.handlers.QueueListener:
+    """
+    Write the log records to a file from a background thread (the threads
+    logging only put the records in a queue)
+
+    Args:
+        path (str): Path to the log file.
+        level (int, optional): Minimum level of the written records. Defaults to logging.DEBUG.
+
+    Returns:
+        logging.handlers.QueueListener: Writer thread (stop it to write the remaining records).
+    """
+    records = queue.SimpleQueue()
+    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.setLevel(level)
+    logging.getLogger().addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(records, file_handler)
+    listener.start()
+    return listener
 
 
 class CustomFormatter(logging.Formatter):
@@ -49,27 +82,76 @@ class CustomFormatter(logging.Formatter):
         logging.WARNING: ("[%(asctime)s][%(levelname)s] %(message)s", "orange")
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # HTML format of each level (built once)
+        self.formatters = {
+            level: logging.Formatter("<font color=\"{}\">{}</font>".format(QColor(color).name(), fmt))
+            for level, (fmt, color) in CustomFormatter.FORMATS.items()
+        }
+
     def format(self, record):
-        last_fmt = self._style._fmt
-        opt = CustomFormatter.FORMATS.get(record.levelno)
-        if opt:
-            fmt, color = opt
-            self._style._fmt = "<font color=\"{}\">{}</font>".format(
-                QColor(color).name(), fmt)
-        res = logging.Formatter.format(self, record)
-        self._style._fmt = last_fmt
-        return res
+        formatter = self.formatters.get(record.levelno)
+        if formatter is None:
+            return logging.Formatter.format(self, record)
+        return formatter.format(record)
 
 
 class QPlainTextEditLogger(logging.Handler):
-    def __init__(self, parent=None):
+    """
+    Log handler writing to a text widget.
+    Records can be emitted from any thread: they are formatted and queued,
+    then a timer of the application thread appends them in batches (at most
+    every LOG_FLUSH_INTERVAL, LOG_MAX_RECORDS_PER_FLUSH records at a time).
+    The widget keeps the last LOG_MAX_LINES lines, older records of a burst
+    are only counted.
+    """
+    def __init__(self, parent=None, flush_interval=LOG_FLUSH_INTERVAL, max_lines=LOG_MAX_LINES,
+                 max_records=LOG_MAX_RECORDS_PER_FLUSH):
         super().__init__()
         self.widget = QPlainTextEdit(parent)
         self.widget.setReadOnly(True)
+        self.widget.setMaximumBlockCount(max_lines)
+        self.max_lines = max_lines
+        self.max_records = max_records
+        self.records = deque()
+        self.timer = QTimer(self.widget)
+        self.timer.setInterval(flush_interval)
+        self.timer.timeout.connect(self.flushRecords)
+        self.timer.start()
 
     def emit(self, record):
-        msg = self.format(record)
-        self.widget.appendHtml(msg)
-        # move scrollbar
+        try:
+            self.records.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def flushRecords(self):
+        """
+        Append the queued records to the widget (application thread)
+        """
+        if not self.records:
+            return
+        messages = []
+        if len(self.records) > self.max_lines:
+            # Records that would be removed from the widget right away
+            skipped = len(self.records) - self.max_lines + 1
+            for _ in range(skipped):
+                self.records.popleft()
+            messages.append(f"[{skipped} messages not shown, see the log file]")
+        while self.records and len(messages) < self.max_records:
+            messages.append(self.records.popleft())
+
+        # Follow the new lines only if the end of the log was shown
         scrollbar = self.widget.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        follow = scrollbar.value() == scrollbar.maximum()
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for message in messages:
+            if not self.widget.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertHtml(message)
+        cursor.endEditBlock()
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
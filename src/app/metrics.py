@@ -0,0 +1,338 @@
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# pandas and ezgpx are slow to import (only imported when used)
+if TYPE_CHECKING:
+    import pandas as pd
+    from ezgpx import GPX
+
+# latitude/longitude in GPX files is always in WGS84 datum (same radius as ezgpx)
+EARTH_RADIUS = 6378.137 * 1000
+
+# Maximal distance (meters) between two points considered as stopped (same tolerance as ezgpx)
+STOPPED_TOLERANCE = 2.45
+
+# Missing time value (NaT)
+NAT = np.iinfo(np.int64).min
+
+# One hour (nanoseconds)
+HOUR = 3600 * 1_000_000_000
+
+
+def epochTimes(times: List[Optional[datetime]]) -> np.ndarray:
+    """
+    Convert datetimes (naive datetimes are UTC, like in ezgpx) to epoch times
+
+    Parameters
+    ----------
+    times : List[Optional[datetime]]
+        Datetimes (None if missing)
+
+    Returns
+    -------
+    np.ndarray
+        UTC epoch nanoseconds (int64, NAT if missing)
+    """
+    return np.array([None if t is None
+                     else t if t.tzinfo is None
+                     else t.astimezone(timezone.utc).replace(tzinfo=None)
+                     for t in times], dtype="datetime64[ns]").view(np.int64)
+
+
+def gpxArrays(gpx: "GPX") -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extract the track points of a GPX object as contiguous arrays
+
+    Parameters
+    ----------
+    gpx : GPX
+        GPX object
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Latitude (float64), longitude (float64), elevation (float64, NaN if
+        missing) and time (int64 UTC epoch nanoseconds, NAT if missing)
+    """
+    points = [point
+              for track in gpx.gpx.tracks
+              for segment in track.trkseg
+              for point in segment.trkpt]
+    lat = np.fromiter((point.lat for point in points), dtype=np.float64, count=len(points))
+    lon = np.fromiter((point.lon for point in points), dtype=np.float64, count=len(points))
+    ele = np.fromiter((np.nan if point.ele is None else point.ele for point in points),
+                      dtype=np.float64, count=len(points))
+    time = epochTimes([point.time for point in points])
+    return lat, lon, ele, time
+
+
+def haversineDistances(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Compute the Haversine distance (meters) between consecutive points
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+
+    Returns
+    -------
+    np.ndarray
+        Distance from the previous point (0 for the first point)
+    """
+    distances = np.zeros(len(lat))
+    if len(lat) < 2:
+        return distances
+    lat_rad = np.radians(lat)
+    sin_lat = np.sin(np.diff(lat_rad) / 2)
+    sin_lon = np.sin(np.radians(np.diff(lon)) / 2)
+    a = np.sqrt(sin_lat * sin_lat + np.cos(lat_rad[:-1]) * np.cos(lat_rad[1:]) * sin_lon * sin_lon)
+    distances[1:] = 2 * EARTH_RADIUS * np.arcsin(np.minimum(a, 1.0))
+    return distances
+
+
+def trackBounds(lat: np.ndarray, lon: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Find minimum and maximum latitude and longitude
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        Min latitude, min longitude, max latitude, max longitude
+    """
+    return float(lat.min()), float(lon.min()), float(lat.max()), float(lon.max())
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Element-wise division returning 0 where the denominator is 0 (or a value is missing)
+    """
+    result = np.zeros(len(numerator))
+    valid = (denominator != 0) & np.isfinite(numerator) & np.isfinite(denominator)
+    np.divide(numerator, denominator, out=result, where=valid)
+    return result
+
+
+def computeMetrics(lat: np.ndarray,
+                   lon: np.ndarray,
+                   ele: Optional[np.ndarray] = None,
+                   time: Optional[np.ndarray] = None,
+                   smoothing: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Compute per point metrics with batched NumPy operations.
+    Values match the ones computed by ezgpx (speed and ascent speed in
+    kilometers per hour, pace in minutes per kilometer, ascent rate in
+    percent, distance from start in meters).
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+    ele : Optional[np.ndarray], optional
+        Elevation of the points (NaN if missing), by default None
+    time : Optional[np.ndarray], optional
+        Time of the points (UTC epoch nanoseconds, NAT if missing), by default None
+    smoothing : int, optional
+        Number of points over which ascent rates are computed (1 means
+        between consecutive points, like ezgpx), by default 1
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Metrics ("distance", "distance_from_start" and, if available,
+        "ascent_rate", "speed", "pace", "ascent_speed")
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    distances = haversineDistances(lat, lon)
+    distance_from_start = np.cumsum(distances)
+    metrics = {
+        "distance": distances,
+        "distance_from_start": distance_from_start
+    }
+
+    # Elevation related metrics
+    if ele is not None:
+        ele = np.asarray(ele, dtype=np.float64)
+        window = max(1, int(smoothing))
+        previous = np.maximum(np.arange(len(ele)) - window, 0)
+        ascent = ele - ele[previous]
+        distance = distance_from_start - distance_from_start[previous]
+        metrics["ascent_rate"] = _divide(ascent * 100, distance)
+
+    # Time related metrics
+    if time is not None:
+        time = np.asarray(time, dtype=np.int64)
+        missing = time == NAT
+        seconds = np.zeros(len(time))
+        seconds[1:] = np.diff(time) / 1e9
+        seconds[1:][missing[1:] | missing[:-1]] = np.nan
+        hours = seconds / 3600
+        speed = _divide(distances / 1000, hours)
+        metrics["speed"] = speed
+
+        # Points without speed are filled with the average moving pace
+        stopped = distances < STOPPED_TOLERANCE
+        moving_hours = np.nansum(hours[~stopped])
+        avg_moving_speed = distance_from_start[-1] / 1000 / moving_hours if len(time) and moving_hours else 0.0
+        avg_moving_pace = 60.0 / avg_moving_speed if avg_moving_speed else 0.0
+        pace = np.full(len(speed), avg_moving_pace)
+        np.divide(60.0, speed, out=pace, where=speed != 0)
+        metrics["pace"] = pace
+
+        if ele is not None:
+            ascent = np.zeros(len(ele))
+            ascent[1:] = np.diff(ele) / 1000
+            metrics["ascent_speed"] = _divide(ascent, hours)
+
+    return metrics
+
+
+def timeStrings(time: np.ndarray) -> np.ndarray:
+    """
+    Convert times to strings in the local time zone (same format as ezgpx dataframes)
+
+    Parameters
+    ----------
+    time : np.ndarray
+        Time of the points (UTC epoch nanoseconds, NAT if missing)
+
+    Returns
+    -------
+    np.ndarray
+        Time strings (empty string if missing)
+    """
+    time = np.asarray(time, dtype=np.int64)
+    strings = np.full(len(time), "", dtype=object)
+    valid = time != NAT
+    if not valid.any():
+        return strings
+
+    # Local time zone offset (only evaluated once per hour as offsets change on the hour)
+    hours, inverse = np.unique(time[valid] // HOUR, return_inverse=True)
+    hour_offsets = np.array([datetime.fromtimestamp(int(hour) * 3600, tz=timezone.utc).astimezone().utcoffset().total_seconds()
+                             for hour in hours], dtype=np.int64)
+    offsets = hour_offsets[inverse.ravel()]
+    local = time[valid] + offsets * 1_000_000_000
+
+    # Format: "YYYY-MM-DD HH:MM:SS[.ffffff]+HH:MM"
+    dates = np.char.replace(np.datetime_as_string(local.view("datetime64[ns]").astype("datetime64[s]")), "T", " ")
+    microseconds = (local // 1000) % 1_000_000
+    fractions = np.where(microseconds != 0,
+                         np.char.add(".", np.char.zfill(microseconds.astype(str), 6)),
+                         "")
+    signs = np.where(offsets < 0, "-", "+")
+    offset_strings = np.char.add(np.char.add(np.char.zfill((np.abs(offsets) // 3600).astype(str), 2), ":"),
+                                 np.char.zfill((np.abs(offsets) % 3600 // 60).astype(str), 2))
+    strings[valid] = np.char.add(np.char.add(np.char.add(dates, fractions), signs), offset_strings)
+    return strings
+
+
+def metricsDataframe(lat: np.ndarray,
+                     lon: np.ndarray,
+                     ele: Optional[np.ndarray] = None,
+                     time: Optional[np.ndarray] = None,
+                     elevation: bool = True,
+                     times: bool = True,
+                     speed: bool = False,
+                     pace: bool = False,
+                     ascent_rate: bool = False,
+                     ascent_speed: bool = False,
+                     distance_from_start: bool = False,
+                     metrics: Optional[Dict[str, np.ndarray]] = None) -> "pd.DataFrame":
+    """
+    Build a dataframe with the same columns as GPX.to_dataframe from contiguous arrays
+
+    Parameters
+    ----------
+    lat : np.ndarray
+        Latitude of the points
+    lon : np.ndarray
+        Longitude of the points
+    ele : Optional[np.ndarray], optional
+        Elevation of the points (NaN if missing), by default None
+    time : Optional[np.ndarray], optional
+        Time of the points (UTC epoch nanoseconds, NAT if missing), by
+        default None (time related columns are disabled)
+    elevation : bool, optional
+        Toggle elevation, by default True
+    times : bool, optional
+        Toggle time, by default True
+    speed : bool, optional
+        Toggle speed, by default False
+    pace : bool, optional
+        Toggle pace, by default False
+    ascent_rate : bool, optional
+        Toggle ascent rate, by default False
+    ascent_speed : bool, optional
+        Toggle ascent speed, by default False
+    distance_from_start : bool, optional
+        Toggle distance from start, by default False
+    metrics : Optional[Dict[str, np.ndarray]], optional
+        Precomputed metrics (see computeMetrics, with missing elevation
+        filled with 0), by default None (computed)
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe containing data from the arrays
+    """
+    # Disable time related values if no time data available
+    if time is None:
+        times = speed = pace = ascent_speed = False
+    filled_ele = np.zeros(len(lat)) if ele is None else np.nan_to_num(ele, nan=0.0)
+    if metrics is None:
+        metrics = computeMetrics(lat, lon, filled_ele, time)
+
+    columns = {"lat": lat, "lon": lon}
+    if elevation:
+        columns["ele"] = filled_ele
+    if times:
+        columns["time"] = timeStrings(time)
+    if speed:
+        columns["speed"] = metrics["speed"]
+    if pace:
+        columns["pace"] = metrics["pace"]
+    if ascent_rate:
+        columns["ascent_rate"] = metrics["ascent_rate"]
+    if ascent_speed:
+        columns["ascent_speed"] = metrics["ascent_speed"]
+    if distance_from_start:
+        columns["distance_from_start"] = metrics["distance_from_start"]
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+
+def gpxDataframe(gpx: "GPX", **kwargs) -> "pd.DataFrame":
+    """
+    Vectorized equivalent of GPX.to_dataframe
+
+    Parameters
+    ----------
+    gpx : GPX
+        GPX object
+    **kwargs
+        Columns to toggle (see metricsDataframe)
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe containing data from the GPX object
+    """
+    if "time" in kwargs:
+        kwargs["times"] = kwargs.pop("time")
+    lat, lon, ele, time = gpxArrays(gpx)
+    return metricsDataframe(lat, lon, ele, time if gpx.time_data else None, **kwargs)
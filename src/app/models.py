@@ -0,0 +1,264 @@
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt5.QtWidgets import QFileSystemModel
+
+from .profiling import Span
+
+# Track summary columns added to the files tree (header and summary key)
+SUMMARY_HEADERS = [("Distance", "distance"),
+                   ("Duration", "duration"),
+                   ("Points", "nb_points"),
+                   ("Start", "start_time"),
+                   ("Bounds", "min_lat")]
+
+# Above this number of updated summaries the whole tree is refreshed at once
+# (instead of looking up the node of each file)
+SUMMARY_BULK_UPDATE = 64
+
+# Columns of the timing spans table
+SPAN_HEADERS = ["Stage", "Category", "Thread", "Start (s)", "Duration (ms)", "Points", "File size"]
+
+
+def summaryText(key: str, summary: Dict[str, Optional[float]]) -> str:
+    """
+    Format a value of a track summary for the files tree
+
+    Parameters
+    ----------
+    key : str
+        Key of the value (see SUMMARY_HEADERS)
+    summary : Dict[str, Optional[float]]
+        Summary of the track (see LibraryIndex.summaries)
+
+    Returns
+    -------
+    str
+        Formatted value ("" if not available)
+    """
+    value = summary.get(key)
+    if value is None:
+        return ""
+    if key == "distance":
+        return f"{value / 1000:.2f} km"
+    if key == "duration":
+        minutes, seconds = divmod(int(round(value)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    if key == "nb_points":
+        return f"{int(value):,}"
+    if key == "start_time":
+        return datetime.fromtimestamp(value / 1e9, tz=timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M")
+    if key == "min_lat":
+        return (f"{summary['min_lat']:.4f}, {summary['min_lon']:.4f}, "
+                f"{summary['max_lat']:.4f}, {summary['max_lon']:.4f}")
+    return str(value)
+
+
+class LibraryModel(QFileSystemModel):
+    """
+    File system model with the summary of the indexed tracks as extra columns.
+
+    Summaries are computed by the library indexer in background and pushed
+    to the model (setSummaries), so nothing is parsed on the GUI thread.
+    """
+
+    def __init__(self, parent=None):
+        super(LibraryModel, self).__init__(parent)
+        self.summaries: Dict[str, Dict[str, Optional[float]]] = {}
+        self.first_summary_column: int = super(LibraryModel, self).columnCount()
+
+    def setSummaries(self, summaries: Dict[str, Optional[Dict[str, Optional[float]]]]):
+        """
+        Update the summary of tracks
+
+        Parameters
+        ----------
+        summaries : Dict[str, Optional[Dict[str, Optional[float]]]]
+            Summary of each file (None to remove it)
+        """
+        bulk = len(summaries) > SUMMARY_BULK_UPDATE
+        if bulk:
+            self.layoutAboutToBeChanged.emit()
+        first, last = self.first_summary_column, self.first_summary_column + len(SUMMARY_HEADERS) - 1
+        for path, summary in summaries.items():
+            if summary is None:
+                self.summaries.pop(path, None)
+            else:
+                self.summaries[path] = summary
+            if not bulk:
+                index = self.index(path, first)
+                if index.isValid():
+                    self.dataChanged.emit(index, index.siblingAtColumn(last))
+        if bulk:
+            self.layoutChanged.emit()
+
+    def summaryValue(self, index: QModelIndex) -> Optional[float]:
+        """
+        Return the raw value of a summary column (used to sort)
+        """
+        summary = self.summaries.get(self.filePath(index))
+        if summary is None:
+            return None
+        return summary.get(SUMMARY_HEADERS[index.column() - self.first_summary_column][1])
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return self.first_summary_column + len(SUMMARY_HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        column = index.column() - self.first_summary_column
+        if column < 0:
+            return super(LibraryModel, self).data(index, role)
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole:
+            return None
+        summary = self.summaries.get(self.filePath(index))
+        return "" if summary is None else summaryText(SUMMARY_HEADERS[column][1], summary)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        column = section - self.first_summary_column
+        if column < 0 or orientation != Qt.Horizontal:
+            return super(LibraryModel, self).headerData(section, orientation, role)
+        if role == Qt.DisplayRole:
+            return SUMMARY_HEADERS[column][0]
+        return None
+
+
+class FilesProxyModel(QSortFilterProxyModel):
+    """
+    Sort and filter proxy of the files tree.
+
+    Besides the regular expression filter, the tree can be restricted to a
+    set of files (ie: result of a spatial query): only these files and the
+    directories containing them are shown. Track summary columns (see
+    LibraryModel) are sorted by value, files without summary first.
+    """
+
+    def __init__(self, parent=None):
+        super(FilesProxyModel, self).__init__(parent)
+        self.allowed_files: Optional[Set[str]] = None
+        self.allowed_directories: Set[str] = set()
+
+    def setAllowedFiles(self, paths: Optional[Iterable[str]], root: str = ""):
+        """
+        Restrict the tree to a set of files
+
+        Parameters
+        ----------
+        paths : Optional[Iterable[str]]
+            Files to show, None to show every file
+        root : str, optional
+            Root directory of the tree (always shown), by default ""
+        """
+        if paths is None:
+            self.allowed_files = None
+            self.allowed_directories = set()
+        else:
+            self.allowed_files = {os.path.realpath(path) for path in paths}
+            self.allowed_directories = set()
+            for path in list(self.allowed_files) + ([os.path.join(os.path.realpath(root), "")] if root else []):
+                directory = os.path.dirname(path)
+                while directory not in self.allowed_directories:
+                    self.allowed_directories.add(directory)
+                    parent = os.path.dirname(directory)
+                    if parent == directory:
+                        break
+                    directory = parent
+        self.invalidateFilter()
+
+    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
+        model = self.sourceModel()
+        if not isinstance(model, LibraryModel) or left.column() < model.first_summary_column:
+            return super(FilesProxyModel, self).lessThan(left, right)
+        left_value, right_value = model.summaryValue(left), model.summaryValue(right)
+        if left_value is None or right_value is None:
+            return left_value is None and right_value is not None
+        return left_value < right_value
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        if not super(FilesProxyModel, self).filterAcceptsRow(source_row, source_parent):
+            return False
+        if self.allowed_files is None:
+            return True
+        model = self.sourceModel()
+        index = model.index(source_row, 0, source_parent)
+        path = os.path.realpath(model.filePath(index))
+        if model.isDir(index):
+            return path in self.allowed_directories
+        return path in self.allowed_files
+
+
+class SpansModel(QAbstractTableModel):
+    """
+    Table of the timing spans recorded by the profiler (one row per span).
+    Raw values are available with the user role (used to sort).
+    """
+
+    def __init__(self, parent=None):
+        super(SpansModel, self).__init__(parent)
+        self.spans: List[Span] = []
+        self.origin: float = 0.0
+
+    def setSpans(self, spans: List[Span], origin: float):
+        """
+        Replace the spans of the table
+
+        Parameters
+        ----------
+        spans : List[Span]
+            Recorded spans
+        origin : float
+            Time origin of the start column (time.perf_counter())
+        """
+        self.beginResetModel()
+        self.spans = spans
+        self.origin = origin
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.spans)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(SPAN_HEADERS)
+
+    def spanValue(self, span: Span, column: int):
+        """
+        Return the raw value of a column
+        """
+        return (span.name,
+                span.category,
+                span.thread_name,
+                span.start - self.origin,
+                span.duration * 1000,
+                span.points,
+                span.file_size)[column]
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.spanValue(self.spans[index.row()], index.column())
+        if role == Qt.UserRole:
+            return -1 if value is None else value
+        if role == Qt.TextAlignmentRole and index.column() >= 3:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole or value is None:
+            return None
+        if index.column() == 3:
+            return f"{value:.3f}"
+        if index.column() == 4:
+            return f"{value:.2f}"
+        if index.column() == 5:
+            return f"{value:,}"
+        if index.column() == 6:
+            return f"{value / 1e6:.2f} MB"
+        return value
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return SPAN_HEADERS[section]
+        return None
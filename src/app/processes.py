@@ -0,0 +1,399 @@
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .reader import readTrack
+from .track import Track, WayPoints
+
+# Minimum size (bytes) of the GPX files loaded in a worker process
+# (smaller files load faster than a process round trip)
+PROCESS_MIN_FILE_SIZE = 5 * 1024 * 1024
+
+# Minimum delay (seconds) between two progress messages sent by a process
+PROCESS_PROGRESS_INTERVAL = 0.1
+
+# Arrays are aligned on 64 bytes in shared memory blocks
+SHARED_ALIGNMENT = 64
+
+# Number of cancellation flags shared with the worker processes
+# (a task uses the flag task_id % CANCEL_SLOTS)
+CANCEL_SLOTS = 1024
+
+# Progress queue and cancellation flags of the current worker process (set by initProcess)
+_progress_queue = None
+_cancel_flags = None
+
+
+class TaskCancelled(Exception):
+    """
+    Raised in a worker process when its task has been cancelled
+    """
+
+
+class SharedResult(ABC):
+    """
+    Picklable result of a process referencing shared memory buffers.
+    load() is called once in the parent process to retrieve the actual result
+    (and free the buffers), release() frees the buffers of a discarded result.
+    """
+
+    @abstractmethod
+    def load(self):
+        pass
+
+    @abstractmethod
+    def release(self):
+        pass
+
+
+class SharedArrays(SharedResult):
+    """
+    NumPy arrays stored in a single shared memory block (only the name of the
+    block and the layout of the arrays are pickled).
+    """
+
+    def __init__(self, name: str, layout: List[Tuple[str, Optional[str], Tuple[int, ...], int]]):
+        """
+        Initialise SharedArrays instance
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory block
+        layout : List[Tuple[str, Optional[str], Tuple[int, ...], int]]
+            Key, dtype (None for missing arrays), shape and offset of each array
+        """
+        self.name: str = name
+        self.layout: List[Tuple[str, Optional[str], Tuple[int, ...], int]] = layout
+
+    @classmethod
+    def create(cls, arrays: Dict[str, Optional[np.ndarray]]) -> "SharedArrays":
+        """
+        Copy arrays to a new shared memory block (the block is then owned by
+        the process calling load or release)
+
+        Parameters
+        ----------
+        arrays : Dict[str, Optional[np.ndarray]]
+            Arrays to share (None values are kept)
+
+        Returns
+        -------
+        SharedArrays
+            Handle of the shared arrays
+        """
+        layout = []
+        size = 0
+        for key, array in arrays.items():
+            if array is None:
+                layout.append((key, None, (), 0))
+                continue
+            size = -(-size // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+            layout.append((key, array.dtype.str, array.shape, size))
+            size += array.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for key, dtype, shape, offset in layout:
+                if dtype is not None:
+                    np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = arrays[key]
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+        # The receiving process frees the block, not the one exiting first
+        resource_tracker.unregister(block._name, "shared_memory")
+        block.close()
+        return cls(block.name, layout)
+
+    def load(self) -> Dict[str, Optional[np.ndarray]]:
+        """
+        Copy the arrays out of the shared memory block and free it
+
+        Returns
+        -------
+        Dict[str, Optional[np.ndarray]]
+            Shared arrays
+        """
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            return {key: None if dtype is None
+                    else np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset).copy()
+                    for key, dtype, shape, offset in self.layout}
+        finally:
+            block.close()
+            block.unlink()
+
+    def release(self):
+        """
+        Free the shared memory block without reading it
+        """
+        try:
+            block = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+
+class SharedTrack(SharedResult):
+    """
+    Track transferred between processes (arrays in shared memory, the small
+    way points and metadata are pickled).
+    """
+
+    def __init__(self,
+                 arrays: SharedArrays,
+                 waypoints: WayPoints,
+                 name: Optional[str],
+                 path: Optional[str],
+                 signature: Optional[Tuple[int, int]] = None):
+        self.arrays: SharedArrays = arrays
+        self.waypoints: WayPoints = waypoints
+        self.name: Optional[str] = name
+        self.path: Optional[str] = path
+        self.signature: Optional[Tuple[int, int]] = signature
+
+    @classmethod
+    def fromTrack(cls, track: Track) -> "SharedTrack":
+        """
+        Copy a track to shared memory
+        """
+        arrays = SharedArrays.create({"lat": track.lat,
+                                      "lon": track.lon,
+                                      "ele": track.ele,
+                                      "time": track.time,
+                                      "segment_offsets": track.segment_offsets})
+        return cls(arrays, track.waypoints, track.name, track.path, track.signature)
+
+    def load(self) -> Track:
+        """
+        Retrieve the track (and free the shared memory)
+        """
+        arrays = self.arrays.load()
+        return Track(arrays["lat"], arrays["lon"], arrays["ele"], arrays["time"],
+                     arrays["segment_offsets"], self.waypoints, self.name, self.path, signature=self.signature)
+
+    def release(self):
+        self.arrays.release()
+
+
+#### Worker processes ####
+
+def initProcess(progress_queue, cancel_flags):
+    """
+    Initialise a worker process
+    """
+    global _progress_queue, _cancel_flags
+    _progress_queue = progress_queue
+    _cancel_flags = cancel_flags
+    logging.getLogger().setLevel(logging.ERROR)
+
+
+def processProgress(task_id: int) -> Callable[[int, int, int], None]:
+    """
+    Return a function sending the progress of a task to the parent process
+    (throttled, the completion is always sent)
+    """
+    last = [0.0]
+
+    def progress(done: int, total: int, points: int):
+        now = time.perf_counter()
+        if done < total and now - last[0] < PROCESS_PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        _progress_queue.put((task_id, done, total, points))
+    return progress
+
+
+def processCheckpoint(task_id: int) -> Callable[[], None]:
+    """
+    Return a function raising TaskCancelled once the parent process has
+    cancelled the task (the flag of the task holds its id)
+    """
+    def checkpoint():
+        if _cancel_flags[task_id % CANCEL_SLOTS] == task_id:
+            raise TaskCancelled()
+    return checkpoint
+
+
+def runTask(fn: Callable, arg, task_id: int):
+    """
+    Run a task in a worker process (fn is called with arg, a progress function
+    and a checkpoint function)
+    """
+    return fn(arg, progress=processProgress(task_id), checkpoint=processCheckpoint(task_id))
+
+
+def loadTrack(path: str,
+              progress: Optional[Callable[[int, int, int], None]] = None,
+              checkpoint: Optional[Callable[[], None]] = None) -> SharedTrack:
+    """
+    Read a GPX file in a worker process and return the track through shared memory
+
+    Parameters
+    ----------
+    path : str
+        Path to the GPX file
+    progress : Optional[Callable[[int, int, int], None]], optional
+        Progress function (see readTrack), by default None
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called before each block of the file (raises to abort reading), by default None
+
+    Returns
+    -------
+    SharedTrack
+        Track in shared memory
+    """
+    return SharedTrack.fromTrack(readTrack(path, progress, checkpoint=checkpoint))
+
+
+def releaseResult(future: Future):
+    """
+    Free the shared memory of the result of a discarded task
+    """
+    if not future.cancelled() and future.exception() is None:
+        result = future.result()
+        if isinstance(result, SharedResult):
+            result.release()
+
+
+class ProcessPool():
+    """
+    Process pool running CPU bound tasks outside of the GIL of the GUI process.
+
+    Tasks are module level functions called with one argument, a progress
+    function and a checkpoint function; the progress messages of all the
+    processes go through a single queue and are dispatched to the listener
+    registered for the task. Running tasks are cancelled through flags in
+    shared memory, checked by their checkpoint function.
+    Processes are started with "spawn" (safe with the Qt threads of the GUI
+    process) when the first task is submitted.
+    """
+
+    def __init__(self, nb_processes: Optional[int] = None):
+        """
+        Initialise ProcessPool instance
+
+        Parameters
+        ----------
+        nb_processes : Optional[int], optional
+            Number of processes, by default the number of CPUs
+        """
+        self.context = multiprocessing.get_context("spawn")
+        self.nb_processes: Optional[int] = nb_processes
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.progress_queue = None
+        self.cancel_flags = None
+        self.listeners: Dict[int, Callable[[int, int, int], None]] = {}
+        self.lock = threading.Lock()
+        self.task_ids = itertools.count()
+        self.futures: Dict[Future, int] = {} # Task id of the submitted futures
+        self.dispatcher: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Create the processes and the progress dispatcher (once)
+        """
+        with self.lock:
+            if self.executor is not None:
+                return
+            self.progress_queue = self.context.Queue()
+            self.cancel_flags = self.context.RawArray("q", [-1] * CANCEL_SLOTS)
+            self.executor = ProcessPoolExecutor(self.nb_processes,
+                                                mp_context=self.context,
+                                                initializer=initProcess,
+                                                initargs=(self.progress_queue, self.cancel_flags))
+            self.dispatcher = threading.Thread(target=self.dispatchProgress, daemon=True)
+            self.dispatcher.start()
+
+    def submit(self,
+               fn: Callable,
+               arg,
+               progress: Optional[Callable[[int, int, int], None]] = None) -> Future:
+        """
+        Run a task in a worker process
+
+        Parameters
+        ----------
+        fn : Callable
+            Module level function called with arg, a progress function and a checkpoint function
+        arg : Any
+            Picklable argument
+        progress : Optional[Callable[[int, int, int], None]], optional
+            Function receiving the progress of the task (called from the
+            dispatcher thread), by default None
+
+        Returns
+        -------
+        Future
+            Future of the task
+        """
+        self.start()
+        task_id = next(self.task_ids)
+        if progress is not None:
+            with self.lock:
+                self.listeners[task_id] = progress
+        future = self.executor.submit(runTask, fn, arg, task_id)
+        with self.lock:
+            self.futures[future] = task_id
+        future.add_done_callback(self.removeTask)
+        return future
+
+    def removeTask(self, future: Future):
+        with self.lock:
+            task_id = self.futures.pop(future, None)
+            self.listeners.pop(task_id, None)
+
+    def cancel(self, future: Future):
+        """
+        Cancel a task: pending tasks are removed from the queue, running tasks
+        stop at their next checkpoint (their result is freed if they complete anyway)
+
+        Parameters
+        ----------
+        future : Future
+            Future returned by submit
+        """
+        if future.cancel():
+            return
+        with self.lock:
+            task_id = self.futures.get(future)
+            if task_id is not None:
+                self.cancel_flags[task_id % CANCEL_SLOTS] = task_id
+        future.add_done_callback(releaseResult)
+
+    def dispatchProgress(self):
+        """
+        Forward progress messages to the listeners of the tasks (dispatcher thread)
+        """
+        while True:
+            try:
+                message = self.progress_queue.get()
+            except (EOFError, OSError, ValueError):
+                return
+            if message is None:
+                return
+            task_id, done, total, points = message
+            with self.lock:
+                listener = self.listeners.get(task_id)
+            if listener is not None:
+                listener(done, total, points)
+
+    def shutdown(self):
+        """
+        Stop the processes (pending tasks are cancelled)
+        """
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.progress_queue.put(None)
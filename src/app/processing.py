@@ -0,0 +1,520 @@
+import os
+import copy
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .algorithms import douglasPeuckerImportance, localProjection, outlierMask, visvalingamMask
+from .profiling import profileSpan
+from .track import Track
+
+if TYPE_CHECKING:
+    from ezgpx import GPX
+
+# Simplification algorithms (tolerance: maximum distance to the original
+# track for Douglas-Peucker, square root of the minimum triangle area for
+# Visvalingam-Whyatt)
+DOUGLAS_PEUCKER = "douglas-peucker"
+VISVALINGAM = "visvalingam"
+SIMPLIFICATION_METHODS = {DOUGLAS_PEUCKER: "Douglas-Peucker", VISVALINGAM: "Visvalingam-Whyatt"}
+
+# Default simplification tolerance (meters, same as GPX.simplify)
+DEFAULT_TOLERANCE = 2.0
+
+# GPS errors: maximum speed (m/s), acceleration (m/s²) and distance between
+# consecutive points without time (meters, same as GPX.remove_gps_errors)
+MAX_SPEED = 50.0
+MAX_ACCELERATION = 15.0
+MAX_JUMP = 100.0
+
+# Stages of the pre-processing pipeline modifying the points (in order)
+GPS_ERRORS_STAGE = "remove_gps_errors"
+SIMPLIFICATION_STAGE = "compress_data"
+
+# Number of stage results (ie: kept points) and of pre-processed tracks
+# cached per track
+PREPROCESSING_CACHE_SIZE = 32
+PREPROCESSED_TRACKS_CACHE_SIZE = 4
+
+# Delay (milliseconds) without settings change before the preview is updated
+# (quick changes are merged into a single update)
+PREVIEW_DELAY = 30
+
+# Size (bytes) of the time and elevation elements of a point in a GPX file
+TIME_ELEMENT_SIZE = 33
+ELEVATION_ELEMENT_SIZE = 16
+
+
+def exportPath(path: str, extension: str, suffix: str = "") -> str:
+    """
+    Build the path of an exported file next to the original file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the original file
+    extension : str
+        Extension of the exported file (ie: ".gpx", ".kml", ".csv")
+    suffix : str, optional
+        Suffix appended to the file name, by default ""
+
+    Returns
+    -------
+    str
+        Path to the exported file
+    """
+    return os.path.splitext(path)[0] + suffix + extension
+
+
+def removeGPSErrors(track: Track,
+                    indices: np.ndarray,
+                    max_speed: float = MAX_SPEED,
+                    max_acceleration: float = MAX_ACCELERATION,
+                    max_jump: float = MAX_JUMP,
+                    checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """
+    Pre-processing stage removing GPS errors (see outlierMask)
+
+    Parameters
+    ----------
+    track : Track
+        Source track (not modified)
+    indices : np.ndarray
+        Sorted indices of the input points
+    max_speed : float, optional
+        Maximum speed (m/s), by default MAX_SPEED
+    max_acceleration : float, optional
+        Maximum acceleration (m/s²), by default MAX_ACCELERATION
+    max_jump : float, optional
+        Maximum distance between consecutive points without time (meters), by default MAX_JUMP
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called between the steps (raises to abort), by default None
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of the kept points
+    """
+    keep = outlierMask(track.lat[indices], track.lon[indices],
+                       None if track.time is None else track.time[indices],
+                       np.searchsorted(indices, track.segment_offsets),
+                       max_speed, max_acceleration, max_jump, checkpoint=checkpoint)
+    return indices[keep]
+
+
+def simplificationImportance(track: Track,
+                             indices: np.ndarray,
+                             checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """
+    Douglas-Peucker importance (meters) of a subset of the points of a track
+    (segments are simplified independently)
+    """
+    x, y = localProjection(track.lat[indices], track.lon[indices])
+    return douglasPeuckerImportance(x, y, checkpoint, np.searchsorted(indices, track.segment_offsets))
+
+
+def simplifyTrack(track: Track,
+                  indices: np.ndarray,
+                  tolerance: float = DEFAULT_TOLERANCE,
+                  method: str = DOUGLAS_PEUCKER,
+                  importance: Optional[np.ndarray] = None,
+                  checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """
+    Pre-processing stage simplifying the track (in meters, segments are
+    simplified independently)
+
+    Parameters
+    ----------
+    track : Track
+        Source track (not modified)
+    indices : np.ndarray
+        Sorted indices of the input points
+    tolerance : float, optional
+        Simplification tolerance (meters), by default DEFAULT_TOLERANCE
+    method : str, optional
+        Simplification algorithm (see SIMPLIFICATION_METHODS), by default DOUGLAS_PEUCKER
+    importance : Optional[np.ndarray], optional
+        Douglas-Peucker importance of the input points (see
+        simplificationImportance), by default None (computed)
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called between the steps (raises to abort), by default None
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of the kept points
+    """
+    if method == DOUGLAS_PEUCKER:
+        if importance is None:
+            importance = simplificationImportance(track, indices, checkpoint)
+        return indices[importance > tolerance]
+    if method == VISVALINGAM:
+        x, y = localProjection(track.lat[indices], track.lon[indices])
+        segment_offsets = np.searchsorted(indices, track.segment_offsets)
+        return indices[visvalingamMask(x, y, tolerance * tolerance, segment_offsets, checkpoint)]
+    raise ValueError(f"Unknown simplification algorithm: {method}")
+
+
+class PreProcessingPipeline():
+    """
+    Non-destructive pre-processing of a track: a pipeline of pure stages over
+    the source track, which is never modified.
+
+    The stages run in a fixed order: GPS errors removal, simplification, then
+    time and elevation removal. The first two return the indices of the
+    points of the source track they keep, the last two only drop columns of
+    the output track. The output of every sequence of stages is cached by
+    the combination of enabled options (and their parameters), so toggling
+    an option, changing the tolerance or exporting again only runs the
+    stages that were never run with these settings.
+    """
+
+    def __init__(self,
+                 track: Track,
+                 max_speed: float = MAX_SPEED,
+                 max_acceleration: float = MAX_ACCELERATION,
+                 max_jump: float = MAX_JUMP,
+                 cache_size: int = PREPROCESSING_CACHE_SIZE,
+                 tracks_cache_size: int = PREPROCESSED_TRACKS_CACHE_SIZE):
+        self.track: Track = track
+        self.max_speed: float = max_speed
+        self.max_acceleration: float = max_acceleration
+        self.max_jump: float = max_jump
+        self.cache_size: int = cache_size
+        self.tracks_cache_size: int = tracks_cache_size
+        self.results: OrderedDict = OrderedDict() # Kept points of each sequence of stages (least recently used first)
+        self.importance: Dict[Tuple, np.ndarray] = {} # Douglas-Peucker importance of each simplification input
+        self.tracks: OrderedDict = OrderedDict() # Pre-processed tracks (least recently used first)
+        self.nb_computed: int = 0 # Stages run since the creation
+        self.nb_reused: int = 0 # Stages read from the cache since the creation
+        self.source_gpx: Optional["GPX"] = None # Full GPX object tree of the source file (GPX exports)
+        try:
+            self.file_size: int = os.path.getsize(track.path) if track.path is not None else 0
+        except OSError:
+            self.file_size = 0
+
+    def stages(self,
+               remove_gps_errors: bool = False,
+               compress_data: bool = False,
+               tolerance: float = DEFAULT_TOLERANCE,
+               method: str = DOUGLAS_PEUCKER) -> Tuple[Tuple, ...]:
+        """
+        Return the enabled stages modifying the points (name and parameters,
+        in the order they run)
+        """
+        if method not in SIMPLIFICATION_METHODS:
+            raise ValueError(f"Unknown simplification algorithm: {method}")
+        stages = []
+        if remove_gps_errors:
+            stages.append((GPS_ERRORS_STAGE,))
+        if compress_data:
+            stages.append((SIMPLIFICATION_STAGE, method, float(tolerance)))
+        return tuple(stages)
+
+    def runStage(self,
+                 stage: Tuple,
+                 key: Tuple,
+                 indices: np.ndarray,
+                 checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+        """
+        Run a stage on the output of the previous stages
+
+        Parameters
+        ----------
+        stage : Tuple
+            Name and parameters of the stage (see stages)
+        key : Tuple
+            Previous stages
+        indices : np.ndarray
+            Sorted indices of the points kept by the previous stages
+        checkpoint : Optional[Callable[[], None]], optional
+            Function called between the steps (raises to abort), by default None
+
+        Returns
+        -------
+        np.ndarray
+            Sorted indices of the kept points
+        """
+        name = stage[0]
+        if name == GPS_ERRORS_STAGE:
+            with profileSpan("GPS errors removal", "stage", self.track.path, len(indices)):
+                return removeGPSErrors(self.track, indices, self.max_speed, self.max_acceleration, self.max_jump,
+                                       checkpoint)
+        _, method, tolerance = stage
+        with profileSpan("Simplification", "stage", self.track.path, len(indices)):
+            # The Douglas-Peucker importance does not depend on the tolerance
+            importance = None
+            if method == DOUGLAS_PEUCKER:
+                importance = self.importance.get(key)
+                if importance is None:
+                    importance = simplificationImportance(self.track, indices, checkpoint)
+                    self.importance[key] = importance
+            return simplifyTrack(self.track, indices, tolerance, method, importance, checkpoint)
+
+    def indices(self,
+                remove_gps_errors: bool = False,
+                compress_data: bool = False,
+                tolerance: float = DEFAULT_TOLERANCE,
+                method: str = DOUGLAS_PEUCKER,
+                checkpoint: Optional[Callable[[], None]] = None) -> np.ndarray:
+        """
+        Return the indices of the points kept by the pre-processing
+
+        Parameters
+        ----------
+        remove_gps_errors : bool, optional
+            Remove GPS errors, by default False
+        compress_data : bool, optional
+            Simplify tracks, by default False
+        tolerance : float, optional
+            Simplification tolerance (meters), by default DEFAULT_TOLERANCE
+        method : str, optional
+            Simplification algorithm (see SIMPLIFICATION_METHODS), by default DOUGLAS_PEUCKER
+        checkpoint : Optional[Callable[[], None]], optional
+            Function called between the steps (raises to abort), by default None
+
+        Returns
+        -------
+        np.ndarray
+            Sorted indices of the kept points (read-only, shared by the cache)
+        """
+        key = ()
+        indices = np.arange(len(self.track))
+        for stage in self.stages(remove_gps_errors, compress_data, tolerance, method):
+            stage_key = key + (stage,)
+            result = self.results.get(stage_key)
+            if result is None:
+                result = self.runStage(stage, key, indices, checkpoint)
+                result.flags.writeable = False
+                self.results[stage_key] = result
+                while len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+                self.nb_computed += 1
+            else:
+                self.results.move_to_end(stage_key)
+                self.nb_reused += 1
+            key, indices = stage_key, result
+        return indices
+
+    def precompute(self, checkpoint: Optional[Callable[[], None]] = None):
+        """
+        Run the slowest stages ahead of time (GPS errors removal and
+        Douglas-Peucker importance with and without GPS errors), so that
+        toggling an option afterwards only reads the cache
+        """
+        for remove_gps_errors in (False, True):
+            self.indices(remove_gps_errors, True, DEFAULT_TOLERANCE, DOUGLAS_PEUCKER, checkpoint)
+
+    def process(self,
+                remove_gps_errors: bool = False,
+                remove_time: bool = False,
+                remove_elevation: bool = False,
+                compress_data: bool = False,
+                tolerance: float = DEFAULT_TOLERANCE,
+                method: str = DOUGLAS_PEUCKER,
+                checkpoint: Optional[Callable[[], None]] = None) -> Track:
+        """
+        Return the pre-processed track (see indices for the parameters, the
+        track is cached and must not be modified)
+        """
+        key = (self.stages(remove_gps_errors, compress_data, tolerance, method),
+               remove_time and self.track.time is not None,
+               remove_elevation and self.track.ele is not None)
+        if key == ((), False, False):
+            return self.track
+        track = self.tracks.get(key)
+        if track is not None:
+            self.tracks.move_to_end(key)
+            return track
+        indices = self.indices(remove_gps_errors, compress_data, tolerance, method, checkpoint)
+        track = self.track.select(indices, elevation=not remove_elevation, time=not remove_time)
+        self.tracks[key] = track
+        while len(self.tracks) > self.tracks_cache_size:
+            self.tracks.popitem(last=False)
+        return track
+
+    def gpx(self) -> "GPX":
+        """
+        Return the full GPX object tree of the source file (parsed once, it
+        is never modified, see writePreProcessedGPX)
+        """
+        if self.source_gpx is None:
+            with profileSpan("GPX object tree", "stage", self.track.path, len(self.track)):
+                self.source_gpx = self.track.gpx()
+        return self.source_gpx
+
+    def estimateSize(self, nb_points: int, remove_time: bool = False, remove_elevation: bool = False) -> int:
+        """
+        Estimate the size (bytes) of the exported GPX file
+
+        Parameters
+        ----------
+        nb_points : int
+            Number of kept points
+        remove_time : bool, optional
+            Whether the time is removed, by default False
+        remove_elevation : bool, optional
+            Whether the elevation is removed, by default False
+
+        Returns
+        -------
+        int
+            Estimated size (proportional to the number of points of the source file)
+        """
+        if not len(self.track):
+            return self.file_size
+        point_size = self.file_size / len(self.track)
+        if remove_time and self.track.time is not None:
+            point_size -= TIME_ELEMENT_SIZE
+        if remove_elevation and self.track.ele is not None:
+            point_size -= ELEVATION_ELEMENT_SIZE
+        return int(max(point_size, 0) * nb_points)
+
+    def preview(self,
+                remove_gps_errors: bool = False,
+                remove_time: bool = False,
+                remove_elevation: bool = False,
+                compress_data: bool = False,
+                tolerance: float = DEFAULT_TOLERANCE,
+                method: str = DOUGLAS_PEUCKER,
+                checkpoint: Optional[Callable[[], None]] = None) -> Tuple[int, int]:
+        """
+        Return the number of kept points and the estimated size (bytes) of
+        the exported GPX file (see indices for the parameters)
+        """
+        nb_points = len(self.indices(remove_gps_errors, compress_data, tolerance, method, checkpoint))
+        return nb_points, self.estimateSize(nb_points, remove_time, remove_elevation)
+
+
+class PreProcessedExport():
+    """
+    Pre-processing result of one export, shared by the pre-processing worker
+    (which fills it) and the export worker depending on it, so an export
+    never reads the state of a newer selection.
+    """
+
+    def __init__(self,
+                 track: Track,
+                 pipeline: Optional[PreProcessingPipeline] = None,
+                 settings: Optional[Dict] = None,
+                 build_tree: bool = False):
+        """
+        Initialise PreProcessedExport instance
+
+        Parameters
+        ----------
+        track : Track
+            Source track
+        pipeline : Optional[PreProcessingPipeline], optional
+            Pre-processing of the track, by default None (no pre-processing)
+        settings : Optional[Dict], optional
+            Pre-processing settings at the time of the export, by default None
+        build_tree : bool, optional
+            Whether the GPX object tree is needed (GPX export), by default False
+        """
+        self.track: Track = track
+        self.pipeline: Optional[PreProcessingPipeline] = pipeline
+        self.settings: Dict = settings if settings is not None else {}
+        self.build_tree: bool = build_tree
+        self.indices: Optional[np.ndarray] = None # Points kept by the pre-processing (GPX export)
+        self.processed_track: Optional[Track] = None # Pre-processed track (KML and CSV exports)
+        self.gpx: Optional["GPX"] = None # Full GPX object tree of the source file (GPX export, never modified)
+
+    def exportTrack(self) -> Track:
+        """
+        Return the track to export (pre-processed track if it has been built)
+        """
+        return self.processed_track if self.processed_track is not None else self.track
+
+
+def selectedGPXPoints(gpx: "GPX", indices: np.ndarray) -> List[List]:
+    """
+    Return a subset of the track points of a GPX object (not modified)
+
+    Parameters
+    ----------
+    gpx : GPX
+        GPX object
+    indices : np.ndarray
+        Sorted indices of the kept points (in the order of the tracks and
+        segments, see Track.fromGPX)
+
+    Returns
+    -------
+    List[List]
+        Kept points of each segment
+    """
+    segments = [segment for track in gpx.gpx.tracks for segment in track.trkseg]
+    keep = np.zeros(sum(len(segment.trkpt) for segment in segments), dtype=bool)
+    keep[indices] = True
+    points = []
+    start = 0
+    for segment in segments:
+        end = start + len(segment.trkpt)
+        points.append([point for point, kept in zip(segment.trkpt, keep[start:end].tolist()) if kept])
+        start = end
+    return points
+
+
+def writePreProcessedGPX(gpx: "GPX",
+                         path: str,
+                         indices: Optional[np.ndarray] = None,
+                         remove_metadata: bool = False,
+                         remove_time: bool = False,
+                         remove_elevation: bool = False) -> bool:
+    """
+    Write a pre-processed GPX file without modifying the GPX object (the
+    kept points and the metadata option are only set while writing, so the
+    same object tree can be exported again with other settings)
+
+    Parameters
+    ----------
+    gpx : GPX
+        Source GPX object
+    path : str
+        Path to the new GPX file
+    indices : Optional[np.ndarray], optional
+        Sorted indices of the kept points (see PreProcessingPipeline.indices),
+        by default None (all the points)
+    remove_metadata : bool, optional
+        Remove metadata, by default False
+    remove_time : bool, optional
+        Remove time data, by default False
+    remove_elevation : bool, optional
+        Remove elevation data, by default False
+
+    Returns
+    -------
+    bool
+        False if the written file does not follow the GPX schema (see GPX.to_gpx)
+    """
+    segments = [segment for track in gpx.gpx.tracks for segment in track.trkseg]
+    source_points = [segment.trkpt for segment in segments]
+    points = source_points
+    if indices is not None and len(indices) != sum(len(segment_points) for segment_points in points):
+        points = selectedGPXPoints(gpx, indices)
+
+    # The GPX writer ignores its elevation and time options: the kept points
+    # are written as copies without these elements
+    if remove_time or remove_elevation:
+        points = [[copy.copy(point) for point in segment_points] for segment_points in points]
+        for segment_points in points:
+            for point in segment_points:
+                if remove_time:
+                    point.time = None
+                if remove_elevation:
+                    point.ele = None
+
+    writer = gpx.gpx_writer
+    metadata = writer.metadata
+    try:
+        for segment, segment_points in zip(segments, points):
+            segment.trkpt = segment_points
+        writer.metadata = not remove_metadata
+        return gpx.to_gpx(path)
+    finally:
+        for segment, segment_points in zip(segments, source_points):
+            segment.trkpt = segment_points
+        writer.metadata = metadata
+
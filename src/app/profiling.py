@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+# Maximum number of timing spans kept (the oldest ones are dropped)
+PROFILER_CAPACITY = 10_000
+
+# Delay (milliseconds) between two updates of the Performance tab
+PROFILER_REFRESH_INTERVAL = 500
+
+
+class Span():
+    """
+    Timing of one stage (ie: worker, parsing, dataframe, drawing, export).
+    """
+    __slots__ = ("name", "category", "start", "duration", "thread_id", "thread_name", "file_size", "points")
+
+    def __init__(self,
+                 name: str,
+                 category: str,
+                 file_size: Optional[int] = None,
+                 points: Optional[int] = None):
+        thread = threading.current_thread()
+        self.name: str = name
+        self.category: str = category
+        self.start: float = 0.0 # time.perf_counter() at the beginning of the stage
+        self.duration: float = 0.0 # Seconds
+        self.thread_id: int = thread.ident
+        self.thread_name: str = thread.name
+        self.file_size: Optional[int] = file_size # Bytes
+        self.points: Optional[int] = points # Number of track points (can be set during the stage)
+
+
+class SpanContext():
+    """
+    Context manager measuring a span and recording it in a profiler.
+    """
+    __slots__ = ("profiler", "span")
+
+    def __init__(self, profiler: "Profiler", span: Span):
+        self.profiler: Profiler = profiler
+        self.span: Span = span
+
+    def __enter__(self) -> Span:
+        self.span.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc_info):
+        self.span.duration = time.perf_counter() - self.span.start
+        self.profiler.record(self.span)
+        return False
+
+
+class NullSpanContext():
+    """
+    Context manager doing nothing (returned when profiling is off, so the
+    instrumented code only pays for a function call).
+    """
+    __slots__ = ("span",)
+
+    def __init__(self):
+        self.span = Span("", "") # Attributes set by the stage are ignored
+
+    def __enter__(self) -> Span:
+        return self.span
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN_CONTEXT = NullSpanContext()
+
+
+class Profiler():
+    """
+    Thread-safe ring buffer of timing spans.
+
+    Stages are measured with `with profiler.span(name, category, path, points) as span:`
+    (the stage can set span.points once the number of points is known).
+    Nothing is measured while the profiler is disabled.
+    """
+
+    def __init__(self, capacity: int = PROFILER_CAPACITY):
+        self.enabled: bool = False
+        self.spans: deque = deque(maxlen=capacity)
+        self.nb_recorded: int = 0 # Spans recorded since the creation (to detect new spans)
+        self.origin: float = time.perf_counter() # Time origin of the exported traces
+        self.lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.spans.maxlen
+
+    def setEnabled(self, enabled: bool):
+        """
+        Start or stop recording spans
+        """
+        self.enabled = enabled
+
+    def span(self,
+             name: str,
+             category: str = "stage",
+             path: Optional[str] = None,
+             points: Optional[int] = None):
+        """
+        Return a context manager measuring a stage
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage
+        category : str, optional
+            Category of the stage, by default "stage"
+        path : Optional[str], optional
+            File processed by the stage (its size is recorded), by default None
+        points : Optional[int], optional
+            Number of track points processed by the stage, by default None
+
+        Returns
+        -------
+        SpanContext
+            Context manager returning the span
+        """
+        if not self.enabled:
+            return NULL_SPAN_CONTEXT
+        file_size = None
+        if path is not None:
+            try:
+                file_size = os.path.getsize(path)
+            except OSError:
+                pass
+        return SpanContext(self, Span(name, category, file_size, points))
+
+    def record(self, span: Span):
+        """
+        Add a measured span to the ring buffer
+        """
+        with self.lock:
+            self.spans.append(span)
+            self.nb_recorded += 1
+
+    def snapshot(self) -> List[Span]:
+        """
+        Return the recorded spans (oldest first)
+        """
+        with self.lock:
+            return list(self.spans)
+
+    def clear(self):
+        """
+        Remove the recorded spans
+        """
+        with self.lock:
+            self.spans.clear()
+            self.nb_recorded += 1
+
+    def chromeTrace(self) -> Dict:
+        """
+        Convert the recorded spans to the Chrome trace event format
+        (chrome://tracing, Perfetto)
+
+        Returns
+        -------
+        Dict
+            Trace (complete events, timestamps in microseconds)
+        """
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in self.snapshot():
+            threads[span.thread_id] = span.thread_name
+            args = {}
+            if span.file_size is not None:
+                args["file_size"] = span.file_size
+            if span.points is not None:
+                args["points"] = span.points
+            events.append({"name": span.name,
+                           "cat": span.category,
+                           "ph": "X",
+                           "ts": (span.start - self.origin) * 1e6,
+                           "dur": span.duration * 1e6,
+                           "pid": pid,
+                           "tid": span.thread_id,
+                           "args": args})
+        for thread_id, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def exportChromeTrace(self, path: str) -> int:
+        """
+        Write the recorded spans to a Chrome trace file (JSON)
+
+        Parameters
+        ----------
+        path : str
+            Path to the trace file
+
+        Returns
+        -------
+        int
+            Number of exported spans
+        """
+        trace = self.chromeTrace()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(trace, file)
+        return sum(1 for event in trace["traceEvents"] if event["ph"] == "X")
+
+
+# Profiler of the application (shared by the workers and the GUI)
+profiler = Profiler()
+
+
+def profileSpan(name: str,
+                category: str = "stage",
+                path: Optional[str] = None,
+                points: Optional[int] = None):
+    """
+    Measure a stage with the profiler of the application (see Profiler.span)
+    """
+    return profiler.span(name, category, path, points)
@@ -0,0 +1,442 @@
+import os
+from typing import Callable, Dict, Iterator, List, Optional
+from xml.parsers import expat
+
+import numpy as np
+
+from .cache import fileSignature
+from .metrics import NAT, haversineDistances
+from .track import Track, WayPoints
+
+# Number of track points per chunk
+CHUNK_SIZE = 65536
+
+# Number of bytes read from the file at once
+BLOCK_SIZE = 1024 * 1024
+
+# Margin on the number of track points extrapolated from the bytes read
+CAPACITY_MARGIN = 1.05
+
+
+def parseTimes(strings: List[Optional[str]]) -> np.ndarray:
+    """
+    Parse ISO 8601 time strings (naive times are UTC, like in ezgpx)
+
+    Parameters
+    ----------
+    strings : List[Optional[str]]
+        Time strings (None if missing)
+
+    Returns
+    -------
+    np.ndarray
+        UTC epoch nanoseconds (int64, NAT if missing or invalid)
+    """
+    if len(strings) == 0:
+        return np.zeros(0, dtype=np.int64)
+    import pandas as pd
+    times = pd.to_datetime(strings, utc=True, format="ISO8601", errors="coerce")
+    return np.asarray(times.as_unit("ns").asi8, dtype=np.int64)
+
+
+class TrackChunk():
+    """
+    Consecutive track points read from a GPX file (structure of arrays).
+    """
+    __slots__ = ("lat", "lon", "ele", "time", "offset", "segment_starts", "position", "size")
+
+    def __init__(self,
+                 lat: np.ndarray,
+                 lon: np.ndarray,
+                 ele: np.ndarray,
+                 time: np.ndarray,
+                 offset: int,
+                 segment_starts: np.ndarray,
+                 position: int,
+                 size: int):
+        """
+        Initialise TrackChunk instance
+
+        Parameters
+        ----------
+        lat : np.ndarray
+            Latitude of the points
+        lon : np.ndarray
+            Longitude of the points
+        ele : np.ndarray
+            Elevation of the points (NaN if missing)
+        time : np.ndarray
+            Time of the points (UTC epoch nanoseconds, NAT if missing)
+        offset : int
+            Index of the first point of the chunk in the file
+        segment_starts : np.ndarray
+            Index (in the file) of the first point of the segments starting in the chunk
+        position : int
+            Number of bytes of the file read when the chunk was completed
+        size : int
+            Size (bytes) of the file
+        """
+        self.lat: np.ndarray = lat
+        self.lon: np.ndarray = lon
+        self.ele: np.ndarray = ele
+        self.time: np.ndarray = time
+        self.offset: int = offset
+        self.segment_starts: np.ndarray = segment_starts
+        self.position: int = position
+        self.size: int = size
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+
+class GPXReader():
+    """
+    Streaming GPX reader.
+
+    The file is fed block by block to an incremental (expat) XML parser and
+    track points are accumulated in flat lists that are converted to fixed
+    size array chunks, so no document tree is ever built and memory usage
+    only depends on the chunk size. Way points and the track name are kept
+    (they are small) and available once the file has been read.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, block_size: int = BLOCK_SIZE):
+        """
+        Initialise GPXReader instance
+
+        Parameters
+        ----------
+        path : str
+            Path to the GPX file
+        chunk_size : int, optional
+            Number of track points per chunk, by default CHUNK_SIZE
+        block_size : int, optional
+            Number of bytes read from the file at once, by default BLOCK_SIZE
+        """
+        self.path: str = path
+        self.chunk_size: int = max(1, int(chunk_size))
+        self.block_size: int = max(1, int(block_size))
+        self.size: int = os.path.getsize(path)
+        self.position: int = 0
+        self.name: Optional[str] = None
+
+        # Pending track points (not yet converted to a chunk)
+        self.lat: List[float] = []
+        self.lon: List[float] = []
+        self.ele: List[float] = []
+        self.time: List[Optional[str]] = []
+        self.segment_starts: List[int] = []
+        self.offset: int = 0 # Index of the first pending point
+        self.nb_complete: int = 0 # Number of pending points whose element is closed
+
+        # Way points
+        self.wpt_lat: List[float] = []
+        self.wpt_lon: List[float] = []
+        self.wpt_ele: List[float] = []
+        self.wpt_names: List[str] = []
+
+        # Parser state
+        self.stack: List[str] = []
+        self.text: Optional[List[str]] = None
+
+    #### Parser callbacks ####
+
+    def onStartElement(self, name: str, attributes: Dict[str, str]):
+        tag = name.rsplit(" ", 1)[-1]
+        if tag == "trkpt":
+            self.lat.append(float(attributes["lat"]))
+            self.lon.append(float(attributes["lon"]))
+            self.ele.append(np.nan)
+            self.time.append(None)
+        elif tag == "trkseg":
+            self.segment_starts.append(self.offset + len(self.lat))
+        elif tag == "wpt":
+            self.wpt_lat.append(float(attributes["lat"]))
+            self.wpt_lon.append(float(attributes["lon"]))
+            self.wpt_ele.append(np.nan)
+            self.wpt_names.append("")
+        elif tag in ("ele", "time", "name"):
+            self.text = []
+        self.stack.append(tag)
+
+    def onCharacterData(self, data: str):
+        if self.text is not None:
+            self.text.append(data)
+
+    def onEndElement(self, name: str):
+        tag = self.stack.pop()
+        parent = self.stack[-1] if self.stack else None
+        if tag == "trkpt":
+            self.nb_complete += 1
+        elif self.text is not None:
+            text = "".join(self.text).strip()
+            self.text = None
+            if parent == "trkpt":
+                if tag == "ele" and text:
+                    self.ele[-1] = float(text)
+                elif tag == "time" and text:
+                    self.time[-1] = text
+            elif parent == "wpt":
+                if tag == "ele" and text:
+                    self.wpt_ele[-1] = float(text)
+                elif tag == "name":
+                    self.wpt_names[-1] = text
+            elif parent == "trk" and tag == "name" and self.name is None:
+                self.name = text
+
+    #### Reading ####
+
+    def flush(self, nb_points: int) -> TrackChunk:
+        """
+        Convert the first pending track points to a chunk
+
+        Parameters
+        ----------
+        nb_points : int
+            Number of points in the chunk
+
+        Returns
+        -------
+        TrackChunk
+            Chunk of track points
+        """
+        end = self.offset + nb_points
+        nb_starts = len(self.segment_starts)
+        if nb_points < len(self.lat):
+            nb_starts = int(np.searchsorted(self.segment_starts, end, side="left"))
+        chunk = TrackChunk(np.array(self.lat[:nb_points], dtype=np.float64),
+                           np.array(self.lon[:nb_points], dtype=np.float64),
+                           np.array(self.ele[:nb_points], dtype=np.float64),
+                           parseTimes(self.time[:nb_points]),
+                           self.offset,
+                           np.array(self.segment_starts[:nb_starts], dtype=np.int64),
+                           self.position,
+                           self.size)
+        del self.lat[:nb_points], self.lon[:nb_points], self.ele[:nb_points], self.time[:nb_points]
+        del self.segment_starts[:nb_starts]
+        self.offset = end
+        self.nb_complete -= nb_points
+        return chunk
+
+    def chunks(self,
+               progress: Optional[Callable[[int, int, int], None]] = None,
+               checkpoint: Optional[Callable[[], None]] = None) -> Iterator[TrackChunk]:
+        """
+        Read the file and yield its track points by chunks
+
+        Parameters
+        ----------
+        progress : Optional[Callable[[int, int, int], None]], optional
+            Function called after each block with the number of bytes read,
+            the size of the file and the number of track points read, by default None
+        checkpoint : Optional[Callable[[], None]], optional
+            Function called before each block (raises to abort reading), by default None
+
+        Returns
+        -------
+        Iterator[TrackChunk]
+            Chunks of chunk_size track points (the last one can be smaller)
+        """
+        parser = expat.ParserCreate(namespace_separator=" ")
+        parser.buffer_text = True
+        parser.StartElementHandler = self.onStartElement
+        parser.EndElementHandler = self.onEndElement
+        parser.CharacterDataHandler = self.onCharacterData
+
+        with open(self.path, "rb") as file:
+            while True:
+                if checkpoint is not None:
+                    checkpoint()
+                block = file.read(self.block_size)
+                parser.Parse(block, not block)
+                self.position = file.tell()
+                while self.nb_complete >= self.chunk_size:
+                    yield self.flush(self.chunk_size)
+                if progress is not None:
+                    progress(self.position, self.size, self.offset + len(self.lat))
+                if not block:
+                    break
+
+        if self.nb_complete or self.segment_starts:
+            yield self.flush(self.nb_complete)
+
+    def waypoints(self) -> WayPoints:
+        """
+        Return the way points of the file (once it has been read)
+        """
+        return WayPoints(np.array(self.wpt_lat, dtype=np.float64),
+                         np.array(self.wpt_lon, dtype=np.float64),
+                         np.array(self.wpt_ele, dtype=np.float64),
+                         list(self.wpt_names))
+
+
+def readTrack(path: str,
+              progress: Optional[Callable[[int, int, int], None]] = None,
+              chunk_size: int = CHUNK_SIZE,
+              checkpoint: Optional[Callable[[], None]] = None) -> Track:
+    """
+    Read a GPX file into a compact track without building the document tree
+
+    Parameters
+    ----------
+    path : str
+        Path to the GPX file
+    progress : Optional[Callable[[int, int, int], None]], optional
+        Function called with the number of bytes read, the size of the file
+        and the number of track points read, by default None
+    chunk_size : int, optional
+        Number of track points per chunk, by default CHUNK_SIZE
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called regularly while reading (raises to abort reading), by default None
+
+    Returns
+    -------
+    Track
+        Track containing the points of every track and segment of the file
+    """
+    # Taken first: a file modified while it is read does not match the track
+    signature = fileSignature(path)
+    reader = GPXReader(path, chunk_size)
+
+    # Chunks are copied into columns grown in place (no chunk is kept alive):
+    # the capacity is extrapolated from the bytes read so far (at least doubled
+    # when the estimate falls short) and trimmed to the number of points at the end
+    columns = {"lat": np.empty(0, dtype=np.float64),
+               "lon": np.empty(0, dtype=np.float64),
+               "ele": np.empty(0, dtype=np.float64),
+               "time": np.empty(0, dtype=np.int64)}
+    segment_starts = []
+    nb_points = 0
+    for chunk in reader.chunks(progress, checkpoint):
+        end = nb_points + len(chunk.lat)
+        capacity = len(columns["lat"])
+        if end > capacity:
+            estimate = int(end * chunk.size / max(chunk.position, 1) * CAPACITY_MARGIN)
+            capacity = max(end, estimate) if estimate > capacity else max(end, 2 * capacity)
+            for column in columns.values():
+                column.resize(capacity, refcheck=False)
+        for name, column in columns.items():
+            column[nb_points:end] = getattr(chunk, name)
+        segment_starts.append(chunk.segment_starts)
+        nb_points = end
+    for column in columns.values():
+        column.resize(nb_points, refcheck=False)
+    lat, lon, ele, time = columns["lat"], columns["lon"], columns["ele"], columns["time"]
+    segment_offsets = np.concatenate(segment_starts + [[nb_points]]).astype(np.int64)
+
+    # Optional data
+    if np.isnan(ele).all():
+        ele = None
+    if (time == NAT).all():
+        time = None
+
+    return Track(lat, lon, ele, time, segment_offsets, reader.waypoints(), reader.name, path, signature=signature)
+
+
+class TrackSummary():
+    """
+    Summary statistics of a track accumulated chunk by chunk (see summarizeGPX).
+    """
+
+    def __init__(self):
+        self.nb_points: int = 0
+        self.nb_segments: int = 0
+        self.min_lat: Optional[float] = None
+        self.min_lon: Optional[float] = None
+        self.max_lat: Optional[float] = None
+        self.max_lon: Optional[float] = None
+        self.distance: float = 0.0
+        self.ascent: float = 0.0
+        self.descent: float = 0.0
+        self.start_time: Optional[int] = None
+        self.end_time: Optional[int] = None
+        # Last point of the previous chunk
+        self.last_lat: Optional[float] = None
+        self.last_lon: Optional[float] = None
+        self.last_ele: Optional[float] = None
+
+    def update(self, chunk: TrackChunk):
+        """
+        Add the points of the next chunk
+
+        Parameters
+        ----------
+        chunk : TrackChunk
+            Chunk of track points (chunks must be added in file order)
+        """
+        self.nb_segments += len(chunk.segment_starts)
+        if len(chunk) == 0:
+            return
+        self.nb_points += len(chunk)
+
+        # Bounds
+        self.min_lat = float(chunk.lat.min()) if self.min_lat is None else min(self.min_lat, float(chunk.lat.min()))
+        self.min_lon = float(chunk.lon.min()) if self.min_lon is None else min(self.min_lon, float(chunk.lon.min()))
+        self.max_lat = float(chunk.lat.max()) if self.max_lat is None else max(self.max_lat, float(chunk.lat.max()))
+        self.max_lon = float(chunk.lon.max()) if self.max_lon is None else max(self.max_lon, float(chunk.lon.max()))
+
+        # Distance and elevation (the previous point is carried across chunks)
+        lat = chunk.lat if self.last_lat is None else np.concatenate(([self.last_lat], chunk.lat))
+        lon = chunk.lon if self.last_lon is None else np.concatenate(([self.last_lon], chunk.lon))
+        self.distance += float(haversineDistances(lat, lon).sum())
+        ele = chunk.ele if self.last_ele is None else np.concatenate(([self.last_ele], chunk.ele))
+        delta = np.diff(ele)
+        delta = delta[np.isfinite(delta)]
+        self.ascent += float(delta[delta > 0].sum())
+        self.descent -= float(delta[delta < 0].sum())
+        self.last_lat, self.last_lon, self.last_ele = chunk.lat[-1], chunk.lon[-1], chunk.ele[-1]
+
+        # Time
+        time = chunk.time[chunk.time != NAT]
+        if len(time):
+            self.start_time = int(time.min()) if self.start_time is None else min(self.start_time, int(time.min()))
+            self.end_time = int(time.max()) if self.end_time is None else max(self.end_time, int(time.max()))
+
+    def asDict(self) -> Dict[str, Optional[float]]:
+        """
+        Return the summary (see summarizeGPX)
+        """
+        return {
+            "nb_points": self.nb_points,
+            "nb_segments": self.nb_segments,
+            "min_lat": self.min_lat,
+            "min_lon": self.min_lon,
+            "max_lat": self.max_lat,
+            "max_lon": self.max_lon,
+            "distance": self.distance,
+            "ascent": self.ascent,
+            "descent": self.descent,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": None if self.start_time is None else (self.end_time - self.start_time) / 1e9
+        }
+
+
+def summarizeGPX(path: str,
+                 progress: Optional[Callable[[int, int, int], None]] = None,
+                 chunk_size: int = CHUNK_SIZE) -> Dict[str, Optional[float]]:
+    """
+    Compute summary statistics of a GPX file in a single streaming pass
+    (only one chunk of track points is in memory at a time)
+
+    Parameters
+    ----------
+    path : str
+        Path to the GPX file
+    progress : Optional[Callable[[int, int, int], None]], optional
+        Function called with the number of bytes read, the size of the file
+        and the number of track points read, by default None
+    chunk_size : int, optional
+        Number of track points per chunk, by default CHUNK_SIZE
+
+    Returns
+    -------
+    Dict[str, Optional[float]]
+        Number of points and segments, bounds, distance (meters), ascent and
+        descent (meters), start and end time (UTC epoch nanoseconds) and
+        duration (seconds), None when not available
+    """
+    summary = TrackSummary()
+    for chunk in GPXReader(path, chunk_size).chunks(progress):
+        summary.update(chunk)
+    return summary.asDict()
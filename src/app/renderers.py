@@ -0,0 +1,464 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .algorithms import douglasPeuckerImportance
+from .profiling import profileSpan
+
+# matplotlib, basemap and pandas are imported on first use (slow imports, not needed at startup)
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib.axes import Axes
+    from matplotlib.collections import PathCollection
+    from mpl_toolkits.basemap import Basemap
+
+# Maximum distance (pixels) between the drawn track and the original track
+PIXEL_TOLERANCE = 0.5
+
+# Size of the cells (pixels) used to thin dense areas (about the radius of a marker)
+PIXEL_CELL_SIZE = 2.0
+
+# Maximum number of levels in the pyramid
+MAX_LEVELS = 40
+
+# Columns that can be used to color the track points
+COLOR_COLUMNS = ["ele", "speed", "pace", "vertical_drop", "ascent_rate", "ascent_speed"]
+
+# Colormap of the overlaid tracks (evenly spaced hues beyond its number of colors)
+OVERLAY_COLORMAP = "tab10"
+
+# Number of vertices of the markers of the overlaid tracks
+OVERLAY_MARKER_VERTICES = 12
+
+
+@lru_cache(maxsize=16)
+def projection(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> "Basemap":
+    """
+    Create the map projection for the given bounds (cached for each set of bounds).
+    No boundary data (coastlines...) is loaded as it is never drawn.
+
+    Parameters
+    ----------
+    min_lat : float
+        Minimum latitude
+    min_lon : float
+        Minimum longitude
+    max_lat : float
+        Maximum latitude
+    max_lon : float
+        Maximum longitude
+
+    Returns
+    -------
+    Basemap
+        Map projection
+    """
+    from mpl_toolkits.basemap import Basemap
+    return Basemap(projection="cyl",
+                   llcrnrlon=min_lon,
+                   llcrnrlat=min_lat,
+                   urcrnrlon=max_lon,
+                   urcrnrlat=max_lat,
+                   resolution=None)
+
+
+def mergeBounds(bounds: Iterable[Tuple[float, float, float, float]]) -> Tuple[float, float, float, float]:
+    """
+    Compute the bounding box of several tracks
+
+    Parameters
+    ----------
+    bounds : Iterable[Tuple[float, float, float, float]]
+        Min latitude, min longitude, max latitude, max longitude of each track
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        Min latitude, min longitude, max latitude, max longitude of all the tracks
+    """
+    min_lats, min_lons, max_lats, max_lons = zip(*bounds)
+    return min(min_lats), min(min_lons), max(max_lats), max(max_lons)
+
+
+def overlayColors(nb_tracks: int) -> List[str]:
+    """
+    Return one distinct color per overlaid track
+
+    Parameters
+    ----------
+    nb_tracks : int
+        Number of tracks
+
+    Returns
+    -------
+    List[str]
+        Hexadecimal colors
+    """
+    from matplotlib import colormaps
+    from matplotlib.colors import to_hex
+    colormap = colormaps[OVERLAY_COLORMAP]
+    if nb_tracks > colormap.N:
+        colormap = colormaps["hsv"].resampled(nb_tracks + 1)
+    return [to_hex(colormap(i)) for i in range(nb_tracks)]
+
+
+class RenderData():
+    """
+    Ready to plot track data (computed by a worker, swapped into the plot by the GUI thread).
+    """
+    __slots__ = ("path", "x", "y", "values", "importance", "limits", "anchor")
+
+    def __init__(self,
+                 path: str,
+                 x: np.ndarray,
+                 y: np.ndarray,
+                 values: Optional[np.ndarray],
+                 importance: np.ndarray,
+                 limits: Tuple[float, float, float, float],
+                 anchor: str = "C"):
+        self.path: str = path
+        self.x: np.ndarray = x
+        self.y: np.ndarray = y
+        self.values: Optional[np.ndarray] = values
+        self.importance: np.ndarray = importance
+        self.limits: Tuple[float, float, float, float] = limits
+        self.anchor: str = anchor
+
+
+def prepareRender(path: str,
+                  dataframe: "pd.DataFrame",
+                  bounds: Tuple[float, float, float, float],
+                  color: str,
+                  checkpoint: Optional[Callable[[], None]] = None) -> RenderData:
+    """
+    Compute everything needed to plot a track (projection, projected
+    coordinates, colors and level of detail importance)
+
+    Parameters
+    ----------
+    path : str
+        Path to the GPX file
+    dataframe : pd.DataFrame
+        Dataframe containing data from the GPX file
+    bounds : Tuple[float, float, float, float]
+        Min latitude, min longitude, max latitude, max longitude of the track
+    color : str
+        Color of the points or name of the column used to color them
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called between the steps (raises to abort), by default None
+
+    Returns
+    -------
+    RenderData
+        Ready to plot track data
+    """
+    # Compute track boundaries and default offset
+    min_lat, min_lon, max_lat, max_lon = bounds
+    delta_max = max(max_lat - min_lat, max_lon - min_lon)
+    offset = delta_max * 0.04
+    min_lat, min_lon = max(0, min_lat - offset), max(0, min_lon - offset)
+    max_lat, max_lon = min(max_lat + offset, 90),  min(max_lon + offset, 180)
+
+    # Create map (projection is cached for each set of bounds)
+    with profileSpan("Basemap", "render", path):
+        map = projection(min_lat, min_lon, max_lat, max_lon)
+    # Basemap tiles are drawn by the tile renderer of the canvas (offline MBTiles files, see tiles.py)
+
+    # Project track points
+    with profileSpan("Projection", "render", path, len(dataframe)):
+        x, y = map(dataframe["lon"].to_numpy(), dataframe["lat"].to_numpy())
+        x = np.ascontiguousarray(x, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+    values = None
+    if color in COLOR_COLUMNS and color in dataframe:
+        values = dataframe[color].to_numpy(dtype=np.float64)
+    if checkpoint is not None:
+        checkpoint()
+
+    with profileSpan("Level of detail", "render", path, len(x)):
+        importance = douglasPeuckerImportance(x, y, checkpoint)
+
+    return RenderData(path,
+                      x,
+                      y,
+                      values,
+                      importance,
+                      (map.llcrnrx, map.urcrnrx, map.llcrnry, map.urcrnry),
+                      map.anchor)
+
+
+class LODTrackRenderer():
+    """
+    Level of detail renderer for track scatter plots.
+
+    Decimated versions of the track are computed at increasing resolutions
+    (each level halves the tolerance of the previous one). A level keeps the
+    points selected by the Ramer-Douglas-Peucker algorithm for its tolerance
+    (shape of the track) and one point per occupied grid cell (continuity of
+    the markers). When the view changes, only the points of the coarsest level
+    matching the pixel density that are inside the view are drawn, so the
+    number of drawn points depends on the size of the canvas, not on the
+    length of the track.
+    """
+
+    def __init__(self,
+                 axes: "Axes",
+                 collection: "PathCollection",
+                 x: Optional[np.ndarray] = None,
+                 y: Optional[np.ndarray] = None,
+                 values: Optional[np.ndarray] = None):
+        """
+        Initialise the renderer and attach it to the axes
+
+        Parameters
+        ----------
+        axes : Axes
+            Axes containing the track
+        collection : PathCollection
+            Scatter plot of the track (offsets are updated by the renderer)
+        x : Optional[np.ndarray], optional
+            Abscissa of the track points (projected), by default None
+        y : Optional[np.ndarray], optional
+            Ordinate of the track points (projected), by default None
+        values : Optional[np.ndarray], optional
+            Values used to color the points, by default None
+        """
+        self.axes: "Axes" = axes
+        self.collection: "PathCollection" = collection
+        self.nb_drawn_points: int = 0
+
+        # Update the drawn points when the view changes
+        self.callbacks = [
+            self.axes.callbacks.connect("xlim_changed", self.onViewChanged),
+            self.axes.callbacks.connect("ylim_changed", self.onViewChanged)
+        ]
+        self.canvas_callback = self.axes.figure.canvas.mpl_connect("resize_event", self.onViewChanged)
+
+        self.setData(np.zeros(0) if x is None else x,
+                     np.zeros(0) if y is None else y,
+                     values)
+
+    def setData(self,
+                x: np.ndarray,
+                y: np.ndarray,
+                values: Optional[np.ndarray] = None,
+                importance: Optional[np.ndarray] = None):
+        """
+        Replace the track drawn by the renderer (the scatter plot is updated in place)
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Abscissa of the track points (projected)
+        y : np.ndarray
+            Ordinate of the track points (projected)
+        values : Optional[np.ndarray], optional
+            Values used to color the points, by default None
+        importance : Optional[np.ndarray], optional
+            Precomputed Ramer-Douglas-Peucker importance of the points, by default None
+        """
+        self.x: np.ndarray = np.asarray(x, dtype=np.float64)
+        self.y: np.ndarray = np.asarray(y, dtype=np.float64)
+        self.values: Optional[np.ndarray] = None if values is None else np.asarray(values)
+        if self.values is not None and len(self.values):
+            self.collection.set_clim(np.nanmin(self.values), np.nanmax(self.values))
+
+        # Pyramid (levels are computed on first use)
+        if importance is None:
+            importance = douglasPeuckerImportance(self.x, self.y)
+        self.importance: np.ndarray = importance
+        finite = self.importance[np.isfinite(self.importance)]
+        span = max(np.ptp(self.x) if len(self.x) else 0.0, np.ptp(self.y) if len(self.y) else 0.0)
+        self.tolerances: List[float] = []
+        if span > 0:
+            tolerance = span
+            min_tolerance = finite[finite > 0].min() if np.any(finite > 0) else span
+            while tolerance >= min_tolerance and len(self.tolerances) < MAX_LEVELS:
+                self.tolerances.append(tolerance)
+                tolerance /= 2
+        self.levels: Dict[int, np.ndarray] = {}
+        self.update()
+
+    def disconnect(self):
+        """
+        Detach the renderer from the axes
+        """
+        for callback in self.callbacks:
+            self.axes.callbacks.disconnect(callback)
+        self.axes.figure.canvas.mpl_disconnect(self.canvas_callback)
+        self.callbacks = []
+
+    def level(self, i: int) -> np.ndarray:
+        """
+        Return the indices (in track order) of the points of a level
+
+        Parameters
+        ----------
+        i : int
+            Level (0 is the coarsest one)
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the points of the level
+        """
+        if i >= len(self.tolerances):
+            return np.arange(len(self.x))
+        if i not in self.levels:
+            tolerance = self.tolerances[i]
+            shape = np.flatnonzero(self.importance >= tolerance)
+            shape = shape[self.cellRepresentatives(self.x[shape], self.y[shape], tolerance)]
+            representatives = self.cellRepresentatives(self.x, self.y, tolerance * PIXEL_CELL_SIZE / PIXEL_TOLERANCE)
+            self.levels[i] = np.union1d(shape, representatives)
+        return self.levels[i]
+
+    def cellRepresentatives(self, x: np.ndarray, y: np.ndarray, cell_size: float) -> np.ndarray:
+        """
+        Return the first point of each occupied cell of a grid
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Abscissa of the points
+        y : np.ndarray
+            Ordinate of the points
+        cell_size : float
+            Size of the cells
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the representative points (sorted)
+        """
+        if len(x) == 0:
+            return np.zeros(0, dtype=np.int64)
+        cells_x = np.floor((x - self.x.min()) / cell_size).astype(np.int64)
+        cells_y = np.floor((y - self.y.min()) / cell_size).astype(np.int64)
+        _, representatives = np.unique(cells_x * (cells_y.max() + 1) + cells_y, return_index=True)
+        return np.sort(representatives)
+
+    def selectLevel(self) -> int:
+        """
+        Select the coarsest level matching the pixel density of the current view
+
+        Returns
+        -------
+        int
+            Selected level
+        """
+        x_min, x_max = self.axes.get_xlim()
+        y_min, y_max = self.axes.get_ylim()
+        bbox = self.axes.get_window_extent()
+        if bbox.width <= 0 or bbox.height <= 0:
+            return 0
+        pixel_size = max(abs(x_max - x_min) / bbox.width, abs(y_max - y_min) / bbox.height)
+        tolerance = pixel_size * PIXEL_TOLERANCE
+        for i, level_tolerance in enumerate(self.tolerances):
+            if level_tolerance <= tolerance:
+                return i
+        return len(self.tolerances)
+
+    def visiblePoints(self) -> np.ndarray:
+        """
+        Return the indices of the points to draw for the current view
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the points to draw
+        """
+        indices = self.level(self.selectLevel())
+        x_min, x_max = sorted(self.axes.get_xlim())
+        y_min, y_max = sorted(self.axes.get_ylim())
+        x = self.x[indices]
+        y = self.y[indices]
+        visible = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return indices[visible]
+
+    def update(self):
+        """
+        Update the scatter plot with the points to draw for the current view
+        """
+        indices = self.visiblePoints()
+        self.nb_drawn_points = len(indices)
+        self.collection.set_offsets(np.column_stack((self.x[indices], self.y[indices])))
+        if self.values is not None:
+            self.collection.set_array(self.values[indices])
+
+    def onViewChanged(self, *args):
+        """
+        Function executed when the view limits or the canvas size change
+        (redrawing is left to the code changing the view)
+        """
+        self.update()
+
+
+class OverlayRenderer():
+    """
+    Renderer of several tracks drawn on the same map (one scatter plot and
+    one level of detail renderer per track, so each track is decimated
+    independently according to its own density).
+
+    Markers are polygons: matplotlib computes the extents of the marker of
+    each scatter plot at every draw, which is slow for curved markers and
+    dominates the drawing time with tens of tracks.
+    """
+
+    def __init__(self, canvas):
+        """
+        Initialise OverlayRenderer instance
+
+        Parameters
+        ----------
+        canvas : MatplotlibFigure
+            Canvas containing the map (scatter plots are drawn as animated artists)
+        """
+        self.canvas = canvas
+        self.collections: List["PathCollection"] = []
+        self.renderers: List[LODTrackRenderer] = []
+
+    def __len__(self) -> int:
+        return len(self.renderers)
+
+    @property
+    def nb_drawn_points(self) -> int:
+        """
+        Number of points drawn for the current view (all tracks)
+        """
+        return sum(renderer.nb_drawn_points for renderer in self.renderers)
+
+    def setTracks(self, render_data: List[RenderData], colors: List[str], size: float = 10):
+        """
+        Replace the drawn tracks
+
+        Parameters
+        ----------
+        render_data : List[RenderData]
+            Ready to plot data of each track (projected with the same map)
+        colors : List[str]
+            Color of each track
+        size : float, optional
+            Size of the markers, by default 10
+        """
+        from matplotlib.path import Path
+        self.clear()
+        marker = Path.unit_regular_polygon(OVERLAY_MARKER_VERTICES)
+        for data, color in zip(render_data, colors):
+            collection = self.canvas.axes.scatter([], [], s=size, color=color, marker=marker)
+            self.canvas.addAnimatedArtist(collection)
+            self.collections.append(collection)
+            self.renderers.append(LODTrackRenderer(self.canvas.axes, collection))
+            self.renderers[-1].setData(data.x, data.y, None, data.importance)
+
+    def clear(self):
+        """
+        Remove the drawn tracks
+        """
+        for renderer in self.renderers:
+            renderer.disconnect()
+        for collection in self.collections:
+            self.canvas.removeAnimatedArtist(collection)
+            collection.remove()
+        self.collections = []
+        self.renderers = []
@@ -0,0 +1,435 @@
+import os
+import math
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.image import AxesImage
+
+# Size (pixels) of the raster tiles
+TILE_SIZE = 256
+
+# Memory budget (bytes) of the cache of decoded tiles (256 KB per RGBA tile)
+DEFAULT_TILE_CACHE_SIZE = 128 * 1024 * 1024
+
+# Directory searched for basemaps (MBTiles files)
+DEFAULT_BASEMAPS_DIR = os.path.join(os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share")),
+                                    "gpx_tool", "basemaps")
+
+# Maximum number of tiles composited for a view (a coarser zoom level is used beyond)
+MAX_VISIBLE_TILES = 64
+
+# Number of tiles read and decoded by each worker
+TILES_PER_WORKER = 4
+
+# Delay (milliseconds) without view change before the missing tiles are loaded
+TILES_DELAY = 50
+
+# Number of coarser zoom levels searched for a cached tile covering a missing one
+MAX_PARENT_LEVELS = 3
+
+# Latitude limit of the Web Mercator projection (degrees)
+MAX_LATITUDE = 85.0511287798
+
+# Key of a tile: path to the MBTiles file, zoom level, column and row (XYZ scheme, row 0 at the north)
+TileKey = Tuple[str, int, int, int]
+
+# Decoded tile of a missing or invalid tile (cached so it is not read again)
+EMPTY_TILE = np.zeros((0, 0, 4), dtype=np.uint8)
+
+
+def mercatorY(lat: np.ndarray) -> np.ndarray:
+    """
+    Web Mercator ordinate (radians) of latitudes (degrees)
+    """
+    lat = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    return np.log(np.tan(np.pi / 4 + lat / 2))
+
+
+def tileBounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Return the bounds of a tile
+
+    Parameters
+    ----------
+    zoom : int
+        Zoom level
+    x : int
+        Column of the tile
+    y : int
+        Row of the tile (XYZ scheme, row 0 at the north)
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        Min latitude, min longitude, max latitude, max longitude
+    """
+    n = 2 ** zoom
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return min_lat, x / n * 360 - 180, max_lat, (x + 1) / n * 360 - 180
+
+
+def tileRange(min_lat: float,
+              min_lon: float,
+              max_lat: float,
+              max_lon: float,
+              zoom: int) -> Tuple[int, int, int, int]:
+    """
+    Return the columns and rows of the tiles covering an area
+
+    Returns
+    -------
+    Tuple[int, int, int, int]
+        First column, last column, first row, last row (included)
+    """
+    n = 2 ** zoom
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+    top, bottom = mercatorY(np.array([max_lat, min_lat]))
+    x_first = int(np.clip(math.floor((min_lon + 180) / 360 * n), 0, n - 1))
+    x_last = int(np.clip(math.floor((max_lon + 180) / 360 * n), 0, n - 1))
+    y_first = int(np.clip(math.floor((1 - top / math.pi) / 2 * n), 0, n - 1))
+    y_last = int(np.clip(math.floor((1 - bottom / math.pi) / 2 * n), 0, n - 1))
+    return x_first, x_last, y_first, y_last
+
+
+def visibleTiles(limits: Tuple[float, float, float, float],
+                 width: float,
+                 min_zoom: int,
+                 max_zoom: int,
+                 max_tiles: int = MAX_VISIBLE_TILES) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Select the zoom level matching the pixel density of a view and the
+    tiles covering it
+
+    Parameters
+    ----------
+    limits : Tuple[float, float, float, float]
+        Min longitude, max longitude, min latitude, max latitude of the view
+        (limits of the axes of the equirectangular map)
+    width : float
+        Width of the view (pixels)
+    min_zoom : int
+        Minimum zoom level of the basemap
+    max_zoom : int
+        Maximum zoom level of the basemap (tiles are enlarged beyond)
+    max_tiles : int, optional
+        Maximum number of tiles (coarser zoom level beyond), by default MAX_VISIBLE_TILES
+
+    Returns
+    -------
+    Tuple[int, List[Tuple[int, int]]]
+        Zoom level and columns and rows of the tiles (none if the view needs
+        more than max_tiles tiles at the minimum zoom level)
+    """
+    x_min, x_max = sorted(limits[:2])
+    y_min, y_max = sorted(limits[2:])
+    y_min, y_max = max(y_min, -MAX_LATITUDE), min(y_max, MAX_LATITUDE)
+    if width <= 0 or x_max <= x_min or y_max <= y_min or x_max <= -180 or x_min >= 180:
+        return min_zoom, []
+    zoom = math.ceil(math.log2(360 * width / (TILE_SIZE * (x_max - x_min))))
+    zoom = int(min(max(zoom, min_zoom), max_zoom))
+    while True:
+        x_first, x_last, y_first, y_last = tileRange(y_min, x_min, y_max, x_max, zoom)
+        if (x_last - x_first + 1) * (y_last - y_first + 1) <= max_tiles:
+            return zoom, [(x, y) for y in range(y_first, y_last + 1) for x in range(x_first, x_last + 1)]
+        if zoom <= min_zoom:
+            return zoom, []
+        zoom -= 1
+
+
+def decodeTile(data: Optional[bytes], zoom: int, y: int) -> np.ndarray:
+    """
+    Decode a raster tile (PNG, JPEG, WebP...) and resample its rows so that
+    they are evenly spaced in latitude, like the equirectangular map (tiles
+    are evenly spaced in Web Mercator ordinate)
+
+    Parameters
+    ----------
+    data : Optional[bytes]
+        Encoded tile, None if the tile is missing
+    zoom : int
+        Zoom level of the tile
+    y : int
+        Row of the tile (XYZ scheme)
+
+    Returns
+    -------
+    np.ndarray
+        RGBA pixels (height, width, 4), EMPTY_TILE if the tile is missing or invalid
+    """
+    if not data:
+        return EMPTY_TILE
+    image = QImage.fromData(data)
+    if image.isNull():
+        return EMPTY_TILE
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    height, width = image.height(), image.width()
+    pointer = image.constBits()
+    pointer.setsize(image.sizeInBytes())
+    pixels = np.frombuffer(pointer, dtype=np.uint8).reshape(height, image.bytesPerLine())[:, :width * 4]
+
+    # Source row of each output row (the copy no longer depends on the image memory)
+    min_lat, _, max_lat, _ = tileBounds(zoom, 0, y)
+    lat = max_lat - (np.arange(height) + 0.5) * (max_lat - min_lat) / height
+    top, bottom = mercatorY(np.array([max_lat, min_lat]))
+    rows = np.clip(((top - mercatorY(lat)) / (top - bottom) * height).astype(np.int64), 0, height - 1)
+    return pixels[rows].reshape(height, width, 4)
+
+
+class MBTilesReader():
+    """
+    Reader of raster tiles stored in an MBTiles file (SQLite database, rows
+    in the TMS scheme). Thread safe (one read-only connection per thread).
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a basemap and read its metadata
+
+        Parameters
+        ----------
+        path : str
+            Path to the MBTiles file
+
+        Raises
+        ------
+        ValueError
+            If the file is not a readable MBTiles file
+        """
+        self.path: str = os.path.realpath(path)
+        self.local = threading.local()
+        try:
+            connection = self.connection()
+            self.metadata: Dict[str, str] = dict(connection.execute("SELECT name, value FROM metadata").fetchall())
+            min_zoom, max_zoom = connection.execute("SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles").fetchone()
+        except sqlite3.Error as e:
+            raise ValueError(f"Invalid MBTiles file {path}: {e}") from e
+        if min_zoom is None:
+            raise ValueError(f"Invalid MBTiles file {path}: no tile")
+        self.name: str = self.metadata.get("name") or os.path.splitext(os.path.basename(path))[0]
+        self.min_zoom: int = int(self.metadata.get("minzoom", min_zoom))
+        self.max_zoom: int = int(self.metadata.get("maxzoom", max_zoom))
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Return the connection of the current thread
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self.local.connection = connection
+        return connection
+
+    def tile(self, zoom: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Read an encoded tile
+
+        Parameters
+        ----------
+        zoom : int
+            Zoom level
+        x : int
+            Column of the tile
+        y : int
+            Row of the tile (XYZ scheme, row 0 at the north)
+
+        Returns
+        -------
+        Optional[bytes]
+            Encoded tile, None if the basemap does not contain it
+        """
+        row = self.connection().execute("SELECT tile_data FROM tiles "
+                                        "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                                        (zoom, x, 2 ** zoom - 1 - y)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def close(self):
+        """
+        Close the connection of the current thread
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+
+def findBasemaps(directory: str = DEFAULT_BASEMAPS_DIR) -> List[str]:
+    """
+    Return the MBTiles files of a directory (sorted)
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(".mbtiles"))
+
+
+class TileCache():
+    """
+    Bounded LRU cache of decoded tiles keyed by basemap path, zoom level,
+    column and row. Thread safe (tiles are added from worker threads).
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TILE_CACHE_SIZE):
+        """
+        Initialise the cache
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Memory budget (bytes), by default DEFAULT_TILE_CACHE_SIZE
+        """
+        self.max_size: int = max_size
+        self.size: int = 0
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: TileKey) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key: TileKey) -> Optional[np.ndarray]:
+        """
+        Retrieve a decoded tile (None if it is not cached, EMPTY_TILE if the
+        basemap does not contain it)
+        """
+        with self.lock:
+            tile = self.entries.get(key)
+            if tile is not None:
+                self.entries.move_to_end(key)
+            return tile
+
+    def put(self, key: TileKey, tile: np.ndarray):
+        """
+        Add a decoded tile (least recently used tiles are evicted beyond the memory budget)
+        """
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.nbytes
+            self.entries[key] = tile
+            self.size += tile.nbytes
+            while self.size > self.max_size and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def clear(self):
+        """
+        Remove all the tiles
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+def loadTiles(reader: MBTilesReader,
+              keys: Iterable[TileKey],
+              cache: TileCache,
+              checkpoint: Optional[Callable[[], None]] = None) -> List[TileKey]:
+    """
+    Read and decode tiles into the cache (tiles already cached are skipped)
+
+    Parameters
+    ----------
+    reader : MBTilesReader
+        Basemap containing the tiles
+    keys : Iterable[TileKey]
+        Tiles to load
+    cache : TileCache
+        Cache of decoded tiles
+    checkpoint : Optional[Callable[[], None]], optional
+        Function called before each tile (raises to abort), by default None
+
+    Returns
+    -------
+    List[TileKey]
+        Loaded tiles
+    """
+    loaded = []
+    for key in keys:
+        if checkpoint is not None:
+            checkpoint()
+        if key in cache:
+            continue
+        _, zoom, x, y = key
+        cache.put(key, decodeTile(reader.tile(zoom, x, y), zoom, y))
+        loaded.append(key)
+    return loaded
+
+
+class TileRenderer():
+    """
+    Composite the tiles of a basemap onto the axes of an equirectangular map
+    (one image per tile, drawn under the tracks). Only the images of the
+    tiles that entered or left the view are created or removed.
+    """
+
+    def __init__(self, axes: "Axes"):
+        """
+        Initialise TileRenderer instance
+
+        Parameters
+        ----------
+        axes : Axes
+            Axes of the map (longitude and latitude coordinates)
+        """
+        self.axes: "Axes" = axes
+        self.images: Dict[TileKey, "AxesImage"] = {}
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def setTiles(self, tiles: Dict[TileKey, np.ndarray]) -> bool:
+        """
+        Replace the drawn tiles (the coarsest tiles are drawn first, so
+        finer tiles cover them)
+
+        Parameters
+        ----------
+        tiles : Dict[TileKey, np.ndarray]
+            Decoded tiles to draw (empty tiles are ignored)
+
+        Returns
+        -------
+        bool
+            Whether the drawn tiles changed (the figure must be redrawn)
+        """
+        from matplotlib.image import AxesImage
+        tiles = {key: tile for key, tile in tiles.items() if tile.size}
+        changed = False
+        for key in [key for key in self.images if key not in tiles]:
+            self.images.pop(key).remove()
+            changed = True
+        for key, tile in tiles.items():
+            if key in self.images:
+                continue
+            _, zoom, x, y = key
+            min_lat, min_lon, max_lat, max_lon = tileBounds(zoom, x, y)
+            image = AxesImage(self.axes, extent=(min_lon, max_lon, min_lat, max_lat), origin="upper",
+                              interpolation="bilinear", zorder=-1 + zoom / 100)
+            image.set_data(tile)
+            image.set_clip_path(self.axes.patch)
+            self.axes.add_image(image)
+            self.images[key] = image
+            changed = True
+        return changed
+
+    def clear(self) -> bool:
+        """
+        Remove the drawn tiles
+
+        Returns
+        -------
+        bool
+            Whether tiles were drawn
+        """
+        return self.setTiles({})
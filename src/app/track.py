@@ -0,0 +1,310 @@
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ezgpx import GPX
+
+from .metrics import NAT, computeMetrics, gpxArrays, metricsDataframe, trackBounds
+
+
+class WayPoints():
+    """
+    Compact way points storage (structure of arrays).
+    """
+    __slots__ = ("lat", "lon", "ele", "names")
+
+    def __init__(self,
+                 lat: np.ndarray,
+                 lon: np.ndarray,
+                 ele: Optional[np.ndarray] = None,
+                 names: Optional[List[str]] = None):
+        self.lat: np.ndarray = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon: np.ndarray = np.ascontiguousarray(lon, dtype=np.float64)
+        self.ele: Optional[np.ndarray] = None if ele is None else np.ascontiguousarray(ele, dtype=np.float64)
+        self.names: List[str] = names if names is not None else [""] * len(self.lat)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory footprint (bytes) of the way points
+        """
+        return (self.lat.nbytes + self.lon.nbytes
+                + (0 if self.ele is None else self.ele.nbytes)
+                + sum(len(name) for name in self.names))
+
+
+class Track():
+    """
+    Compact columnar (structure of arrays) track representation.
+
+    Track points of all the tracks and segments of a file are stored in
+    contiguous typed arrays (float64 coordinates and elevation, int64 UTC
+    epoch nanoseconds for time). Segment i contains the points
+    segment_offsets[i] to segment_offsets[i+1] (excluded). Elevation and time
+    are None when the file does not contain them.
+
+    The arrays can be memory-mapped (see DiskTrackCache).
+    """
+    __slots__ = ("path", "name", "lat", "lon", "ele", "time", "segment_offsets", "waypoints", "point_metrics", "signature")
+
+    def __init__(self,
+                 lat: np.ndarray,
+                 lon: np.ndarray,
+                 ele: Optional[np.ndarray] = None,
+                 time: Optional[np.ndarray] = None,
+                 segment_offsets: Optional[np.ndarray] = None,
+                 waypoints: Optional[WayPoints] = None,
+                 name: Optional[str] = None,
+                 path: Optional[str] = None,
+                 point_metrics: Optional[Dict[str, np.ndarray]] = None,
+                 signature: Optional[Tuple[int, int]] = None):
+        """
+        Initialise Track instance
+
+        Parameters
+        ----------
+        lat : np.ndarray
+            Latitude of the points
+        lon : np.ndarray
+            Longitude of the points
+        ele : Optional[np.ndarray], optional
+            Elevation of the points (NaN if missing), by default None
+        time : Optional[np.ndarray], optional
+            Time of the points (UTC epoch nanoseconds, NAT if missing), by default None
+        segment_offsets : Optional[np.ndarray], optional
+            Index of the first point of each segment followed by the number
+            of points, by default None (single segment)
+        waypoints : Optional[WayPoints], optional
+            Way points, by default None
+        name : Optional[str], optional
+            Track name, by default None
+        path : Optional[str], optional
+            Path to the source file, by default None
+        point_metrics : Optional[Dict[str, np.ndarray]], optional
+            Precomputed metrics of the dataframe (see pointMetrics), by default None
+        signature : Optional[Tuple[int, int]], optional
+            Signature of the source file taken before reading it (see
+            fileSignature), by default None (unknown)
+        """
+        self.lat: np.ndarray = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon: np.ndarray = np.ascontiguousarray(lon, dtype=np.float64)
+        self.ele: Optional[np.ndarray] = None if ele is None else np.ascontiguousarray(ele, dtype=np.float64)
+        self.time: Optional[np.ndarray] = None if time is None else np.ascontiguousarray(time, dtype=np.int64)
+        if segment_offsets is None:
+            segment_offsets = [0, len(self.lat)]
+        self.segment_offsets: np.ndarray = np.ascontiguousarray(segment_offsets, dtype=np.int64)
+        self.waypoints: WayPoints = waypoints if waypoints is not None else WayPoints(np.zeros(0), np.zeros(0))
+        self.name: Optional[str] = name
+        self.path: Optional[str] = path
+        self.point_metrics: Optional[Dict[str, np.ndarray]] = point_metrics
+        self.signature: Optional[Tuple[int, int]] = signature
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @classmethod
+    def fromGPX(cls, gpx: "GPX", path: Optional[str] = None) -> "Track":
+        """
+        Convert a GPX object to a track
+
+        Parameters
+        ----------
+        gpx : GPX
+            GPX object
+        path : Optional[str], optional
+            Path to the source file, by default the path of the GPX object
+
+        Returns
+        -------
+        Track
+            Track containing the points of every track and segment of the GPX object
+        """
+        lat, lon, ele, time = gpxArrays(gpx)
+        lengths = [len(segment.trkpt) for track in gpx.gpx.tracks for segment in track.trkseg]
+        segment_offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+        # Optional data
+        if np.isnan(ele).all():
+            ele = None
+        if not gpx.time_data or (time == NAT).all():
+            time = None
+
+        # Way points
+        wpt = gpx.gpx.wpt
+        waypoints = WayPoints(np.array([point.lat for point in wpt], dtype=np.float64),
+                              np.array([point.lon for point in wpt], dtype=np.float64),
+                              np.array([np.nan if point.ele is None else point.ele for point in wpt], dtype=np.float64),
+                              [point.name or "" for point in wpt])
+
+        name = gpx.gpx.tracks[0].name if gpx.gpx.tracks else None
+        return cls(lat, lon, ele, time, segment_offsets, waypoints, name,
+                   path if path is not None else gpx.file_path)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory footprint (bytes) of the track
+        """
+        return (self.lat.nbytes + self.lon.nbytes
+                + (0 if self.ele is None else self.ele.nbytes)
+                + (0 if self.time is None else self.time.nbytes)
+                + self.segment_offsets.nbytes
+                + self.waypoints.nbytes
+                + (0 if self.point_metrics is None else sum(array.nbytes for array in self.point_metrics.values())))
+
+    def nbSegments(self) -> int:
+        """
+        Return the number of segments
+        """
+        return len(self.segment_offsets) - 1
+
+    def segments(self) -> Iterator[Tuple[int, int]]:
+        """
+        Iterate over the segments
+
+        Returns
+        -------
+        Iterator[Tuple[int, int]]
+            Index of the first point and index after the last point of each segment
+        """
+        for i in range(self.nbSegments()):
+            yield int(self.segment_offsets[i]), int(self.segment_offsets[i + 1])
+
+    def chunks(self, chunk_size: int) -> Iterator["Track"]:
+        """
+        Iterate over the track points by chunks
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of points per chunk
+
+        Returns
+        -------
+        Iterator[Track]
+            Tracks containing consecutive points (views of the arrays, without way points)
+        """
+        chunk_size = max(1, int(chunk_size))
+        for start in range(0, len(self), chunk_size):
+            end = start + chunk_size
+            yield Track(self.lat[start:end],
+                        self.lon[start:end],
+                        None if self.ele is None else self.ele[start:end],
+                        None if self.time is None else self.time[start:end],
+                        name=self.name,
+                        path=self.path)
+
+    def select(self, indices: np.ndarray, elevation: bool = True, time: bool = True) -> "Track":
+        """
+        Build a track containing a subset of the points
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            Sorted indices of the kept points
+        elevation : bool, optional
+            Keep the elevation of the points, by default True
+        time : bool, optional
+            Keep the time of the points, by default True
+
+        Returns
+        -------
+        Track
+            Track with the same segments (possibly empty) and way points
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return Track(self.lat[indices],
+                     self.lon[indices],
+                     self.ele[indices] if elevation and self.ele is not None else None,
+                     self.time[indices] if time and self.time is not None else None,
+                     np.searchsorted(indices, self.segment_offsets),
+                     self.waypoints,
+                     self.name,
+                     self.path)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        Find minimum and maximum latitude and longitude
+
+        Returns
+        -------
+        Tuple[float, float, float, float]
+            Min latitude, min longitude, max latitude, max longitude
+        """
+        return trackBounds(self.lat, self.lon)
+
+    def metrics(self, smoothing: int = 1) -> Dict[str, np.ndarray]:
+        """
+        Compute per point metrics (see computeMetrics)
+        """
+        return computeMetrics(self.lat, self.lon, self.ele, self.time, smoothing)
+
+    def pointMetrics(self) -> Dict[str, np.ndarray]:
+        """
+        Per point metrics of the dataframe columns (missing elevation filled
+        with 0 like the elevation column), computed once
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            Metrics (see computeMetrics)
+        """
+        if self.point_metrics is None:
+            filled_ele = np.zeros(len(self)) if self.ele is None else np.nan_to_num(self.ele, nan=0.0)
+            self.point_metrics = computeMetrics(self.lat, self.lon, filled_ele, self.time)
+        return self.point_metrics
+
+    def dataframe(self, **kwargs) -> "pd.DataFrame":
+        """
+        Convert the track to a dataframe with the same columns as GPX.to_dataframe
+
+        Parameters
+        ----------
+        **kwargs
+            Columns to toggle (see metricsDataframe)
+
+        Returns
+        -------
+        pd.DataFrame
+            Dataframe containing data from the track
+        """
+        if "time" in kwargs:
+            kwargs["times"] = kwargs.pop("time")
+        return metricsDataframe(self.lat, self.lon, self.ele, self.time, metrics=self.pointMetrics(), **kwargs)
+
+    def gpx(self) -> "GPX":
+        """
+        Build the full GPX object tree by parsing the source file
+        (only needed for full fidelity GPX output). The file must still be
+        the one the track was read from (same signature, when known, and
+        same number of points), so indices of track points apply to the tree.
+
+        Returns
+        -------
+        GPX
+            GPX object
+
+        Raises
+        ------
+        ValueError
+            If the file cannot be parsed or changed since the track was read
+        """
+        if self.path is None:
+            raise ValueError("Track has no source file")
+        from ezgpx import GPX
+        from .cache import fileSignature
+        if self.signature is not None and fileSignature(self.path) != tuple(self.signature):
+            raise ValueError(f"File modified since it was loaded (load it again): {self.path}")
+        gpx = GPX(self.path)
+        if gpx.gpx is None:
+            raise ValueError(f"Unable to parse file: {self.path}")
+        nb_points = sum(len(segment.trkpt) for track in gpx.gpx.tracks for segment in track.trkseg)
+        if nb_points != len(self):
+            raise ValueError(f"File modified since it was loaded ({nb_points} points instead of "
+                             f"{len(self)}, load it again): {self.path}")
+        return gpx
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'src/app/application.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1146, 755)
+        MainWindow.setWindowTitle("")
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.gridLayout_2 = QtWidgets.QGridLayout(self.centralwidget)
+        self.gridLayout_2.setObjectName("gridLayout_2")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.gridLayout_2.addLayout(self.horizontalLayout, 0, 8, 1, 1)
+        self.tabs = QtWidgets.QTabWidget(self.centralwidget)
+        self.tabs.setMinimumSize(QtCore.QSize(0, 0))
+        self.tabs.setAutoFillBackground(False)
+        self.tabs.setObjectName("tabs")
+        self.main_tab = QtWidgets.QWidget()
+        self.main_tab.setObjectName("main_tab")
+        self.gridLayout_3 = QtWidgets.QGridLayout(self.main_tab)
+        self.gridLayout_3.setObjectName("gridLayout_3")
+        self.frame = QtWidgets.QFrame(self.main_tab)
+        self.frame.setFrameShape(QtWidgets.QFrame.StyledPanel)
+        self.frame.setFrameShadow(QtWidgets.QFrame.Raised)
+        self.frame.setObjectName("frame")
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout(self.frame)
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.splitter_2 = QtWidgets.QSplitter(self.frame)
+        self.splitter_2.setOrientation(QtCore.Qt.Horizontal)
+        self.splitter_2.setObjectName("splitter_2")
+        self.layoutWidget = QtWidgets.QWidget(self.splitter_2)
+        self.layoutWidget.setObjectName("layoutWidget")
+        self.verticalLayout_left = QtWidgets.QVBoxLayout(self.layoutWidget)
+        self.verticalLayout_left.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout_left.setObjectName("verticalLayout_left")
+        self.checkbox_show_gpx = QtWidgets.QCheckBox(self.layoutWidget)
+        self.checkbox_show_gpx.setMinimumSize(QtCore.QSize(121, 0))
+        self.checkbox_show_gpx.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.checkbox_show_gpx.setObjectName("checkbox_show_gpx")
+        self.verticalLayout_left.addWidget(self.checkbox_show_gpx)
+        self.line_edit_area = QtWidgets.QLineEdit(self.layoutWidget)
+        self.line_edit_area.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.line_edit_area.setObjectName("line_edit_area")
+        self.verticalLayout_left.addWidget(self.line_edit_area)
+        self.horizontalLayout_area = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_area.setObjectName("horizontalLayout_area")
+        self.button_search_area = QtWidgets.QPushButton(self.layoutWidget)
+        self.button_search_area.setObjectName("button_search_area")
+        self.horizontalLayout_area.addWidget(self.button_search_area)
+        self.button_clear_area = QtWidgets.QPushButton(self.layoutWidget)
+        self.button_clear_area.setObjectName("button_clear_area")
+        self.horizontalLayout_area.addWidget(self.button_clear_area)
+        self.verticalLayout_left.addLayout(self.horizontalLayout_area)
+        self.filesTree = QtWidgets.QTreeView(self.layoutWidget)
+        self.filesTree.setObjectName("filesTree")
+        self.verticalLayout_left.addWidget(self.filesTree)
+        self.splitter = QtWidgets.QSplitter(self.splitter_2)
+        self.splitter.setOrientation(QtCore.Qt.Vertical)
+        self.splitter.setObjectName("splitter")
+        self.layoutWidget1 = QtWidgets.QWidget(self.splitter)
+        self.layoutWidget1.setObjectName("layoutWidget1")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.layoutWidget1)
+        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayoutWidget = QtWidgets.QWidget(self.splitter)
+        self.horizontalLayoutWidget.setObjectName("horizontalLayoutWidget")
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout(self.horizontalLayoutWidget)
+        self.horizontalLayout_2.setContentsMargins(0, 0, 0, 0)
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        self.layoutWidget2 = QtWidgets.QWidget(self.splitter_2)
+        self.layoutWidget2.setObjectName("layoutWidget2")
+        self.verticalLayout_right = QtWidgets.QVBoxLayout(self.layoutWidget2)
+        self.verticalLayout_right.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout_right.setObjectName("verticalLayout_right")
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.checkbox_remove_GPS_errors = QtWidgets.QCheckBox(self.layoutWidget2)
+        self.checkbox_remove_GPS_errors.setMinimumSize(QtCore.QSize(121, 0))
+        self.checkbox_remove_GPS_errors.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.checkbox_remove_GPS_errors.setObjectName("checkbox_remove_GPS_errors")
+        self.verticalLayout_4.addWidget(self.checkbox_remove_GPS_errors)
+        self.checkbox_remove_metadata = QtWidgets.QCheckBox(self.layoutWidget2)
+        self.checkbox_remove_metadata.setMinimumSize(QtCore.QSize(121, 0))
+        self.checkbox_remove_metadata.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.checkbox_remove_metadata.setObjectName("checkbox_remove_metadata")
+        self.verticalLayout_4.addWidget(self.checkbox_remove_metadata)
+        self.checkbox_remove_time = QtWidgets.QCheckBox(self.layoutWidget2)
+        self.checkbox_remove_time.setMinimumSize(QtCore.QSize(121, 0))
+        self.checkbox_remove_time.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.checkbox_remove_time.setObjectName("checkbox_remove_time")
+        self.verticalLayout_4.addWidget(self.checkbox_remove_time)
+        self.checkbox_remove_elevation = QtWidgets.QCheckBox(self.layoutWidget2)
+        self.checkbox_remove_elevation.setMinimumSize(QtCore.QSize(121, 0))
+        self.checkbox_remove_elevation.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.checkbox_remove_elevation.setObjectName("checkbox_remove_elevation")
+        self.verticalLayout_4.addWidget(self.checkbox_remove_elevation)
+        self.checkbox_compress_data = QtWidgets.QCheckBox(self.layoutWidget2)
+        self.checkbox_compress_data.setMinimumSize(QtCore.QSize(121, 0))
+        self.checkbox_compress_data.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.checkbox_compress_data.setObjectName("checkbox_compress_data")
+        self.verticalLayout_4.addWidget(self.checkbox_compress_data)
+        self.horizontalLayout_tolerance = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_tolerance.setObjectName("horizontalLayout_tolerance")
+        self.label_tolerance = QtWidgets.QLabel(self.layoutWidget2)
+        self.label_tolerance.setObjectName("label_tolerance")
+        self.horizontalLayout_tolerance.addWidget(self.label_tolerance)
+        self.spinbox_tolerance = QtWidgets.QDoubleSpinBox(self.layoutWidget2)
+        self.spinbox_tolerance.setDecimals(1)
+        self.spinbox_tolerance.setMinimum(0.1)
+        self.spinbox_tolerance.setMaximum(1000.0)
+        self.spinbox_tolerance.setSingleStep(0.5)
+        self.spinbox_tolerance.setObjectName("spinbox_tolerance")
+        self.horizontalLayout_tolerance.addWidget(self.spinbox_tolerance)
+        self.verticalLayout_4.addLayout(self.horizontalLayout_tolerance)
+        self.combo_simplification = QtWidgets.QComboBox(self.layoutWidget2)
+        self.combo_simplification.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.combo_simplification.setObjectName("combo_simplification")
+        self.verticalLayout_4.addWidget(self.combo_simplification)
+        self.label_preview = QtWidgets.QLabel(self.layoutWidget2)
+        self.label_preview.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.label_preview.setWordWrap(True)
+        self.label_preview.setText("")
+        self.label_preview.setObjectName("label_preview")
+        self.verticalLayout_4.addWidget(self.label_preview)
+        self.button_export_gpx = QtWidgets.QPushButton(self.layoutWidget2)
+        self.button_export_gpx.setObjectName("button_export_gpx")
+        self.verticalLayout_4.addWidget(self.button_export_gpx)
+        self.button_export_kml = QtWidgets.QPushButton(self.layoutWidget2)
+        self.button_export_kml.setObjectName("button_export_kml")
+        self.verticalLayout_4.addWidget(self.button_export_kml)
+        self.button_export_csv = QtWidgets.QPushButton(self.layoutWidget2)
+        self.button_export_csv.setObjectName("button_export_csv")
+        self.verticalLayout_4.addWidget(self.button_export_csv)
+        self.button_clear_cache = QtWidgets.QPushButton(self.layoutWidget2)
+        self.button_clear_cache.setObjectName("button_clear_cache")
+        self.verticalLayout_4.addWidget(self.button_clear_cache)
+        self.horizontalLayout_basemap = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_basemap.setObjectName("horizontalLayout_basemap")
+        self.combo_basemap = QtWidgets.QComboBox(self.layoutWidget2)
+        self.combo_basemap.setObjectName("combo_basemap")
+        self.horizontalLayout_basemap.addWidget(self.combo_basemap)
+        self.button_open_basemap = QtWidgets.QPushButton(self.layoutWidget2)
+        self.button_open_basemap.setObjectName("button_open_basemap")
+        self.horizontalLayout_basemap.addWidget(self.button_open_basemap)
+        self.verticalLayout_4.addLayout(self.horizontalLayout_basemap)
+        self.progress_bar = QtWidgets.QProgressBar(self.layoutWidget2)
+        self.progress_bar.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.progress_bar.setMaximum(1000)
+        self.progress_bar.setProperty("value", 0)
+        self.progress_bar.setObjectName("progress_bar")
+        self.verticalLayout_4.addWidget(self.progress_bar)
+        self.label_progress = QtWidgets.QLabel(self.layoutWidget2)
+        self.label_progress.setMaximumSize(QtCore.QSize(242, 16777215))
+        self.label_progress.setWordWrap(True)
+        self.label_progress.setText("")
+        self.label_progress.setObjectName("label_progress")
+        self.verticalLayout_4.addWidget(self.label_progress)
+        self.verticalLayout_right.addLayout(self.verticalLayout_4)
+        self.horizontalLayout_3.addWidget(self.splitter_2)
+        self.gridLayout_3.addWidget(self.frame, 0, 0, 1, 1)
+        self.tabs.addTab(self.main_tab, "")
+        self.log_tab = QtWidgets.QWidget()
+        self.log_tab.setEnabled(True)
+        self.log_tab.setObjectName("log_tab")
+        self.gridLayout_10 = QtWidgets.QGridLayout(self.log_tab)
+        self.gridLayout_10.setObjectName("gridLayout_10")
+        self.log = QtWidgets.QFormLayout()
+        self.log.setObjectName("log")
+        self.label_7 = QtWidgets.QLabel(self.log_tab)
+        self.label_7.setObjectName("label_7")
+        self.log.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.label_7)
+        self.gridLayout_10.addLayout(self.log, 0, 0, 1, 1)
+        self.tabs.addTab(self.log_tab, "")
+        self.performance_tab = QtWidgets.QWidget()
+        self.performance_tab.setEnabled(True)
+        self.performance_tab.setObjectName("performance_tab")
+        self.gridLayout_12 = QtWidgets.QGridLayout(self.performance_tab)
+        self.gridLayout_12.setObjectName("gridLayout_12")
+        self.horizontalLayout_performance = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_performance.setObjectName("horizontalLayout_performance")
+        self.checkbox_profiling = QtWidgets.QCheckBox(self.performance_tab)
+        self.checkbox_profiling.setObjectName("checkbox_profiling")
+        self.horizontalLayout_performance.addWidget(self.checkbox_profiling)
+        self.button_clear_spans = QtWidgets.QPushButton(self.performance_tab)
+        self.button_clear_spans.setObjectName("button_clear_spans")
+        self.horizontalLayout_performance.addWidget(self.button_clear_spans)
+        self.button_export_trace = QtWidgets.QPushButton(self.performance_tab)
+        self.button_export_trace.setObjectName("button_export_trace")
+        self.horizontalLayout_performance.addWidget(self.button_export_trace)
+        spacerItem = QtWidgets.QSpacerItem(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_performance.addItem(spacerItem)
+        self.label_spans = QtWidgets.QLabel(self.performance_tab)
+        self.label_spans.setText("")
+        self.label_spans.setObjectName("label_spans")
+        self.horizontalLayout_performance.addWidget(self.label_spans)
+        self.gridLayout_12.addLayout(self.horizontalLayout_performance, 0, 0, 1, 1)
+        self.table_spans = QtWidgets.QTableView(self.performance_tab)
+        self.table_spans.setObjectName("table_spans")
+        self.gridLayout_12.addWidget(self.table_spans, 1, 0, 1, 1)
+        self.tabs.addTab(self.performance_tab, "")
+        self.info_tab = QtWidgets.QWidget()
+        self.info_tab.setEnabled(True)
+        self.info_tab.setObjectName("info_tab")
+        self.gridLayout_101 = QtWidgets.QGridLayout(self.info_tab)
+        self.gridLayout_101.setObjectName("gridLayout_101")
+        self.frame_2 = QtWidgets.QFrame(self.info_tab)
+        self.frame_2.setFrameShape(QtWidgets.QFrame.StyledPanel)
+        self.frame_2.setFrameShadow(QtWidgets.QFrame.Raised)
+        self.frame_2.setObjectName("frame_2")
+        self.gridLayout_11 = QtWidgets.QGridLayout(self.frame_2)
+        self.gridLayout_11.setObjectName("gridLayout_11")
+        self.textEdit = QtWidgets.QTextEdit(self.frame_2)
+        self.textEdit.setObjectName("textEdit")
+        self.gridLayout_11.addWidget(self.textEdit, 0, 0, 1, 1)
+        self.gridLayout_101.addWidget(self.frame_2, 0, 0, 1, 1)
+        self.tabs.addTab(self.info_tab, "")
+        self.gridLayout_2.addWidget(self.tabs, 2, 8, 1, 1)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.actionExporter_les_r_sultats = QtWidgets.QAction(MainWindow)
+        self.actionExporter_les_r_sultats.setObjectName("actionExporter_les_r_sultats")
+
+        self.retranslateUi(MainWindow)
+        self.tabs.setCurrentIndex(0)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        self.checkbox_show_gpx.setText(_translate("MainWindow", "Show .gpx files only"))
+        self.line_edit_area.setPlaceholderText(_translate("MainWindow", "min lat, min lon, max lat, max lon | lat, lon, radius (km)"))
+        self.line_edit_area.setToolTip(_translate("MainWindow", "Show the tracks passing through a bounding box or within a radius of a point"))
+        self.button_search_area.setText(_translate("MainWindow", "Search area"))
+        self.button_clear_area.setText(_translate("MainWindow", "Show all"))
+        self.checkbox_remove_GPS_errors.setText(_translate("MainWindow", "Remove GPS errors"))
+        self.checkbox_remove_metadata.setText(_translate("MainWindow", "Remove metadata"))
+        self.checkbox_remove_time.setText(_translate("MainWindow", "Remove time data"))
+        self.checkbox_remove_elevation.setText(_translate("MainWindow", "Remove elevation data"))
+        self.checkbox_compress_data.setText(_translate("MainWindow", "Compress data"))
+        self.label_tolerance.setText(_translate("MainWindow", "Tolerance (m)"))
+        self.spinbox_tolerance.setToolTip(_translate("MainWindow", "Maximum distance between the simplified track and the original track"))
+        self.combo_simplification.setToolTip(_translate("MainWindow", "Simplification algorithm"))
+        self.button_export_gpx.setText(_translate("MainWindow", "Export to GPX"))
+        self.button_export_kml.setText(_translate("MainWindow", "Export to KML"))
+        self.button_export_csv.setText(_translate("MainWindow", "Export to CSV"))
+        self.button_clear_cache.setText(_translate("MainWindow", "Clear cache"))
+        self.combo_basemap.setToolTip(_translate("MainWindow", "Offline basemap (MBTiles file) drawn under the tracks"))
+        self.button_open_basemap.setToolTip(_translate("MainWindow", "Open a basemap (MBTiles file)"))
+        self.button_open_basemap.setText(_translate("MainWindow", "Open..."))
+        self.progress_bar.setFormat(_translate("MainWindow", "%p%"))
+        self.tabs.setTabText(self.tabs.indexOf(self.main_tab), _translate("MainWindow", "GPX"))
+        self.label_7.setText(_translate("MainWindow", "\n"
+"                            <html><head/><body><p><span\n"
+"                            style=\"\n"
+"                            font-size:14pt;\">Log</span></p></body></html>"))
+        self.tabs.setTabText(self.tabs.indexOf(self.log_tab), _translate("MainWindow", "Log"))
+        self.checkbox_profiling.setToolTip(_translate("MainWindow", "Record the duration of each stage (parsing, dataframe, drawing, export...)"))
+        self.checkbox_profiling.setText(_translate("MainWindow", "Record timings"))
+        self.button_clear_spans.setText(_translate("MainWindow", "Clear"))
+        self.button_export_trace.setToolTip(_translate("MainWindow", "Export the timings as a Chrome trace (chrome://tracing, Perfetto)"))
+        self.button_export_trace.setText(_translate("MainWindow", "Export trace"))
+        self.tabs.setTabText(self.tabs.indexOf(self.performance_tab), _translate("MainWindow", "Performance"))
+        self.tabs.setTabText(self.tabs.indexOf(self.info_tab), _translate("MainWindow", "Read me"))
+        self.actionExporter_les_r_sultats.setText(_translate("MainWindow", "Export results"))
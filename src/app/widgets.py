@@ -0,0 +1,54 @@
+from PyQt5.QtCore import QRect, QSize, Qt
+from PyQt5.QtGui import QPainter, QPixmap, QPixmapCache
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+# Logo of the application (shown until a track is plotted)
+LOGO_PATH = "img/logo.png"
+
+
+def logoPixmap(path: str = LOGO_PATH) -> QPixmap:
+    """
+    Return the logo of the application (decoded once, then kept in the
+    pixmap cache of Qt)
+
+    Parameters
+    ----------
+    path : str, optional
+        Path to the image, by default LOGO_PATH
+
+    Returns
+    -------
+    QPixmap
+        Logo (null pixmap if the image cannot be read)
+    """
+    pixmap = QPixmapCache.find(path)
+    if pixmap is None or pixmap.isNull():
+        pixmap = QPixmap(path)
+        QPixmapCache.insert(path, pixmap)
+    return pixmap
+
+
+class LogoWidget(QWidget):
+    """
+    Default map: the logo scaled to fit the widget (drawn by Qt, so the
+    matplotlib canvas is only created once a track is plotted).
+    """
+
+    def __init__(self, parent=None, width: int = 500, height: int = 400, path: str = LOGO_PATH):
+        super(LogoWidget, self).__init__(parent)
+        self.pixmap: QPixmap = logoPixmap(path)
+        self.size_hint = QSize(width, height) # Same as the map canvas
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def sizeHint(self) -> QSize:
+        return self.size_hint
+
+    def paintEvent(self, event):
+        if self.pixmap.isNull():
+            return
+        size = self.pixmap.size().scaled(self.size(), Qt.KeepAspectRatio)
+        target = QRect(0, 0, size.width(), size.height())
+        target.moveCenter(self.rect().center())
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(target, self.pixmap)
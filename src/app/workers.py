@@ -1,6 +1,116 @@
-import sys, traceback
-from PyQt5.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
-from .logger import Log
+import sys, time, traceback, itertools, threading, queue
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from enum import Enum, IntEnum
+from typing import Iterable, List, Optional, Set
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from .logger import Log, emitLog
+from .processes import ProcessPool, SharedResult
+from .profiling import profileSpan
+
+
+class Priority(IntEnum):
+    """
+    Worker priority (ready workers with the highest priority are started first).
+    """
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
+# Minimum delay (seconds) between two progress signals of a worker
+PROGRESS_INTERVAL = 0.1
+
+# Delay (seconds) between two cancellation checks while waiting for a process
+PROCESS_POLL_INTERVAL = 0.1
+
+
+class Progress():
+    """
+    Progress of a stage of a worker (ie: parsing, pre-processing, export).
+    """
+    __slots__ = ("stage", "done", "total", "points", "elapsed")
+
+    def __init__(self, stage: str, done: int, total: int, points: int, elapsed: float):
+        self.stage: str = stage
+        self.done: int = done # Work done (stage unit: bytes, steps...)
+        self.total: int = total # Total work (stage unit)
+        self.points: int = points # Number of track points processed
+        self.elapsed: float = elapsed # Time (seconds) since the beginning of the stage
+
+    @property
+    def fraction(self) -> float:
+        """
+        Fraction of the work done (between 0 and 1)
+        """
+        return min(1.0, self.done / self.total) if self.total > 0 else 1.0
+
+    @property
+    def rate(self) -> float:
+        """
+        Throughput (points per second)
+        """
+        return self.points / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """
+        Estimated remaining time (seconds), None if unknown
+        """
+        if self.done <= 0 or self.elapsed <= 0:
+            return None
+        return self.elapsed * (self.total - self.done) / self.done
+
+    def isComplete(self) -> bool:
+        """
+        Return True if all the work of the stage is done
+        """
+        return self.done >= self.total
+
+
+class WorkerCancelled(Exception):
+    """
+    Raised at a checkpoint of a cancelled worker.
+    """
+
+
+class CancellationToken():
+    """
+    Cooperative cancellation flag shared between the GUI thread and a worker.
+    Long tasks call check() at regular checkpoints, which raises
+    WorkerCancelled once cancellation has been requested.
+    """
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        """
+        Request cancellation
+        """
+        self.event.set()
+
+    def isCancelled(self) -> bool:
+        """
+        Return True if cancellation has been requested
+        """
+        return self.event.is_set()
+
+    def check(self):
+        """
+        Checkpoint: raise WorkerCancelled if cancellation has been requested
+        """
+        if self.event.is_set():
+            raise WorkerCancelled()
+
+
+class WorkerState(Enum):
+    """
+    Worker life cycle.
+    """
+    PENDING = 0
+    RUNNING = 1
+    FINISHED = 2
+    FAILED = 3
+    CANCELLED = 4
 
 class WorkerSignals(QObject):
     """
@@ -9,7 +119,7 @@ class WorkerSignals(QObject):
     Supported signals are:
 
     finished
-        No data
+        No data (emitted when the worker stops, even if it failed or was cancelled)
 
     error
         tuple (exctype, value, traceback.format_exc() )
@@ -18,22 +128,51 @@ class WorkerSignals(QObject):
         object data returned from processing, anything
 
     progress
-        int indicating % progress
+        Progress of the current stage (throttled, see Worker.reportProgress)
 
     """
     finished = pyqtSignal()
     error = pyqtSignal(tuple)
-    result = pyqtSignal(list)
-    progress = pyqtSignal(int)
+    result = pyqtSignal(object)
+    progress = pyqtSignal(object)
     log = pyqtSignal(Log, str)
 
 
 class Worker(QRunnable):
     """
     Worker thread, inherits from QRunnable (to handle worker thread setup), signals and wrap-up.
+
+    Scheduling options (used by WorkerScheduler):
+        priority: ready workers with the highest priority are started first
+        dependencies: workers that must have finished successfully before this one starts
+        resources: names of the shared resources used by the worker (workers
+                   sharing a resource never run at the same time)
+        group: name of the group of the worker (see WorkerScheduler.cancelGroup)
+
+    The function can call worker.token.check() at checkpoints to stop early
+    when the worker is cancelled (no result is emitted in that case).
+
+    Process execution (pool: ProcessPool): the function (module level) is run
+    in a worker process with arg and a progress function (reported as the
+    given stage); the thread of the worker waits for it, reports the
+    progress messages queued by the pool and unpacks shared memory results
+    (SharedResult) before emitting them, so the signals are the same as for
+    thread execution. Cancelling the worker cancels the task
+    (it stops at the next checkpoint of the function in the process).
     """
-    def __init__(self, fn, *args, **kwargs):
+    def __init__(self,
+                 fn,
+                 *args,
+                 priority: Priority = Priority.NORMAL,
+                 dependencies: Optional[Iterable["Worker"]] = None,
+                 resources: Optional[Iterable[str]] = None,
+                 group: Optional[str] = None,
+                 pool: Optional[ProcessPool] = None,
+                 stage: Optional[str] = None,
+                 **kwargs):
         super(Worker, self).__init__()
+        # The scheduler keeps track of the worker after it has run
+        self.setAutoDelete(False)
 
         # Store constructor arguments (re-used for processing)
         self.fn = fn
@@ -43,16 +182,310 @@ class Worker(QRunnable):
         self.kwargs["arg"] = kwargs["arg"]
         self.kwargs["worker"] = self
 
+        # Scheduling
+        self.priority: Priority = priority
+        self.dependencies: List[Worker] = list(dependencies) if dependencies is not None else []
+        self.resources: Set[str] = set(resources) if resources is not None else set()
+        self.group: Optional[str] = group
+        self.pool: Optional[ProcessPool] = pool
+        self.state: WorkerState = WorkerState.PENDING
+        self.error: Optional[tuple] = None
+        self.token = CancellationToken()
+
+        # Progress reporting
+        self.process_stage: str = stage if stage is not None else self.name
+        self.stage: Optional[str] = None
+        self.stage_start: float = 0.0
+        self.stage_complete: bool = False
+        self.last_progress: float = 0.0
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the function executed by the worker
+        """
+        return getattr(self.fn, "__name__", repr(self.fn))
+
+    def isDone(self) -> bool:
+        """
+        Return True if the worker will not run anymore (finished, failed or cancelled)
+        """
+        return self.state in (WorkerState.FINISHED, WorkerState.FAILED, WorkerState.CANCELLED)
+
+    def cancel(self):
+        """
+        Request cooperative cancellation of the worker
+        """
+        self.token.cancel()
+
+    def startStage(self, stage: str):
+        """
+        Start measuring the progress of a stage
+
+        Args:
+            stage (str): Name of the stage
+        """
+        self.stage = stage
+        self.stage_start = time.perf_counter()
+        self.stage_complete = False
+        self.last_progress = 0.0
+
+    def reportProgress(self, stage: str, done: int, total: int, points: int = 0):
+        """
+        Emit the progress of a stage (at most every PROGRESS_INTERVAL seconds,
+        the first report and the completion of a stage are always emitted)
+
+        Args:
+            stage (str): Name of the stage
+            done (int): Work done
+            total (int): Total work
+            points (int, optional): Number of track points processed. Defaults to 0.
+        """
+        if stage != self.stage:
+            self.startStage(stage)
+        if self.stage_complete:
+            return
+        now = time.perf_counter()
+        if done < total and now - self.last_progress < PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+        self.stage_complete = done >= total
+        self.signals.progress.emit(Progress(stage, done, total, points, now - self.stage_start))
+
+    def progressCallback(self, stage: str):
+        """
+        Return a function reporting the progress of a stage, to pass as the
+        progress argument of readers, pre-processing and exporters
+
+        Args:
+            stage (str): Name of the stage
+
+        Returns:
+            Callable[[int, int, int], None]: Function called with the work done,
+                                             the total work and the number of points processed
+        """
+        def progress(done: int, total: int, points: int):
+            self.reportProgress(stage, done, total, points)
+        self.startStage(stage)
+        return progress
+
+    def runInProcess(self):
+        """
+        Run the function in the process pool and wait for its result
+
+        Returns:
+            Any: Result of the function (loaded if it is a SharedResult)
+        """
+        # The dispatcher thread of the pool only queues the progress messages,
+        # the progress state of the worker is only updated by its own thread
+        messages = queue.SimpleQueue()
+        report = self.progressCallback(self.process_stage)
+
+        def reportMessages():
+            while not messages.empty():
+                report(*messages.get())
+
+        future = self.pool.submit(self.fn, self.kwargs["arg"], lambda *message: messages.put(message))
+        while True:
+            if self.token.isCancelled():
+                self.pool.cancel(future)
+                raise WorkerCancelled()
+            try:
+                result = future.result(timeout=PROCESS_POLL_INTERVAL)
+            except FutureTimeoutError:
+                reportMessages()
+                continue
+            reportMessages()
+            if isinstance(result, SharedResult):
+                if self.token.isCancelled():
+                    result.release()
+                    raise WorkerCancelled()
+                result = result.load()
+            return result
+
     @pyqtSlot()
     def run(self):
         """
         Initialise the runner function with passed args, kwargs.
         """
         # Retrieve args/kwargs and start working
+        self.state = WorkerState.RUNNING
+        arg = self.kwargs["arg"]
+        path = arg if isinstance(arg, str) else getattr(arg, "path", None)
         try:
-            self.fn(*self.args, **self.kwargs)
+            with profileSpan(self.name, "worker" if self.pool is None else "process", path):
+                self.token.check()
+                if self.pool is not None:
+                    result = self.runInProcess()
+                else:
+                    result = self.fn(*self.args, **self.kwargs)
+        except WorkerCancelled:
+            self.state = WorkerState.CANCELLED
         except:
             exctype, value = sys.exc_info()[:2]
-            self.signals.error.emit((exctype, value, traceback.format_exc()))
+            self.error = (exctype, value, traceback.format_exc())
+            self.state = WorkerState.FAILED
+            self.signals.error.emit(self.error)
+        else:
+            self.state = WorkerState.FINISHED
+            if result is not None:
+                self.signals.result.emit(result)
         finally:
-            self.signals.finished.emit()
\ No newline at end of file
+            self.signals.finished.emit()
+
+
+class WorkerScheduler(QObject):
+    """
+    Dispatch workers to a thread pool.
+
+    A pending worker is started when all its dependencies have finished
+    successfully, none of its resources is used by a running worker and a
+    thread is available. Ready workers are started by decreasing priority,
+    then in submission order. Workers depending on a failed or cancelled
+    worker are cancelled. Must be used from the GUI thread.
+    """
+    def __init__(self, threadpool: QThreadPool = None, max_nb_threads: int = None):
+        super(WorkerScheduler, self).__init__()
+        self.threadpool: QThreadPool = threadpool if threadpool is not None else QThreadPool.globalInstance()
+        self.max_nb_threads: int = max(1, max_nb_threads if max_nb_threads is not None else self.threadpool.maxThreadCount())
+        self.pending: List[Worker] = []
+        self.running: List[Worker] = []
+        self.busy_resources: Set[str] = set()
+        self.sequence = itertools.count()
+
+    def submit(self, worker: Worker) -> Worker:
+        """
+        Add a worker to the scheduler
+
+        Parameters
+        ----------
+        worker : Worker
+            Worker to run
+
+        Returns
+        -------
+        Worker
+            Submitted worker
+        """
+        worker.sequence = next(self.sequence)
+        worker.state = WorkerState.PENDING
+        # Connected after the slots of the caller, so completion handlers run before dispatching
+        worker.signals.finished.connect(lambda worker=worker: self.onWorkerFinished(worker))
+        self.pending.append(worker)
+        self.dispatch()
+        return worker
+
+    def cancel(self, worker: Worker) -> bool:
+        """
+        Cancel a worker: pending workers (and the workers depending on them)
+        are removed, running workers stop at their next checkpoint
+
+        Parameters
+        ----------
+        worker : Worker
+            Worker to cancel
+
+        Returns
+        -------
+        bool
+            True if the worker was pending or running
+        """
+        worker.cancel()
+        if worker in self.running:
+            return True
+        if worker not in self.pending:
+            return False
+        self.pending.remove(worker)
+        worker.state = WorkerState.CANCELLED
+        self.cancelDependents()
+        return True
+
+    def cancelGroup(self, group: str) -> int:
+        """
+        Cancel the pending and running workers of a group (ie: superseded by a newer request)
+
+        Parameters
+        ----------
+        group : str
+            Name of the group
+
+        Returns
+        -------
+        int
+            Number of cancelled workers
+        """
+        workers = [worker for worker in self.pending + self.running
+                   if worker.group == group and not worker.token.isCancelled()]
+        for worker in workers:
+            self.cancel(worker)
+        return len(workers)
+
+    def nbRunning(self) -> int:
+        """
+        Return the number of running workers
+        """
+        return len(self.running)
+
+    def nbPending(self) -> int:
+        """
+        Return the number of pending workers
+        """
+        return len(self.pending)
+
+    def isIdle(self) -> bool:
+        """
+        Return True if no worker is pending or running
+        """
+        return not self.pending and not self.running
+
+    def isReady(self, worker: Worker) -> bool:
+        """
+        Return True if a pending worker can be started
+        """
+        return (all(dependency.state == WorkerState.FINISHED for dependency in worker.dependencies)
+                and not (worker.resources & self.busy_resources))
+
+    def cancelDependents(self):
+        """
+        Cancel pending workers depending (directly or not) on a failed or cancelled worker
+        """
+        cancelled = True
+        while cancelled:
+            cancelled = False
+            for worker in list(self.pending):
+                if any(dependency.state in (WorkerState.FAILED, WorkerState.CANCELLED) for dependency in worker.dependencies):
+                    self.pending.remove(worker)
+                    worker.state = WorkerState.CANCELLED
+                    emitLog(Log.WARNING, f"Cancelled {worker.name}: a dependency did not complete")
+                    cancelled = True
+
+    def dispatch(self):
+        """
+        Start ready workers while threads are available
+        """
+        while len(self.running) < self.max_nb_threads:
+            ready = [worker for worker in self.pending if self.isReady(worker)]
+            if not ready:
+                return
+            worker = max(ready, key=lambda worker: (worker.priority, -worker.sequence))
+            self.pending.remove(worker)
+            self.running.append(worker)
+            self.busy_resources |= worker.resources
+            worker.state = WorkerState.RUNNING
+            self.threadpool.start(worker)
+
+    def onWorkerFinished(self, worker: Worker):
+        """
+        Function executed (in the GUI thread) when a worker has finished
+        """
+        if worker not in self.running:
+            return
+        self.running.remove(worker)
+        self.busy_resources -= worker.resources
+        if worker.state == WorkerState.FAILED:
+            emitLog(Log.ERROR, f"{worker.name} failed: {worker.error[1]!r}")
+            self.cancelDependents()
+        elif worker.state == WorkerState.CANCELLED:
+            emitLog(Log.DEBUG, f"{worker.name} cancelled")
+            self.cancelDependents()
+        self.dispatch()
\ No newline at end of file